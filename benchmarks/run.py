@@ -0,0 +1,420 @@
+"""
+run.py — End-to-end benchmark of the ingest -> parse -> model -> paint hot paths.
+
+Drives synthetic (or recorded) `@ticker`, `@bookTicker`, `@depth@100ms`, `@aggTrade` and `@kline`
+traffic through the real stream handlers from a producer thread, exactly as the
+StreamHub engine thread would, while the UI thread runs the UiScheduler frame loop.
+
+  tk     the real panels (MiniTickerWidget, StatsPanel, OrderBookPanel, KlinePanel) in a
+         Tk window; needs a display — an Xvfb server is started if none is set
+  model  no display: the same models (LocalOrderBook, candle rows, CandleRenderer on an
+         Agg canvas) painted through the same scheduler driven by a manual `after` clock
+
+Reports handler throughput and p50/p99 latency per stream, UI frame times, scheduler
+backlog/coalescing, UI loop lag and RSS growth, and writes them as JSON:
+
+    python -m benchmarks.run --messages 50000 --rate 0
+    python -m benchmarks.run --mode model --replay capture.bin --compare bench_results/abc123-model.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from config import AGG_INTERVALS, KLINE_LIMIT_DEFAULT, KLINE_RING_CAPACITY, ORDERBOOK_DEFAULT_LEVELS, ORDERBOOK_LADDER_LEVELS, UI_FPS
+from utils import binance_api, kline_store
+from utils.aggregator import CandleAggregator
+from utils.book_analytics import BookAnalytics
+from utils.flow import TradeFlow
+from utils.heatmap import DepthHeatmap
+from utils.candles import CandleRing
+from utils.decode import BACKEND as JSON_BACKEND, decode_message
+from utils.sysinfo import rss_mb
+from components.ui_scheduler import UiScheduler
+from benchmarks.traffic import RecordedMarket, SyntheticMarket
+
+SAMPLE_MS = 50   # UI loop lag / backlog / RSS sampling period
+
+
+# ---------------------------------------------------------------------------
+# Harness plumbing
+# ---------------------------------------------------------------------------
+class BenchHub:
+    """StreamHub stand-in: same subscribe API; `route` parses and dispatches on the calling thread."""
+    def __init__(self):
+        self._consumers: Dict[str, List[Callable]] = {}
+        self.dropped = 0
+
+    def subscribe(self, stream: str, callback: Callable):
+        self._consumers.setdefault(stream, []).append(callback)
+
+    def unsubscribe(self, stream: str, callback: Callable):
+        cbs = self._consumers.get(stream)
+        if cbs and callback in cbs: cbs.remove(callback)
+
+    def route(self, raw: str) -> Optional[str]:
+        stream, data = decode_message(raw)
+        for cb in self._consumers.get(stream, ()): cb(data)
+        return stream
+
+
+class TimedScheduler(UiScheduler):
+    """UiScheduler that records the backlog and duration of every frame."""
+    def __init__(self, root, fps: int = UI_FPS):
+        super().__init__(root, fps)
+        self.frame_ms: List[float] = []
+        self.backlog: List[int] = []
+
+    def _tick(self):
+        self.backlog.append(len(self._pending))
+        t0 = time.perf_counter()
+        super()._tick()
+        self.frame_ms.append((time.perf_counter() - t0) * 1000)
+
+
+class ManualRoot:
+    """Just enough of Tk's `after`/`mainloop` for the UiScheduler when there is no display."""
+    def __init__(self):
+        self._jobs: Dict[int, tuple] = {}
+        self._seq = 0
+        self._running = False
+
+    def after(self, ms: int, fn: Callable, *args):
+        self._seq += 1
+        self._jobs[self._seq] = (time.monotonic() + ms / 1000, fn, args)
+        return self._seq
+
+    def after_cancel(self, job): self._jobs.pop(job, None)
+
+    def pending_after(self) -> int: return len(self._jobs)
+
+    def mainloop(self):
+        self._running = True
+        while self._running and self._jobs:
+            job, (due, fn, args) = min(self._jobs.items(), key=lambda kv: kv[1][0])
+            wait = due - time.monotonic()
+            if wait > 0: time.sleep(wait)
+            if self._jobs.pop(job, None) is not None: fn(*args)
+
+    def quit(self): self._running = False
+
+    def destroy(self): self._jobs.clear()
+
+
+def _tk_pending_after(root) -> int:
+    return len(root.tk.splitlist(root.tk.call('after', 'info')))
+
+
+def start_xvfb(display: str):
+    """Start a headless X server when no display is available; returns the process or None."""
+    if os.environ.get('DISPLAY') or sys.platform in ('win32', 'darwin'): return None
+    xvfb = shutil.which('Xvfb')
+    if xvfb is None: return None
+    proc = subprocess.Popen([xvfb, display, '-screen', '0', '1600x1000x24', '-nolisten', 'tcp'],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(0.5)
+    if proc.poll() is not None: return None
+    os.environ['DISPLAY'] = display
+    return proc
+
+
+def _wait(cond: Callable[[], bool], root, timeout: float = 15.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if cond(): return True
+        if isinstance(root, ManualRoot): time.sleep(0.01)
+        else: root.update()
+    return cond()
+
+
+# ---------------------------------------------------------------------------
+# Pipelines
+# ---------------------------------------------------------------------------
+def build_tk(root, hub, scheduler, symbol: str, interval: str):
+    """The real dashboard panels for one symbol; returns a readiness check."""
+    import tkinter as tk
+    from components.features import apply_dark_theme, StatsPanel, KlinePanel
+    from components.orderbook import OrderBookPanel
+    from main import MiniTickerWidget
+    apply_dark_theme(root); root.geometry('1280x800')
+    ticker = MiniTickerWidget(root, symbol, hub, scheduler); ticker.pack(fill=tk.X)
+    stats = StatsPanel(root, symbol=symbol, hub=hub, scheduler=scheduler); stats.pack(fill=tk.X)
+    book = OrderBookPanel(root, symbol, hub, scheduler, limit=ORDERBOOK_DEFAULT_LEVELS); book.pack(side=tk.LEFT, fill=tk.Y)
+    kline = KlinePanel(root, symbol, hub, scheduler, interval=interval, limit=KLINE_LIMIT_DEFAULT)
+    kline.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    ticker.start_stream(); stats.start(); book.start(); kline.start()
+    return lambda: book.feed.synced and kline.series.loaded
+
+
+class ModelPipeline:
+    """Display-free counterpart of the panels: same parsing, models and chart renderer."""
+    def __init__(self, hub, scheduler, symbol: str, interval: str, levels: int = ORDERBOOK_DEFAULT_LEVELS):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        from config import ticker_stream, book_ticker_stream, depth_stream, kline_stream
+        from components.candle_chart import CandleRenderer
+        from components.heatmap import HeatmapRenderer
+        from utils.local_book import LocalOrderBook
+        self.scheduler = scheduler; self.levels = levels
+        self.labels: Dict[str, str] = {}
+        self.book = LocalOrderBook(symbol)
+        self.analytics = BookAnalytics(symbol)
+        self.heatmap = DepthHeatmap(symbol); self._heat_painted = 0.0
+        fig = Figure(figsize=(8, 5), dpi=100)
+        gs = fig.add_gridspec(2, 1, height_ratios=[3, 1])
+        ax_price = fig.add_subplot(gs[0]); ax_vol = fig.add_subplot(gs[1], sharex=ax_price)
+        self.renderer = CandleRenderer(fig, ax_price, ax_vol, FigureCanvasAgg(fig))
+        hfig = Figure(figsize=(4, 5), dpi=100)
+        self.heat_renderer = HeatmapRenderer(hfig, hfig.add_subplot(111), FigureCanvasAgg(hfig), self.heatmap)
+        kl = binance_api.get_klines(symbol, interval, KLINE_LIMIT_DEFAULT) or []
+        self.data = CandleRing(KLINE_RING_CAPACITY)
+        if kl:
+            rows = np.array([k[:6] for k in kl], dtype=float); rows[:, 0] /= 1000.0
+            self.data.extend(rows)
+        self._lock = threading.Lock()
+        self._full = True
+        hub.subscribe(ticker_stream(symbol), self.on_ticker)
+        hub.subscribe(book_ticker_stream(symbol), self.on_book)
+        hub.subscribe(depth_stream(symbol, fast_100ms=True), self.on_depth)
+        self.interval = interval
+        self.agg = CandleAggregator(symbol, hub)   # chart candles from the one base stream, as in KlinePanel
+        self.agg.subscribe(self.on_candle)
+        self.flow = TradeFlow(symbol, hub); self.flow.subscribe(self.on_flow)
+        if interval not in AGG_INTERVALS: hub.subscribe(kline_stream(symbol, interval), self.on_kline)
+        scheduler.post(self.render_chart)
+
+    def ready(self) -> bool: return self.book.synced and self.agg.ready
+
+    def on_ticker(self, t):
+        last, change, pct = t.last, t.change, t.change_pct
+        sign = '+' if change >= 0 else ''
+        self.scheduler.post(self.set_label, 'last', f"${last:,.2f} {sign}{change:,.2f} ({sign}{pct:.2f}%)")
+
+    def on_book(self, b):
+        bid, ask = b.bid, b.ask
+        self.scheduler.post(self.set_label, 'bbo', f"BID {bid:,.2f} ASK {ask:,.2f} Spread: {ask - bid:.4f}")
+
+    def on_depth(self, ev):
+        if not self.book.on_event(ev): return
+        bp, bq, ap, aq = self.book.depth(ORDERBOOK_LADDER_LEVELS)   # as OrderBookPanel: whole ladder, raw grouping
+        m = self.analytics.update(bp, bq, ap, aq)
+        self.heatmap.sample(ev.event_time / 1000.0, bp, bq, ap, aq)
+        now = time.monotonic()
+        if now - self._heat_painted >= self.heatmap.column_sec:   # HeatmapPanel paints on a column_sec timer
+            self._heat_painted = now; self.scheduler.post(self.heat_renderer.render)
+        if m: self.scheduler.post(self.set_label, 'book_stats', f"{m.imbalance:+.3f} Micro {m.microprice:,.2f}")
+        self.scheduler.post(self.render_book, (bp, bq, np.cumsum(bq)), (ap, aq, np.cumsum(aq)))
+
+    def on_candle(self, c):
+        if c.interval == self.interval: self.apply_row(c[1:7])
+
+    def on_flow(self, stats):
+        for f in stats:
+            self.scheduler.post(self.set_label, f'flow_{f.window:g}', f"Buy: {f.buy_volume:,.1f}  Sell: {f.sell_volume:,.1f}  "
+                                                                     f"Ratio: {f.buy_ratio:.3f}  {f.trades:,} trades")
+
+    def on_kline(self, k):
+        self.apply_row((k.open_time / 1000.0, k.open, k.high, k.low, k.close, k.volume))
+
+    def apply_row(self, row):
+        with self._lock:
+            last_t = self.data.last_time()
+            if row[0] == last_t: self.data.update_last(row)
+            elif not self.data or row[0] > last_t: self.data.append(row); self._full = True
+        self.scheduler.post(self.render_chart)
+
+    # ----- paint side (UI thread) -----
+    def set_label(self, key, text): self.labels[key] = text
+
+    def render_book(self, bids, asks):
+        # the ladder only formats its visible rows
+        self.labels['book'] = [(f"{p:,.2f}", f"{q:,.4f}", f"{c:,.4f}")
+                               for side in (bids, asks) for p, q, c in zip(*(a[:self.levels].tolist() for a in side))]
+
+    def render_chart(self):
+        with self._lock:
+            if not self.data: return
+            full, self._full = self._full, False
+            last = self.data.last()
+        if not full and self.renderer.update_last(*last[1:]): return
+        with self._lock: cols = self.data.view(KLINE_LIMIT_DEFAULT).copy()
+        self.renderer.set_data(*cols)
+
+
+# ---------------------------------------------------------------------------
+# Run + report
+# ---------------------------------------------------------------------------
+def _summary(values, scale: float = 1.0) -> dict:
+    if not len(values): return {'count': 0}
+    a = np.asarray(values, dtype=float) * scale
+    return {'count': int(len(a)), 'p50': round(float(np.percentile(a, 50)), 3),
+            'p99': round(float(np.percentile(a, 99)), 3), 'max': round(float(a.max()), 3),
+            'mean': round(float(a.mean()), 3)}
+
+
+def _git_commit() -> str:
+    here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        rev = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=here, capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=here,
+                               capture_output=True, text=True).stdout.strip()
+        return (rev or 'unknown') + ('-dirty' if dirty else '')
+    except OSError:
+        return 'unknown'
+
+
+def run(args) -> dict:
+    market = RecordedMarket(args.replay) if args.replay else SyntheticMarket(args.symbol, args.interval, seed=args.seed)
+    binance_api.client = market.rest   # panels' REST loads are served by the traffic source
+    kline_store.KLINE_STORE_DIR = tempfile.mkdtemp(prefix='bench-klines-')   # fresh backfill, ~/.binance_dashboard untouched
+    symbol, interval = market.symbol, market.interval
+
+    mode = args.mode; xvfb = None
+    if mode in ('auto', 'tk'):
+        xvfb = start_xvfb(args.xvfb_display)
+        if os.environ.get('DISPLAY') or sys.platform in ('win32', 'darwin'): mode = 'tk'
+        elif mode == 'tk': sys.exit('tk mode needs a display (set DISPLAY or install Xvfb)')
+        else: mode = 'model'
+
+    try:
+        if mode == 'tk':
+            import tkinter as tk
+            root = tk.Tk(); pending_after = lambda: _tk_pending_after(root)
+        else:
+            root = ManualRoot(); pending_after = root.pending_after
+        hub = BenchHub()
+        scheduler = TimedScheduler(root, args.fps)
+        if mode == 'tk': ready = build_tk(root, hub, scheduler, symbol, interval)
+        else: ready = ModelPipeline(hub, scheduler, symbol, interval).ready
+        scheduler.start()
+
+        for raw in market.messages(args.warmup): hub.route(raw)   # sends the book through its snapshot sync
+        if not _wait(ready, root): print('warning: panels not ready after warm-up, measuring anyway')
+        scheduler.frame_ms.clear(); scheduler.backlog.clear()
+        scheduler.posted = scheduler.coalesced = 0
+
+        msgs = market.messages(args.messages)
+        lat: Dict[str, List[int]] = {}
+        done = threading.Event(); elapsed = [0.0]
+        rss0 = rss_mb(); rss_peak = [rss0]; lag_ms: List[float] = []; after_backlog: List[int] = []
+
+        def produce():
+            start = time.perf_counter(); clock = time.perf_counter_ns
+            for i, raw in enumerate(msgs):
+                if args.rate > 0:
+                    delay = start + i / args.rate - time.perf_counter()
+                    if delay > 0: time.sleep(delay)
+                t0 = clock()
+                try: stream = hub.route(raw)
+                except Exception as e: print('handler error', e); stream = None
+                lat.setdefault((stream or '?').split('@', 1)[-1], []).append(clock() - t0)
+            elapsed[0] = time.perf_counter() - start
+            done.set()
+
+        def sample(expected):
+            lag_ms.append(max(0.0, (time.monotonic() - expected) * 1000))
+            after_backlog.append(pending_after()); rss_peak[0] = max(rss_peak[0], rss_mb())
+            if done.is_set() and not scheduler._pending: root.quit(); return
+            root.after(SAMPLE_MS, sample, time.monotonic() + SAMPLE_MS / 1000)
+
+        threading.Thread(target=produce, name='bench-producer', daemon=True).start()
+        root.after(SAMPLE_MS, sample, time.monotonic() + SAMPLE_MS / 1000)
+        root.mainloop()
+        rss1 = rss_mb()
+        scheduler.stop()
+        root.destroy()
+    finally:
+        if xvfb is not None: xvfb.terminate()
+        shutil.rmtree(kline_store.KLINE_STORE_DIR, ignore_errors=True)
+
+    total = sum(len(v) for v in lat.values())
+    all_lat = [x for v in lat.values() for x in v]
+    return {
+        'commit': _git_commit(), 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'), 'mode': mode,
+        'source': args.replay or 'synthetic', 'symbol': symbol, 'interval': interval,
+        'python': platform.python_version(), 'platform': platform.platform(), 'json_backend': JSON_BACKEND,
+        'params': {'messages': args.messages, 'rate': args.rate, 'fps': args.fps, 'seed': args.seed},
+        'ingest': {'messages': total, 'seconds': round(elapsed[0], 3),
+                   'msgs_per_sec': round(total / elapsed[0], 1) if elapsed[0] else None,
+                   'latency_us': _summary(all_lat, 1e-3)},
+        'streams': {k: {'messages': len(v), 'latency_us': _summary(v, 1e-3)} for k, v in sorted(lat.items())},
+        'ui': {'frame_ms': _summary(scheduler.frame_ms), 'backlog': _summary(scheduler.backlog),
+               'posted': scheduler.posted, 'coalesced': scheduler.coalesced,
+               'loop_lag_ms': _summary(lag_ms), 'pending_after': _summary(after_backlog)},
+        'rss_mb': {'start': round(rss0, 1), 'end': round(rss1, 1), 'peak': round(rss_peak[0], 1),
+                   'growth': round(rss1 - rss0, 1)},
+    }
+
+
+# metrics compared by --compare: (path, higher is better)
+KEY_METRICS = (
+    (('ingest', 'msgs_per_sec'), True), (('ingest', 'latency_us', 'p50'), False),
+    (('ingest', 'latency_us', 'p99'), False), (('ui', 'frame_ms', 'p50'), False), (('ui', 'frame_ms', 'p99'), False),
+    (('ui', 'loop_lag_ms', 'p99'), False), (('ui', 'backlog', 'max'), False), (('rss_mb', 'growth'), False),
+)
+
+
+def _get(d: dict, path):
+    for k in path: d = d.get(k) if isinstance(d, dict) else None
+    return d
+
+
+def print_report(res: dict, base: Optional[dict] = None):
+    print(f"\n{res['mode']} mode, {res['source']} {res['symbol']} @ {res['commit']}, {res.get('json_backend')} decoder")
+    print(f"{'stream':<16}{'msgs':>8}{'p50 us':>10}{'p99 us':>10}{'max us':>10}")
+    for name, s in res['streams'].items():
+        l = s['latency_us']
+        print(f"{name:<16}{s['messages']:>8}{l.get('p50', 0):>10.1f}{l.get('p99', 0):>10.1f}{l.get('max', 0):>10.1f}")
+    print(f"\n{'metric':<28}{'value':>12}" + (f"{'base':>12}{'change':>10}" if base else ''))
+    for path, higher_better in KEY_METRICS:
+        v = _get(res, path); line = f"{'.'.join(path):<28}{v if v is not None else '-':>12}"
+        if base:
+            b = _get(base, path)
+            if isinstance(v, (int, float)) and isinstance(b, (int, float)) and b:
+                ch = (v - b) / abs(b) * 100; worse = ch < 0 if higher_better else ch > 0
+                line += f"{b:>12}{ch:>+9.1f}%" + (' !' if worse and abs(ch) >= 10 else '')
+            else:
+                line += f"{b if b is not None else '-':>12}"
+        print(line)
+    print(f"posted {res['ui']['posted']}, coalesced {res['ui']['coalesced']}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Benchmark the dashboard stream handlers and UI frame loop.')
+    ap.add_argument('--mode', choices=('auto', 'tk', 'model'), default='auto',
+                    help='tk = real panels (Xvfb if no display), model = no display, auto = tk when possible')
+    ap.add_argument('--replay', help='drive a capture from utils/recorder.py instead of synthetic traffic')
+    ap.add_argument('--symbol', default='BTCUSDT')
+    ap.add_argument('--interval', default='1m', help='kline interval of the synthetic stream')
+    ap.add_argument('--messages', type=int, default=20000)
+    ap.add_argument('--warmup', type=int, default=500)
+    ap.add_argument('--rate', type=float, default=0, help='messages/sec offered, 0 = as fast as possible')
+    ap.add_argument('--fps', type=int, default=UI_FPS)
+    ap.add_argument('--seed', type=int, default=1)
+    ap.add_argument('--xvfb-display', default=':99')
+    ap.add_argument('--out', help='JSON result path (default bench_results/<commit>-<mode>.json)')
+    ap.add_argument('--compare', help='earlier JSON result to diff against')
+    a = ap.parse_args()
+
+    res = run(a)
+    out = a.out or os.path.join('bench_results', f"{res['commit']}-{res['mode']}.json")
+    os.makedirs(os.path.dirname(out) or '.', exist_ok=True)
+    with open(out, 'w') as f: json.dump(res, f, indent=2)
+    base = None
+    if a.compare:
+        with open(a.compare) as f: base = json.load(f)
+    print_report(res, base)
+    print(f"\nresults written to {out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""
+traffic.py — Market data sources for the benchmark harness.
+
+SyntheticMarket produces deterministic Binance-shaped `@ticker`, `@bookTicker`,
+`@depth@100ms`, `@aggTrade` and `@kline_<interval>` combined-stream messages for one symbol
+(random-walk mid price, a consistent diff-depth sequence) plus the matching REST
+snapshots. RecordedMarket serves a capture made by utils/recorder.py instead.
+Both expose `messages(n)` -> raw combined-stream strings and a `rest` client that
+stands in for utils.binance_api.client, so the REST loads stay offline.
+"""
+import json
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from config import ticker_stream, book_ticker_stream, depth_stream, kline_stream, agg_trade_stream
+from utils.candles import interval_ms
+
+# relative message rates of a busy symbol (bookTicker dominates, ticker is 1/s)
+MIX = (('bookTicker', 60), ('depth', 25), ('aggTrade', 20), ('kline', 10), ('ticker', 5))
+
+
+class SyntheticMarket:
+    def __init__(self, symbol: str = 'BTCUSDT', interval: str = '1m', seed: int = 1, price: float = 60000.0,
+                 tick: float = 0.01, levels: int = 1000, step_ms: int = 10, start_ms: Optional[int] = None):
+        self.symbol = symbol.upper(); self.interval = interval
+        self.rng = random.Random(seed)
+        self.tick = tick; self.step_ms = step_ms
+        self.streams = {'ticker': ticker_stream(symbol), 'bookTicker': book_ticker_stream(symbol),
+                        'depth': depth_stream(symbol, fast_100ms=True), 'kline': kline_stream(symbol, interval),
+                        'aggTrade': agg_trade_stream(symbol)}
+        self.now = start_ms if start_ms is not None else int(time.time() * 1000)
+        self.mid = price; self.open_24h = price
+        self.update_id = 1_000_000; self.book_ticker_id = 5_000_000; self.agg_trade_id = 9_000_000
+        self.bids: Dict[float, float] = {}; self.asks: Dict[float, float] = {}
+        for i in range(1, levels + 1):
+            self.bids[round(price - i * tick, 8)] = self._qty()
+            self.asks[round(price + i * tick, 8)] = self._qty()
+        self._iv = interval_ms(interval)
+        self._candle = self._new_candle(self.now - self.now % self._iv)
+        self.levels = levels
+        self.rest = _SyntheticRest(self)
+        self._depth_events = 0
+        self._snapshot = None   # taken a few diff events in, like a real fetch racing the stream
+
+    def _qty(self) -> float:
+        return round(self.rng.expovariate(1.0), 5)
+
+    def _new_candle(self, open_ms: int) -> list:
+        p = self.mid
+        return [open_ms, p, p, p, p, 0.0, 0.0]   # t, o, h, l, c, v, taker buy v
+
+    # ----- REST -----
+    def snapshot(self, limit: int) -> dict:
+        bids = sorted(self.bids.items(), reverse=True)[:limit]; asks = sorted(self.asks.items())[:limit]
+        return {'lastUpdateId': self.update_id,
+                'bids': [[f"{p:.2f}", f"{q:.5f}"] for p, q in bids],
+                'asks': [[f"{p:.2f}", f"{q:.5f}"] for p, q in asks]}
+
+    def klines(self, interval: str, limit: int, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> list:
+        """REST-shaped klines up to the current candle; startTime/endTime select a page like Binance does."""
+        iv = interval_ms(interval); newest = self._candle[0] - self._candle[0] % iv
+        if end_ms is not None: newest = min(newest, end_ms - end_ms % iv)
+        if start_ms is None: first, last = newest - (limit - 1) * iv, newest
+        else:
+            first = -(-start_ms // iv) * iv
+            last = min(first + (limit - 1) * iv, newest)
+        rng = random.Random(iv); rows = []; c = self.mid
+        for t in range(newest, first - iv, -iv):   # walk backwards from the current price
+            o = c + rng.gauss(0, 20); h = max(o, c) + abs(rng.gauss(0, 10)); l = min(o, c) - abs(rng.gauss(0, 10))
+            v = rng.uniform(10, 500); buy = v * rng.uniform(0.3, 0.7)
+            if t <= last:
+                rows.append([t, f"{o:.2f}", f"{h:.2f}", f"{l:.2f}", f"{c:.2f}", f"{v:.5f}",
+                             t + iv - 1, f"{v * c:.2f}", 100, f"{buy:.5f}", f"{buy * c:.2f}", "0"])
+            c = o
+        rows.reverse()
+        return rows
+
+    # ----- stream -----
+    def messages(self, n: int) -> List[str]:
+        kinds = [k for k, _ in MIX]; weights = [w for _, w in MIX]
+        out = []
+        for kind in self.rng.choices(kinds, weights, k=n):
+            self.now += self.step_ms
+            self.mid = max(self.tick, round(self.mid + self.rng.gauss(0, 3) * self.tick, 2))
+            data = getattr(self, f"_{kind}")()
+            out.append(json.dumps({'stream': self.streams[kind], 'data': data}))
+        return out
+
+    def _ticker(self) -> dict:
+        ch = self.mid - self.open_24h
+        return {'e': '24hrTicker', 'E': self.now, 's': self.symbol, 'p': f"{ch:.2f}",
+                'P': f"{ch / self.open_24h * 100:.3f}", 'c': f"{self.mid:.2f}", 'o': f"{self.open_24h:.2f}",
+                'h': f"{max(self.mid, self.open_24h):.2f}", 'l': f"{min(self.mid, self.open_24h):.2f}",
+                'v': '12345.678', 'q': '740740740.00'}
+
+    def _bookTicker(self) -> dict:
+        self.book_ticker_id += 1
+        return {'u': self.book_ticker_id, 's': self.symbol, 'b': f"{self.mid - self.tick:.2f}", 'B': f"{self._qty():.5f}",
+                'a': f"{self.mid + self.tick:.2f}", 'A': f"{self._qty():.5f}"}
+
+    def _depth(self) -> dict:
+        first = self.update_id + 1
+        self.update_id += self.rng.randint(1, 4)
+        sides = []
+        for book, sign in ((self.bids, -1), (self.asks, 1)):
+            changes = []
+            for _ in range(self.rng.randint(1, 12)):
+                p = round(self.mid + sign * self.rng.randint(1, 200) * self.tick, 2)
+                q = 0.0 if self.rng.random() < 0.25 else self._qty()
+                if q: book[p] = q
+                else: book.pop(p, None)
+                changes.append([f"{p:.2f}", f"{q:.5f}"])
+            sides.append(changes)
+        self._depth_events += 1
+        if self._depth_events == 3: self._snapshot = self.snapshot(self.levels)
+        return {'e': 'depthUpdate', 'E': self.now, 's': self.symbol, 'U': first, 'u': self.update_id,
+                'b': sides[0], 'a': sides[1]}
+
+    def _aggTrade(self) -> dict:
+        self.agg_trade_id += 1
+        return {'e': 'aggTrade', 'E': self.now, 's': self.symbol, 'a': self.agg_trade_id, 'p': f"{self.mid:.2f}",
+                'q': f"{self._qty() * 0.01:.5f}", 'f': self.agg_trade_id, 'l': self.agg_trade_id, 'T': self.now,
+                'm': self.rng.random() < 0.5, 'M': True}
+
+    def _kline(self) -> dict:
+        c = self._candle
+        closed = self.now >= c[0] + self._iv
+        if not closed:
+            c[2] = max(c[2], self.mid); c[3] = min(c[3], self.mid); c[4] = self.mid
+            v = self.rng.uniform(0, 0.2); c[5] += v; c[6] += v * self.rng.random()
+        k = {'t': c[0], 'T': c[0] + self._iv - 1, 's': self.symbol, 'i': self.interval, 'o': f"{c[1]:.2f}",
+             'c': f"{c[4]:.2f}", 'h': f"{c[2]:.2f}", 'l': f"{c[3]:.2f}", 'v': f"{c[5]:.5f}", 'n': 1, 'x': closed,
+             'q': f"{c[5] * c[4]:.2f}", 'V': f"{c[6]:.5f}", 'Q': f"{c[6] * c[4]:.2f}"}
+        if closed: self._candle = self._new_candle(self.now - self.now % self._iv)
+        return {'e': 'kline', 'E': self.now, 's': self.symbol, 'k': k}
+
+
+class _SyntheticRest:
+    """Answers the REST calls the panels make from the synthetic market."""
+    def __init__(self, market: SyntheticMarket):
+        self.market = market
+
+    def get(self, path: str, params: Optional[dict] = None, **_):
+        params = params or {}
+        if path == '/api/v3/depth': return self.market._snapshot
+        if path == '/api/v3/klines':
+            return self.market.klines(params['interval'], int(params.get('limit', 500)),
+                                      params.get('startTime'), params.get('endTime'))
+        return None   # no other endpoint is used by the panels
+
+
+class RecordedMarket:
+    """Replays a capture: WS messages in recorded order, REST answered as of the last delivered message."""
+    def __init__(self, path: str):
+        from utils.replay import ReplayServer   # reuses its REST index; no server is started
+        self.server = ReplayServer(path)
+        self.records: List[Tuple[float, str, bytes]] = self.server.ws_records
+        self.streams = {s.split('@', 1)[1]: s for _, s, _ in self.records}
+        self.symbol = next(iter(self.streams.values()), 'btcusdt@').split('@')[0].upper()
+        self.interval = next((s[6:] for s in self.streams if s.startswith('kline_')), '1m')
+        self.rest = _RecordedRest(self.server)
+        self._pos = 0
+
+    def messages(self, n: int) -> List[str]:
+        out = []
+        while len(out) < n and self.records:
+            if self._pos == len(self.records): self._pos = 0   # loop a short capture
+            ts, _, raw = self.records[self._pos]; self._pos += 1
+            self.server.cursor = ts
+            out.append(raw.decode())
+        return out
+
+
+class _RecordedRest:
+    def __init__(self, server):
+        self.server = server
+
+    def get(self, path: str, params: Optional[dict] = None, **_):
+        body = self.server.rest_response(path, urlencode(params or {}))
+        return json.loads(body) if body is not None else None
@@ -0,0 +1,133 @@
+"""
+candle_chart.py — Vectorized candlestick/volume renderer for KlinePanel.
+
+History candles live in one LineCollection (wicks) + two PolyCollections (bodies,
+volume bars) built from NumPy arrays. The last, still-forming candle is a separate
+set of animated artists, so live ticks restore the cached background and blit
+just that candle instead of redrawing the whole figure.
+"""
+import numpy as np
+import matplotlib.dates as mdates
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.figure import Figure
+
+from config import UP_COLOR, DOWN_COLOR, TEXT_COLOR, CARD_BG, BORDER_COLOR, MUTED_TEXT
+
+
+def epoch_to_num(ts) -> np.ndarray:
+    """Epoch seconds (array-like) -> matplotlib date numbers, vectorized."""
+    ms = np.round(np.asarray(ts, dtype=float) * 1000.0).astype('int64')
+    return mdates.date2num(ms.astype('datetime64[ms]'))
+
+def _rects(x, y0, y1, width) -> np.ndarray:
+    """(n, 4, 2) vertices of bars centred on x spanning y0..y1."""
+    x = np.atleast_1d(x); left = x - width / 2; right = x + width / 2
+    v = np.empty((len(x), 4, 2))
+    v[:, 0, 0] = left;  v[:, 0, 1] = y0
+    v[:, 1, 0] = left;  v[:, 1, 1] = y1
+    v[:, 2, 0] = right; v[:, 2, 1] = y1
+    v[:, 3, 0] = right; v[:, 3, 1] = y0
+    return v
+
+def _body_bounds(o, h, l, c):
+    bottom = np.minimum(o, c); height = np.abs(c - o); rng = h - l
+    flat = height == 0   # keep doji candles visible
+    height = np.where(flat, np.where(rng > 0, rng * 0.01, 0.0001), height)
+    return bottom, bottom + height
+
+def _colors(o, c):
+    return np.where(np.asarray(c) >= np.asarray(o), UP_COLOR, DOWN_COLOR)
+
+
+def candle_figure(figsize=(8, 5), dpi: int = 100):
+    """The dashboard's styled price + volume figure: (fig, ax_price, ax_vol). Shared by KlinePanel and render workers."""
+    fig = Figure(figsize=figsize, dpi=dpi)
+    fig.patch.set_facecolor(CARD_BG)
+    fig.subplots_adjust(left=0.15, right=0.95, top=0.90, bottom=0.25, hspace=0.05)
+    gs = fig.add_gridspec(2, 1, height_ratios=[3, 1])
+    ax_price = fig.add_subplot(gs[0])
+    ax_vol = fig.add_subplot(gs[1], sharex=ax_price)
+    for ax in (ax_price, ax_vol):
+        ax.set_facecolor(CARD_BG)
+        ax.grid(True, color=BORDER_COLOR, linestyle='--', linewidth=0.5, alpha=0.5)
+        ax.tick_params(axis='x', colors=MUTED_TEXT, labelsize=8)
+        ax.tick_params(axis='y', colors=MUTED_TEXT, labelsize=8)
+        for spine in ax.spines.values(): spine.set_edgecolor(BORDER_COLOR)
+    ax_price.tick_params(labelbottom=False)
+    ax_price.set_ylabel('Price', color=MUTED_TEXT, fontsize=9, labelpad=10)
+    ax_vol.set_ylabel('Volume', color=MUTED_TEXT, fontsize=9, labelpad=10)
+    ax_vol.xaxis_date()
+    ax_vol.xaxis.set_major_formatter(mdates.DateFormatter('%b %d, %H:%M'))
+    fig.autofmt_xdate(rotation=45)
+    return fig, ax_price, ax_vol
+
+
+class CandleRenderer:
+    def __init__(self, fig, ax_price, ax_vol, canvas):
+        self.fig = fig; self.ax_price = ax_price; self.ax_vol = ax_vol; self.canvas = canvas
+
+        self.wicks = LineCollection([], colors=TEXT_COLOR, linewidths=1, alpha=0.8)
+        self.bodies = PolyCollection([], linewidths=0.5)
+        self.vols = PolyCollection([], linewidths=0.5, alpha=0.6)
+        self.live_wick = LineCollection([], colors=TEXT_COLOR, linewidths=1, alpha=0.8, animated=True)
+        self.live_body = PolyCollection([], linewidths=0.5, animated=True)
+        self.live_vol = PolyCollection([], linewidths=0.5, alpha=0.6, animated=True)
+        for art in (self.wicks, self.bodies, self.live_wick, self.live_body): ax_price.add_collection(art)
+        for art in (self.vols, self.live_vol): ax_vol.add_collection(art)
+
+        self.last_x = None; self.width = 0.02
+        self._ylim = None; self._vmax = None
+        self._bg = None
+        canvas.mpl_connect('draw_event', self._on_draw)
+
+    # ----- full rebuild (initial load / new candle) -----
+    def set_data(self, t, o, h, l, c, v):
+        t, o, h, l, c, v = (np.asarray(a, dtype=float) for a in (t, o, h, l, c, v))
+        if len(t) == 0: return
+        x = epoch_to_num(t)
+        self.width = float(np.diff(x).min()) * 0.6 if len(x) > 1 else 0.02
+        self.last_x = x[-1]
+
+        hx, ho, hh, hl, hc, hv = x[:-1], o[:-1], h[:-1], l[:-1], c[:-1], v[:-1]
+        self.wicks.set_segments(np.stack([np.column_stack([hx, hl]), np.column_stack([hx, hh])], axis=1))
+        b0, b1 = _body_bounds(ho, hh, hl, hc)
+        colors = _colors(ho, hc)
+        self.bodies.set_verts(_rects(hx, b0, b1, self.width)); self.bodies.set_facecolor(colors); self.bodies.set_edgecolor(colors)
+        self.vols.set_verts(_rects(hx, 0.0, hv, self.width)); self.vols.set_facecolor(colors); self.vols.set_edgecolor(colors)
+        self._set_live(o[-1], h[-1], l[-1], c[-1], v[-1])
+
+        lo, hi = float(l.min()), float(h.max()); pad = (hi - lo) * 0.05 or hi * 0.001 or 1.0
+        self._ylim = (lo - pad, hi + pad)
+        self._vmax = float(v.max()) * 1.2 or 1.0
+        self.ax_price.set_xlim(x[0] - self.width, x[-1] + self.width)
+        self.ax_price.set_ylim(*self._ylim)
+        self.ax_vol.set_ylim(0, self._vmax)
+        self.canvas.draw()
+
+    # ----- live tick: only the last candle -----
+    def update_last(self, o, h, l, c, v) -> bool:
+        """Blit the forming candle. Returns False when a full set_data() is required."""
+        if self._bg is None or self.last_x is None: return False
+        if l < self._ylim[0] or h > self._ylim[1] or v > self._vmax: return False
+        self._set_live(o, h, l, c, v)
+        self.canvas.restore_region(self._bg)
+        self._draw_live()
+        self.canvas.blit(self.fig.bbox)
+        return True
+
+    def _set_live(self, o, h, l, c, v):
+        x = self.last_x
+        self.live_wick.set_segments([[(x, l), (x, h)]])
+        b0, b1 = _body_bounds(np.array([o]), np.array([h]), np.array([l]), np.array([c]))
+        color = UP_COLOR if c >= o else DOWN_COLOR
+        self.live_body.set_verts(_rects(x, b0, b1, self.width)); self.live_body.set_facecolor(color); self.live_body.set_edgecolor(color)
+        self.live_vol.set_verts(_rects(x, 0.0, v, self.width)); self.live_vol.set_facecolor(color); self.live_vol.set_edgecolor(color)
+
+    def _draw_live(self):
+        for art in (self.live_wick, self.live_body): self.ax_price.draw_artist(art)
+        self.ax_vol.draw_artist(self.live_vol)
+
+    def _on_draw(self, event):
+        # full draws (incl. resizes) refresh the cached background, then paint the animated candle
+        self._bg = self.canvas.copy_from_bbox(self.fig.bbox)
+        if self.last_x is not None: self._draw_live()
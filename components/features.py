@@ -5,27 +5,25 @@ features.py — Includes apply_dark_theme + HeaderBar, StatsPanel, KlinePanel
 """
 import tkinter as tk
 from tkinter import ttk
-import json
-import threading
-import time
-import websocket
 import matplotlib
 matplotlib.use('TkAgg')
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-import matplotlib.dates as mdates
-import matplotlib.patches as patches
-from datetime import datetime
 
 # --- Config Imports ---
 from config import (
-    ACCENT_COLOR, UP_COLOR, DOWN_COLOR,
-    ws_ticker, ws_book_ticker, ws_kline,
-    VOLUME_RATIO_REFRESH_SEC, KLINE_INTERVAL_DEFAULT, KLINE_LIMIT_DEFAULT,
-    BG_DARK, PANEL_BG, CARD_BG, BORDER_COLOR, TEXT_COLOR, MUTED_TEXT,
-    WS_UI_THROTTLE_SEC
+    ACCENT_COLOR, UP_COLOR, DOWN_COLOR, AMBER_COLOR, METRICS_STALE_SEC,
+    ticker_stream, book_ticker_stream, FLOW_WINDOWS_SEC, KLINE_INTERVAL_DEFAULT, KLINE_LIMIT_DEFAULT,
+    BG_DARK, PANEL_BG, CARD_BG, BORDER_COLOR, TEXT_COLOR, MUTED_TEXT
 )
-from utils.binance_api import get_klines
+from utils.book_analytics import BookMetrics, analytics_for
+from utils.candle_series import series_for
+from utils.decode import Ticker, BookTicker
+from utils.flow import flow_for
+from utils.metrics import metrics
+from utils.stream_hub import StreamHub
+from components.candle_chart import CandleRenderer, candle_figure
+from components.render_pool import OffscreenChart, render_pool
+from components.ui_scheduler import UiScheduler
 
 # ---------- 1. Theme Manager  ----------
 def apply_dark_theme(root: tk.Tk):
@@ -43,20 +41,64 @@ def apply_dark_theme(root: tk.Tk):
     style.configure('Accent.TLabel', background=ACCENT_COLOR, foreground='white', font=('Segoe UI', 8, 'bold'), padding=2)
     style.configure('Accent.TButton', background=ACCENT_COLOR, foreground='white', font=('Segoe UI', 9, 'bold'), borderwidth=0)
     style.map('Accent.TButton', background=[('active', '#2563eb')], foreground=[('active', 'white')])
-    style.configure('Dark.Treeview', background=CARD_BG, fieldbackground=CARD_BG, foreground=TEXT_COLOR, borderwidth=0, rowheight=24, font=('Consolas', 10))
-    style.configure('Dark.Treeview.Heading', background=PANEL_BG, foreground=ACCENT_COLOR, font=('Segoe UI', 9, 'bold'), relief='flat')
-    style.map('Dark.Treeview', background=[('selected', '#1e293b')], foreground=[('selected', 'white')])
     return style
 
 # ---------- 2. Header Bar  ----------
+def _ms(v) -> str:
+    return '--' if v is None else f"{v * 1000:.1f}"
+
 class HeaderBar:
-    def __init__(self, parent: tk.Widget, title: str = 'BTCUSDT Dashboard'):
+    """Title + live status (LIVE / STALE / OFFLINE from utils.metrics) + toggleable latency overlay."""
+    def __init__(self, parent: tk.Widget, title: str = 'BTCUSDT Dashboard', streams=()):
+        self.streams = list(streams)   # the streams this view depends on
         self.frame = ttk.Frame(parent, padding="10 10 10 0", style='TFrame')
         ttk.Label(self.frame, text=title, style='Header.TLabel').pack(side=tk.LEFT)
         status_frame = ttk.Frame(self.frame, style='TFrame')
         status_frame.pack(side=tk.RIGHT, anchor='ne')
-        tk.Label(status_frame, text=" LIVE ", bg=ACCENT_COLOR, fg="white", font=('Segoe UI', 8, 'bold')).pack(side=tk.LEFT)
-        ttk.Label(status_frame, text=' Connected to LIVE', style='Muted.TLabel').pack(side=tk.LEFT)
+        self.badge = tk.Label(status_frame, text=" LIVE ", bg=ACCENT_COLOR, fg="white", font=('Segoe UI', 8, 'bold'))
+        self.badge.pack(side=tk.LEFT)
+        self.status_lbl = ttk.Label(status_frame, text=' Connecting...', style='Muted.TLabel')
+        self.status_lbl.pack(side=tk.LEFT)
+        ttk.Button(status_frame, text='Perf', style='Accent.TButton', width=5, command=self.toggle_overlay).pack(side=tk.LEFT, padx=(8, 0))
+        self.overlay = tk.Label(self.frame, bg=CARD_BG, fg=TEXT_COLOR, font=('Consolas', 9), justify=tk.LEFT, anchor='w')
+        self.overlay_visible = False
+        self._connected = False
+
+    def toggle_overlay(self):
+        self.overlay_visible = not self.overlay_visible
+        if self.overlay_visible: self.overlay.pack(side=tk.BOTTOM, fill=tk.X, pady=(6, 0))
+        else: self.overlay.pack_forget()
+        self.refresh(self._connected)
+
+    def refresh(self, connected: bool):
+        """Called once per METRICS_REFRESH_SEC by the app for the visible view."""
+        self._connected = connected
+        stale = metrics.stale_streams(METRICS_STALE_SEC, self.streams)
+        if not connected:
+            self.badge.config(text=" OFFLINE ", bg=DOWN_COLOR); self.status_lbl.config(text=' Reconnecting...')
+        elif stale:
+            self.badge.config(text=" STALE ", bg=AMBER_COLOR); self.status_lbl.config(text=f" No data: {', '.join(stale)}")
+        else:
+            paint = [metrics.streams[s].latency['parsed_to_painted'].quantile(0.99) for s in self.streams if s in metrics.streams]
+            worst = max((p for p in paint if p is not None), default=None)
+            self.badge.config(text=" LIVE ", bg=ACCENT_COLOR)
+            self.status_lbl.config(text=f" Connected  paint p99 {_ms(worst)} ms")
+        if self.overlay_visible: self.overlay.config(text=self._overlay_text())
+
+    def _overlay_text(self) -> str:
+        snap = metrics.snapshot()
+        lines = [f"{'stream':<24}{'msg/s':>7}{'exch>rx p50/p99':>17}{'rx>parse p99':>13}{'parse>paint p50/p99':>21}"
+                 f"{'drop':>6}{'coal':>8}{'age s':>7}"]
+        for name in self.streams:
+            st = snap['streams'].get(name)
+            if st is None: lines.append(f"{name:<24}{'waiting for data':>20}"); continue
+            ex, rx, pt = st['exchange_to_receive'], st['receive_to_parsed'], st['parsed_to_painted']
+            age = '--' if st['age'] is None else f"{st['age']:.1f}"
+            lines.append(f"{name:<24}{st['rate']:>7.1f}{_ms(ex['p50']) + '/' + _ms(ex['p99']):>17}{_ms(rx['p99']):>13}"
+                         f"{_ms(pt['p50']) + '/' + _ms(pt['p99']):>21}{st['dropped']:>6}{st['coalesced']:>8}{age:>7}")
+        lag = snap['loop_lag']
+        lines.append(f"UI loop lag p50/p99 {_ms(lag['p50'])}/{_ms(lag['p99'])} ms   (latencies in ms)")
+        return '\n'.join(lines)
 
     def pack(self, **kwargs): self.frame.pack(**kwargs)
 
@@ -84,10 +126,11 @@ class StatCard(ttk.Frame):
             if sub_color: self.sub_lbl.config(foreground=sub_color)
 
 class StatsPanel:
-    def __init__(self, parent: tk.Widget, symbol: str = 'btcusdt'):
-        self.parent = parent; self.symbol = symbol
-        self.ws_ticker = None; self.ws_book = None; self.is_active = False
-        self.last_update_time = 0.0
+    def __init__(self, parent: tk.Widget, symbol: str = 'btcusdt', hub: StreamHub = None, scheduler: UiScheduler = None):
+        self.parent = parent; self.symbol = symbol; self.hub = hub; self.scheduler = scheduler
+        self.is_active = False
+        self.render_enabled = True
+        self._last = {}   # latest posted args per update fn, replayed when rendering resumes
 
         self.frame = ttk.Frame(parent, padding="10 5", style='Panel.TFrame')
         
@@ -113,33 +156,36 @@ class StatsPanel:
         self.card_5m = StatCard(self.frame, '5 Min Vol & Ratio')
         self.card_5m.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5)
         self.card_1h = StatCard(self.frame, '1 Hour Vol & Ratio')
-        self.card_1h.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(5, 0))
+        self.card_1h.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5)
+        self.volume_cards = dict(zip(FLOW_WINDOWS_SEC, (self.card_5m, self.card_1h)))
+        self.flow = flow_for(symbol, hub)   # rolling 5 min / 1 hour trade flow from @aggTrade
+
+        # 4. Book analytics card (fed by the symbol's BookFeed, utils/book_feed.py)
+        self.card_book = StatCard(self.frame, 'Book Imbalance & Microprice')
+        self.card_book.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(5, 0))
+        self.analytics = analytics_for(symbol)
 
     def start(self):
         if self.is_active: return
         self.is_active = True
-        self.ws_ticker = websocket.WebSocketApp(ws_ticker(self.symbol), on_message=self.on_ticker)
-        threading.Thread(target=self.ws_ticker.run_forever, daemon=True).start()
-        self.ws_book = websocket.WebSocketApp(ws_book_ticker(self.symbol), on_message=self.on_book)
-        threading.Thread(target=self.ws_book.run_forever, daemon=True).start()
-        self.reload_volume_cards()
+        self.hub.subscribe(ticker_stream(self.symbol), self.on_ticker)
+        self.hub.subscribe(book_ticker_stream(self.symbol), self.on_book)
+        self.flow.subscribe(self.on_flow)
+        self.analytics.subscribe(self.on_analytics)
 
     def stop(self):
         self.is_active = False
-        if self.ws_ticker: self.ws_ticker.close()
-        if self.ws_book: self.ws_book.close()
+        self.hub.unsubscribe(ticker_stream(self.symbol), self.on_ticker)
+        self.hub.unsubscribe(book_ticker_stream(self.symbol), self.on_book)
+        self.flow.unsubscribe(self.on_flow)
+        self.analytics.unsubscribe(self.on_analytics)
 
-    def on_ticker(self, ws, message: str):
+    def on_ticker(self, t: Ticker):
         if not self.is_active: return
-        now = time.time()
-        if (now - self.last_update_time) < WS_UI_THROTTLE_SEC: return
-        self.last_update_time = now
-
         try:
-            data = json.loads(message)
-            last = float(data['c'])
-            change = float(data['p'])      # 24h change amount
-            percent = float(data['P'])     # 24h change percent
+            last = t.last
+            change = t.change        # 24h change amount
+            percent = t.change_pct   # 24h change percent
             
             
             color = UP_COLOR if change >= 0 else DOWN_COLOR
@@ -147,134 +193,125 @@ class StatsPanel:
             sign = "+" if change >= 0 else ""
             change_text = f"{sign}{change:,.2f} ({sign}{percent:.2f}%)"
             
-            self.parent.after(0, lambda: self.card_last.set_value(f"${last:,.2f}", color, change_text, color))
+            self._post(self.card_last.set_value, f"${last:,.2f}", color, change_text, color)
         except: pass
+        self.flow.tick(t.event_time / 1000.0)   # keeps the windows sliding when trades pause
 
-    def on_book(self, ws, message: str):
+    def on_book(self, b: BookTicker):
         if not self.is_active: return
-        try:
-            data = json.loads(message); bid = float(data['b']); ask = float(data['a']); spread = ask - bid
-            def update():
-                self.bid_lbl.config(text=f"BID {bid:,.2f}", foreground=UP_COLOR)
-                self.ask_lbl.config(text=f"ASK {ask:,.2f}", foreground=DOWN_COLOR)
-                self.spread_lbl.config(text=f"Spread: {spread:.4f}")
-            self.parent.after(0, update)
-        except: pass
+        self._post(self._update_book, b.bid, b.ask)
 
-    def reload_volume_cards(self):
-        def _fmt(k):
-            if not k: return "--"
-            v, buy = float(k[0][5]), float(k[0][9]); ratio = (buy/v) if v>0 else 0
-            return f"Buy: {buy:,.1f}  Sell: {(v-buy):,.1f}\nRatio: {ratio:.3f}"
-        
-        k5 = get_klines(self.symbol.upper(), '5m', 1)
-        k1 = get_klines(self.symbol.upper(), '1h', 1)
-        if k5: self.card_5m.set_value(_fmt(k5))
-        if k1: self.card_1h.set_value(_fmt(k1))
+    def _update_book(self, bid: float, ask: float):
+        self.bid_lbl.config(text=f"BID {bid:,.2f}", foreground=UP_COLOR)
+        self.ask_lbl.config(text=f"ASK {ask:,.2f}", foreground=DOWN_COLOR)
+        self.spread_lbl.config(text=f"Spread: {ask - bid:.4f}")
 
-    def pack(self, **kwargs): self.frame.pack(**kwargs)
+    def on_flow(self, stats):
+        if not self.is_active: return
+        for f in stats:
+            card = self.volume_cards.get(f.window)
+            if card is None: continue
+            vwap = f"VWAP {f.vwap:,.2f}" if f.vwap is not None else "VWAP --"
+            self._post(card.set_value, f"Buy: {f.buy_volume:,.1f}  Sell: {f.sell_volume:,.1f}\nRatio: {f.buy_ratio:.3f}",
+                       None, f"{vwap}  {f.trades:,} trades")
+
+    def on_analytics(self, m: BookMetrics):
+        if not self.is_active: return
+        color = UP_COLOR if m.imbalance >= 0 else DOWN_COLOR
+        slip = '  '.join(f"{b.size / 1000:g}k {b.bps:.1f}/{s.bps:.1f}{'' if b.filled and s.filled else '+'}" for b, s in zip(m.buy, m.sell))
+        wall = lambda w: f"{w[0][0]:,.2f} ({w[0][1]:,.1f})" if w else '--'
+        self._post(self.card_book.set_value, f"{m.imbalance:+.3f}", color,
+                   f"Micro {m.microprice:,.2f}  WMid {m.weighted_mid:,.2f}\n"
+                   f"Slip bps buy/sell: {slip}\nWalls B {wall(m.bid_walls)}  A {wall(m.ask_walls)}")
 
-# ---------- Helper: Time Convert  ----------
-def _epoch_to_num(ts: float):
-    try: return mdates.epoch2num(ts)
-    except: return mdates.date2num(datetime.fromtimestamp(ts))
+    def _post(self, fn, *args):
+        self._last[fn] = args
+        if self.render_enabled: self.scheduler.post(fn, *args)
+
+    def set_rendering(self, enabled: bool):
+        """Pause/resume drawing; the latest values keep being tracked and are painted on resume."""
+        self.render_enabled = enabled
+        if enabled:
+            for fn, args in list(self._last.items()): self.scheduler.post(fn, *args)
+
+    def pack(self, **kwargs): self.frame.pack(**kwargs)
 
 # ---------- 4. Kline Chart Panel  ----------
 class KlinePanel:
-    def __init__(self, parent: tk.Widget, symbol: str = 'BTCUSDT', interval: str = KLINE_INTERVAL_DEFAULT, limit: int = KLINE_LIMIT_DEFAULT):
+    def __init__(self, parent: tk.Widget, symbol: str = 'BTCUSDT', hub: StreamHub = None, scheduler: UiScheduler = None,
+                 interval: str = KLINE_INTERVAL_DEFAULT, limit: int = KLINE_LIMIT_DEFAULT):
         self.parent = parent
         self.symbol = symbol
+        self.hub = hub
+        self.scheduler = scheduler
         self.interval = interval
         self.limit = limit
         self.is_active = False
-        self.ws = None
+        self.render_enabled = True
         
         self.frame = ttk.Frame(parent, padding=0, style='Card.TFrame') 
         header = ttk.Frame(self.frame, style='Card.TFrame', padding=5)
         header.pack(fill=tk.X)
         ttk.Label(header, text=f"{symbol} {interval} Candlestick Chart (Last {limit})", style='CardTitle.TLabel').pack(side=tk.LEFT)
 
-        self.fig = Figure(figsize=(8, 5), dpi=100)
-        self.fig.patch.set_facecolor(CARD_BG)
-        self.fig.subplots_adjust(left=0.15, right=0.95, top=0.90, bottom=0.25, hspace=0.05)
-        
-        gs = self.fig.add_gridspec(2, 1, height_ratios=[3, 1])
-        self.ax_price = self.fig.add_subplot(gs[0])
-        self.ax_vol = self.fig.add_subplot(gs[1], sharex=self.ax_price)
+        pool = render_pool()
+        if pool:   # drawn by a render worker from shared memory, shown as a PhotoImage
+            self.offscreen = OffscreenChart(self.frame, pool, 'candles', scheduler)
+            self.offscreen.pack(fill=tk.BOTH, expand=True, padx=2, pady=2)
+            self.renderer = None
+        else:
+            self.offscreen = None
+            self.fig, self.ax_price, self.ax_vol = candle_figure()
+            self.canvas = FigureCanvasTkAgg(self.fig, master=self.frame)
+            self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=2, pady=2)
+            self.renderer = CandleRenderer(self.fig, self.ax_price, self.ax_vol, self.canvas)
+            self.status_txt = self.ax_price.text(0.5, 0.5, 'Loading...', transform=self.ax_price.transAxes,
+                                                 ha='center', va='center', color=MUTED_TEXT, fontsize=11)
         
-        self._apply_chart_style()
-        self.canvas = FigureCanvasTkAgg(self.fig, master=self.frame)
-        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=2, pady=2)
-        
-        self.data = []
-        self.load_initial()
-
-    def _apply_chart_style(self):
-        for ax in (self.ax_price, self.ax_vol):
-            ax.set_facecolor(CARD_BG)
-            ax.grid(True, color=BORDER_COLOR, linestyle='--', linewidth=0.5, alpha=0.5)
-            ax.tick_params(axis='x', colors=MUTED_TEXT, labelsize=8)
-            ax.tick_params(axis='y', colors=MUTED_TEXT, labelsize=8)
-            for spine in ax.spines.values(): spine.set_edgecolor(BORDER_COLOR)
-        self.ax_price.tick_params(labelbottom=False)
-        self.ax_price.set_ylabel('Price', color=MUTED_TEXT, fontsize=9, labelpad=10)
-        self.ax_vol.set_ylabel('Volume', color=MUTED_TEXT, fontsize=9, labelpad=10)
-
-    def load_initial(self):
-        kl = get_klines(self.symbol, self.interval, self.limit)
-        if not kl: return
-        self.data = [(int(k[0])/1000.0, float(k[1]), float(k[2]), float(k[3]), float(k[4]), float(k[5])) for k in kl]
-        self.redraw()
+        self._needs_full_redraw = False
+        self.series = series_for(symbol, interval, hub)   # candle history shared by every chart of this symbol/interval
+
+    def _on_series(self, kind: str):
+        """CandleSeries listener (loader / stream thread)."""
+        if not self.is_active: return
+        if kind == 'failed': self.scheduler.post(self._set_status, 'Failed to load candles'); return
+        if kind != 'update': self._needs_full_redraw = True
+        if self.render_enabled: self.scheduler.post(self._render)
+
+    def _set_status(self, text: str):
+        if self.offscreen: self.offscreen.set_status(text); return
+        self.status_txt.set_text(text)
+        self.canvas.draw_idle()
 
     def redraw(self):
-        self.ax_price.clear(); self.ax_vol.clear(); self._apply_chart_style()
-        if not self.data: return
-        xs = [_epoch_to_num(t) for (t,_,_,_,_,_) in self.data]
-        if len(xs) > 1:
-            min_diff = min([xs[i+1] - xs[i] for i in range(len(xs)-1)])
-            width = min_diff * 0.6
-        else: width = 0.02 
-        volumes = []
-        for x, (t, o, h, l, c, v) in zip(xs, self.data):
-            volumes.append(v)
-            color = UP_COLOR if c >= o else DOWN_COLOR
-            self.ax_price.vlines(x, l, h, color=TEXT_COLOR, linewidth=1, alpha=0.8)
-            rect_h = abs(c - o)
-            if rect_h == 0: rect_h = (h-l)*0.01 if (h-l) > 0 else 0.0001
-            self.ax_price.add_patch(patches.Rectangle((x - width/2, min(o, c)), width, rect_h, facecolor=color, edgecolor=color))
-            self.ax_vol.add_patch(patches.Rectangle((x - width/2, 0), width, v, facecolor=color, edgecolor=color, alpha=0.6))
-        if volumes:
-            max_vol = max(volumes)
-            if max_vol > 0: self.ax_vol.set_ylim(0, max_vol * 1.2)
-        self.ax_vol.xaxis_date()
-        self.ax_vol.xaxis.set_major_formatter(mdates.DateFormatter('%b %d, %H:%M'))
-        self.fig.autofmt_xdate(rotation=45)
-        self.canvas.draw()
+        cols = self.series.view(self.limit)   # stable copy; the stream thread keeps writing
+        if cols is None: return
+        if self.offscreen: self.offscreen.submit(cols); return   # skipped when the candles are unchanged
+        self.status_txt.set_visible(False)
+        self.renderer.set_data(*cols)
+
+    def _render(self):
+        last = self.series.last()
+        if last is None: return
+        full, self._needs_full_redraw = self._needs_full_redraw, False
+        if not full and self.renderer and self.renderer.update_last(*last[1:]): return  # blitted the live candle only
+        self.redraw()
 
     def start(self):
         if self.is_active: return
         self.is_active = True
-        self.ws = websocket.WebSocketApp(ws_kline(self.symbol, self.interval), on_message=self.on_message)
-        threading.Thread(target=self.ws.run_forever, daemon=True).start()
+        self.series.subscribe(self._on_series)
 
     def stop(self):
         self.is_active = False
-        if self.ws: self.ws.close()
+        self.series.unsubscribe(self._on_series)
+        if self.offscreen: self.offscreen.close()
 
-    def on_message(self, ws, message: str):
-        if not self.is_active: return
-        try:
-            data = json.loads(message); k = data['k']
-            t, o, h, l, c, v = int(k['t'])/1000.0, float(k['o']), float(k['h']), float(k['l']), float(k['c']), float(k['v'])
-            is_final = bool(k['x'])
-            def update():
-                if not self.data: return
-                self.data[-1] = (t,o,h,l,c,v)
-                if is_final:
-                    self.data.append((t,c,c,c,c,0.0))
-                    if len(self.data) > self.limit: self.data.pop(0)
-                self.redraw()
-            self.parent.after(0, update)
-        except: pass
+    def set_rendering(self, enabled: bool):
+        """Pause/resume drawing; candles keep updating and one full redraw runs on resume."""
+        self.render_enabled = enabled
+        if enabled:
+            self._needs_full_redraw = True
+            self.scheduler.post(self._render)
 
     def pack(self, **kwargs): self.frame.pack(**kwargs)
\ No newline at end of file
@@ -0,0 +1,231 @@
+"""
+grid.py — Multi-symbol grid mode: compact tiles for N symbols (GRID_LAYOUTS, e.g. 2x2, 3x3).
+
+A tile shows last price / 24h change, best bid/ask and spread, the top-of-book imbalance and a
+mini candle chart. It owns no streams or data of its own: it listens to the symbol's shared
+models — the all-market table (or the hub's @ticker), the BookFeed (utils/book_feed.py) with its
+analytics, and the CandleSeries (utils/candle_series.py) of KLINE_INTERVAL_DEFAULT — the same ones
+the full single-symbol view uses, so every symbol costs one subscription per stream however many
+views show it. The mini chart is a fixed pool of Canvas items moved with coords(), not a figure.
+"""
+import tkinter as tk
+from typing import Callable, Dict, List, Optional
+
+from config import (KLINE_INTERVAL_DEFAULT, GRID_TILE_CANDLES, CARD_BG, BG_DARK, TEXT_COLOR, MUTED_TEXT,
+                    UP_COLOR, DOWN_COLOR, ticker_stream)
+from utils.book_analytics import BookMetrics
+from utils.book_feed import book_for
+from utils.candle_series import series_for
+from utils.decode import Ticker
+from utils.market_table import MarketTable
+
+
+class MiniCandles:
+    """Candles drawn into a Canvas from a fixed pool of wick/body items (created once, then only moved)."""
+    def __init__(self, parent: tk.Widget, n: int = GRID_TILE_CANDLES):
+        self.n = n
+        self.canvas = tk.Canvas(parent, bg=CARD_BG, highlightthickness=0, width=240, height=90)
+        self._wicks = [self.canvas.create_line(0, 0, 0, 0, state='hidden') for _ in range(n)]
+        self._bodies = [self.canvas.create_rectangle(0, 0, 0, 0, width=0, state='hidden') for _ in range(n)]
+        self._colors = [None] * n
+        self._status = self.canvas.create_text(120, 45, text='Loading...', fill=MUTED_TEXT, font=('Segoe UI', 9))
+        self._range = None   # (lo, hi, count) of the last full draw
+        self._cols = None
+
+    def set_status(self, text: str):
+        self.canvas.coords(self._status, self.canvas.winfo_width() // 2, self.canvas.winfo_height() // 2)
+        self.canvas.itemconfigure(self._status, text=text, state='normal')
+
+    def set_data(self, cols):
+        """Draw (6, n) candle columns t, o, h, l, c, v (the newest last)."""
+        self._cols = cols
+        _, o, h, l, c, _ = cols
+        k = min(len(c), self.n)
+        if not k: return
+        lo, hi = float(l[-k:].min()), float(h[-k:].max())
+        self._range = (lo, hi, k)
+        for i in range(k): self._place(i, o[i - k], h[i - k], l[i - k], c[i - k])
+        for i in range(k, self.n):
+            self.canvas.itemconfigure(self._wicks[i], state='hidden'); self.canvas.itemconfigure(self._bodies[i], state='hidden')
+        self.canvas.itemconfigure(self._status, state='hidden')
+
+    def update_last(self, o: float, h: float, l: float, c: float) -> bool:
+        """Move only the newest candle; False when it left the drawn price range (a full draw is needed)."""
+        if self._range is None: return False
+        lo, hi, k = self._range
+        if l < lo or h > hi: return False
+        self._place(k - 1, o, h, l, c)
+        self._cols[1:5, -1] = (o, h, l, c)   # kept for redraws on resize
+        return True
+
+    def redraw(self):
+        if self._cols is not None: self.set_data(self._cols)
+
+    def _place(self, i: int, o: float, h: float, l: float, c: float):
+        lo, hi, k = self._range
+        w, ht = max(self.canvas.winfo_width(), 2), max(self.canvas.winfo_height(), 2)
+        slot = w / self.n
+        x0 = w - (k - i) * slot   # newest candle at the right edge
+        y = lambda p: 2 + (ht - 4) * (1 - (p - lo) / (hi - lo)) if hi > lo else ht / 2
+        xm = x0 + slot / 2; half = max(slot * 0.3, 0.5)
+        top, bottom = y(max(o, c)), y(min(o, c))
+        self.canvas.coords(self._wicks[i], xm, y(h), xm, y(l))
+        self.canvas.coords(self._bodies[i], xm - half, top, xm + half, max(bottom, top + 1))
+        color = UP_COLOR if c >= o else DOWN_COLOR
+        if self._colors[i] != color:
+            self._colors[i] = color
+            self.canvas.itemconfigure(self._wicks[i], fill=color); self.canvas.itemconfigure(self._bodies[i], fill=color)
+        self.canvas.itemconfigure(self._wicks[i], state='normal'); self.canvas.itemconfigure(self._bodies[i], state='normal')
+
+
+class SymbolTile:
+    """Compact panel of one symbol in the grid; click it to open the symbol's full view."""
+    def __init__(self, parent: tk.Widget, symbol: str, hub, scheduler, market: Optional[MarketTable] = None,
+                 on_open: Optional[Callable[[str], None]] = None):
+        self.symbol = symbol.upper(); self.hub = hub; self.scheduler = scheduler
+        self.market = market   # all-market table; without one the tile opens the hub's @ticker stream
+        self.on_open = on_open
+        self.is_active = False
+        self.render_enabled = True
+        self._last = {}   # fn -> latest args, replayed when rendering resumes
+        self._needs_full_redraw = False
+        self.book = book_for(symbol, hub)
+        self.analytics = self.book.analytics
+        self.series = series_for(symbol, KLINE_INTERVAL_DEFAULT, hub)
+
+        self.frame = tk.Frame(parent, bg=CARD_BG, highlightbackground=BG_DARK, highlightthickness=1, cursor='hand2')
+        top = tk.Frame(self.frame, bg=CARD_BG); top.pack(fill=tk.X, padx=6, pady=(4, 0))
+        tk.Label(top, text=self.symbol.replace("USDT", ""), font=('Segoe UI', 12, 'bold'), fg='#94a3b8', bg=CARD_BG).pack(side=tk.LEFT)
+        self.percent_lbl = tk.Label(top, text="--%", font=('Segoe UI', 9, 'bold'), fg=TEXT_COLOR, bg=CARD_BG)
+        self.percent_lbl.pack(side=tk.RIGHT)
+        self.price_lbl = tk.Label(top, text="--", font=('Consolas', 12, 'bold'), fg=TEXT_COLOR, bg=CARD_BG)
+        self.price_lbl.pack(side=tk.RIGHT, padx=6)
+        info = tk.Frame(self.frame, bg=CARD_BG); info.pack(fill=tk.X, padx=6)
+        self.book_lbl = tk.Label(info, text="BID --  ASK --", font=('Consolas', 9), fg=MUTED_TEXT, bg=CARD_BG)
+        self.book_lbl.pack(side=tk.LEFT)
+        self.imb_lbl = tk.Label(info, text="Imb --", font=('Consolas', 9, 'bold'), fg=MUTED_TEXT, bg=CARD_BG)
+        self.imb_lbl.pack(side=tk.RIGHT)
+        self.chart = MiniCandles(self.frame)
+        self.chart.canvas.pack(fill=tk.BOTH, expand=True, padx=4, pady=4)
+        self.chart.canvas.bind('<Configure>', lambda e: self.chart.redraw())
+        for w in (self.frame, top, info, self.chart.canvas, *top.winfo_children(), *info.winfo_children()):
+            w.bind('<Button-1>', self._on_click)
+
+    def start(self):
+        if self.is_active: return
+        self.is_active = True
+        if self.market: self.market.watch(self.symbol, self.on_row)
+        else: self.hub.subscribe(ticker_stream(self.symbol), self.on_ticker)
+        self.book.subscribe(self.on_depth)
+        self.analytics.subscribe(self.on_analytics)
+        self.series.subscribe(self._on_series)
+
+    def stop(self):
+        self.is_active = False
+        if self.market: self.market.unwatch(self.symbol, self.on_row)
+        else: self.hub.unsubscribe(ticker_stream(self.symbol), self.on_ticker)
+        self.analytics.unsubscribe(self.on_analytics)
+        self.book.unsubscribe(self.on_depth)
+        self.series.unsubscribe(self._on_series)
+
+    def destroy(self):
+        self.stop()
+        self.frame.destroy()
+
+    # ----- stream threads -----
+    def on_ticker(self, t: Ticker):
+        if self.is_active: self._post(self._update_price, t.last, t.change_pct)
+
+    def on_row(self, last: float, change_pct: float):
+        if self.is_active: self._post(self._update_price, last, change_pct)
+
+    def on_depth(self, bp, bq, ap, aq):
+        if self.is_active and len(bp) and len(ap): self._post(self._update_book, float(bp[0]), float(ap[0]))
+
+    def on_analytics(self, m: BookMetrics):
+        if self.is_active: self._post(self._update_imbalance, m.imbalance)
+
+    def _on_series(self, kind: str):
+        if not self.is_active: return
+        if kind == 'failed': self._post(self.chart.set_status, 'No candles'); return
+        if kind != 'update': self._needs_full_redraw = True
+        self._post(self._render_chart)
+
+    def _post(self, fn, *args):
+        self._last[fn] = args
+        if self.render_enabled: self.scheduler.post(fn, *args)
+
+    def set_rendering(self, enabled: bool):
+        """Pause/resume drawing; the latest values keep being tracked and are painted on resume."""
+        self.render_enabled = enabled
+        if enabled:
+            self._needs_full_redraw = True
+            for fn, args in list(self._last.items()): self.scheduler.post(fn, *args)
+
+    # ----- UI thread -----
+    def _update_price(self, price: float, percent: float):
+        color = UP_COLOR if percent >= 0 else DOWN_COLOR
+        self.price_lbl.config(text=f"{price:,.2f}", fg=color)
+        self.percent_lbl.config(text=f"{'+' if percent >= 0 else ''}{percent:.2f}%", fg=color)
+
+    def _update_book(self, bid: float, ask: float):
+        self.book_lbl.config(text=f"BID {bid:,.2f}  ASK {ask:,.2f}  Spr {ask - bid:.4f}")
+
+    def _update_imbalance(self, imbalance: float):
+        self.imb_lbl.config(text=f"Imb {imbalance:+.3f}", fg=UP_COLOR if imbalance >= 0 else DOWN_COLOR)
+
+    def _render_chart(self):
+        last = self.series.last()
+        if last is None: return
+        full, self._needs_full_redraw = self._needs_full_redraw, False
+        if not full and self.chart.update_last(*last[1:5]): return   # only the live candle moved
+        cols = self.series.view(GRID_TILE_CANDLES)
+        if cols is not None: self.chart.set_data(cols)
+
+    def _on_click(self, _event=None):
+        if self.on_open: self.on_open(self.symbol)
+
+
+class SymbolGrid:
+    """rows x cols SymbolTiles over the first symbols of the list; tiles are kept across layout changes."""
+    def __init__(self, parent: tk.Widget, symbols: List[str], hub, scheduler, market: Optional[MarketTable] = None,
+                 on_open: Optional[Callable[[str], None]] = None, visibility=None):
+        self.symbols = list(dict.fromkeys(s.upper() for s in symbols))
+        self.hub = hub; self.scheduler = scheduler; self.market = market
+        self.on_open = on_open; self.visibility = visibility
+        self.frame = tk.Frame(parent, bg=BG_DARK)
+        self.tiles: Dict[str, SymbolTile] = {}
+        self.shape = (0, 0)
+
+    def set_layout(self, rows: int, cols: int):
+        shown = self.symbols[:rows * cols]
+        for symbol in [s for s in self.tiles if s not in shown]:   # release symbols that no longer fit
+            tile = self.tiles.pop(symbol)
+            if self.visibility: self.visibility.unregister(tile)
+            tile.destroy()
+        for r in range(max(rows, self.shape[0])): self.frame.rowconfigure(r, weight=1 if r < rows else 0, uniform='tile')
+        for c in range(max(cols, self.shape[1])): self.frame.columnconfigure(c, weight=1 if c < cols else 0, uniform='tile')
+        for i, symbol in enumerate(shown):
+            tile = self.tiles.get(symbol)
+            if tile is None:
+                tile = self.tiles[symbol] = SymbolTile(self.frame, symbol, self.hub, self.scheduler, self.market, self.on_open)
+                tile.start()
+                if self.visibility: self.visibility.register(tile, tile.frame)
+            tile.frame.grid(row=i // cols, column=i % cols, sticky='nsew', padx=2, pady=2)
+        self.shape = (rows, cols)
+
+    def show(self):
+        self.frame.pack(fill=tk.BOTH, expand=True)
+
+    def hide(self):
+        self.frame.pack_forget()
+
+    def stop(self):
+        for tile in self.tiles.values(): tile.stop()
+
+    def destroy(self):
+        for tile in self.tiles.values():
+            if self.visibility: self.visibility.unregister(tile)
+            tile.destroy()
+        self.tiles.clear()
+        self.frame.destroy()
@@ -0,0 +1,134 @@
+"""
+heatmap.py — Liquidity heatmap panel: order book history (utils/heatmap.py) drawn as one image.
+
+HeatmapRenderer keeps an RGBA copy of the grid in the same doubled ring layout, so a tick
+colour-maps just the new (or still-filling) columns, hands the contiguous newest window to one
+animated `imshow` and blits it over the cached background. The whole grid is re-coloured and the
+figure redrawn only when the grid re-centres, on resume, or once per revolution to rescale colours.
+"""
+import tkinter as tk
+from tkinter import ttk
+from typing import Optional
+
+import numpy as np
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.colors import LinearSegmentedColormap
+from matplotlib.figure import Figure
+
+from config import CARD_BG, BORDER_COLOR, MUTED_TEXT, ACCENT_COLOR, AMBER_COLOR
+from utils.heatmap import DepthHeatmap, heatmap_for
+from components.ui_scheduler import UiScheduler
+
+CMAP = LinearSegmentedColormap.from_list('liquidity', [CARD_BG, '#1e3a8a', ACCENT_COLOR, AMBER_COLOR, '#ffffff'])
+
+
+class HeatmapRenderer:
+    def __init__(self, fig, ax, canvas, model: DepthHeatmap):
+        self.fig = fig; self.ax = ax; self.canvas = canvas; self.model = model
+        n, rows = model.columns, model.rows
+        self._rgba = np.zeros((rows, 2 * n, 4), dtype=np.uint8)
+        self._lut = CMAP(np.linspace(0, 1, 256), bytes=True)   # 256-step colour table
+        self._nan = np.array(CMAP(0.0, bytes=True), dtype=np.uint8)
+        self.image = ax.imshow(self._rgba[:, :n], origin='lower', aspect='auto', interpolation='nearest',
+                               extent=(-n * model.column_sec, 0, 0, 1), animated=True)
+        self._gen = None; self._col: Optional[int] = None   # what the RGBA ring holds
+        self._scale = 1.0   # log1p(quantity) mapped to the top colour
+        self._bg = None
+        canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _colour(self, cols: np.ndarray) -> np.ndarray:
+        lvl = np.log1p(np.nan_to_num(cols, nan=0.0)) * (255.0 / self._scale)
+        out = self._lut[np.clip(lvl, 0, 255).astype(np.uint8)]
+        out[np.isnan(cols)] = self._nan
+        return out
+
+    def _write(self, first: int, rgba: np.ndarray):
+        n = self.model.columns
+        pos = (first + np.arange(rgba.shape[1])) % n
+        self._rgba[:, pos] = rgba; self._rgba[:, pos + n] = rgba
+
+    def _window(self) -> np.ndarray:
+        n = self.model.columns; start = (self._col + 1) % n
+        return self._rgba[:, start:start + n]
+
+    def render(self, full: bool = False):
+        """Paint what changed since the last call; a full repaint when forced or when the grid moved."""
+        n = self.model.columns
+        since = None if full or self._bg is None or self._col is None else self._col
+        gen, col, cols = self.model.columns_since(since)
+        if col is None: return
+        if since is not None and (gen != self._gen or col - self._col >= n or col // n != self._col // n):
+            since = None; gen, col, cols = self.model.columns_since(None)   # re-centred, long gap or new revolution
+        if since is None:
+            finite = cols[np.isfinite(cols)]
+            self._scale = float(np.log1p(np.percentile(finite, 99))) if finite.size else 1.0
+            self._scale = self._scale or 1.0
+        self._write(col - cols.shape[1] + 1, self._colour(cols))
+        self._gen, self._col = gen, col
+        self.image.set_data(self._window())
+        if since is None:
+            lo, hi = self.model.price_range()
+            self.image.set_extent((-n * self.model.column_sec, 0, lo, hi))
+            self.ax.set_ylim(lo, hi)
+            self.canvas.draw()   # _on_draw caches the background and paints the image
+            return
+        self.canvas.restore_region(self._bg)
+        self.ax.draw_artist(self.image)
+        self.canvas.blit(self.ax.bbox)
+
+    def _on_draw(self, event):
+        self._bg = self.canvas.copy_from_bbox(self.ax.bbox)
+        if self._col is not None: self.ax.draw_artist(self.image)
+
+
+class HeatmapPanel:
+    def __init__(self, parent: tk.Widget, symbol: str, scheduler: UiScheduler):
+        self.parent = parent; self.symbol = symbol; self.scheduler = scheduler
+        self.model = heatmap_for(symbol)   # filled by the symbol's BookFeed (utils/book_feed.py)
+        self.is_active = False
+        self.render_enabled = True
+        self._full = True
+
+        self.frame = ttk.Frame(parent, padding=0, style='Card.TFrame')
+        header = ttk.Frame(self.frame, style='Card.TFrame', padding=5); header.pack(fill=tk.X)
+        span = self.model.columns * self.model.column_sec / 60
+        ttk.Label(header, text=f"{symbol} Liquidity Heatmap (Last {span:g} min)", style='CardTitle.TLabel').pack(side=tk.LEFT)
+
+        self.fig = Figure(figsize=(4, 5), dpi=100)
+        self.fig.patch.set_facecolor(CARD_BG)
+        self.fig.subplots_adjust(left=0.22, right=0.96, top=0.95, bottom=0.10)
+        self.ax = self.fig.add_subplot(111)
+        self.ax.set_facecolor(CARD_BG)
+        self.ax.tick_params(colors=MUTED_TEXT, labelsize=8)
+        for spine in self.ax.spines.values(): spine.set_edgecolor(BORDER_COLOR)
+        self.ax.set_xlabel('Seconds ago', color=MUTED_TEXT, fontsize=9)
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.frame)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=2, pady=2)
+        self.renderer = HeatmapRenderer(self.fig, self.ax, self.canvas, self.model)
+
+    def start(self):
+        if self.is_active: return
+        self.is_active = True
+        self._tick()
+
+    def stop(self):
+        self.is_active = False
+
+    def _tick(self):
+        """Paint about once per column; the model fills in between from the depth stream."""
+        if not self.is_active: return
+        if self.render_enabled: self.scheduler.post(self._render)
+        self.frame.after(int(self.model.column_sec * 1000), self._tick)
+
+    def _render(self):
+        full, self._full = self._full, False
+        self.renderer.render(full)
+
+    def set_rendering(self, enabled: bool):
+        """Pause/resume drawing; the grid keeps filling and is repainted whole on resume."""
+        self.render_enabled = enabled
+        if enabled:
+            self._full = True
+            self.scheduler.post(self._render)
+
+    def pack(self, **kwargs): self.frame.pack(**kwargs)
@@ -1,72 +1,181 @@
 
 import tkinter as tk
 from tkinter import ttk
-import threading
-import json
-import websocket
-from config import ws_depth, ORDERBOOK_DEFAULT_LEVELS, ORDERBOOK_MAX_LEVELS
+import numpy as np
+from config import (ORDERBOOK_DEFAULT_LEVELS, ORDERBOOK_MAX_LEVELS, ORDERBOOK_LADDER_LEVELS,
+                    ORDERBOOK_GROUPINGS, ORDERBOOK_ROW_HEIGHT, CARD_BG, TEXT_COLOR, MUTED_TEXT,
+                    UP_COLOR, DOWN_COLOR, BID_BAR_COLOR, ASK_BAR_COLOR)
+from utils.stream_hub import StreamHub
+from utils.book_feed import book_for
+from utils.local_book import group_levels
+from components.ui_scheduler import UiScheduler
+
+class BookLadder:
+    """Virtualized price ladder on a Canvas: a fixed pool of row items shows the rows in the viewport only.
+
+    set_data() takes whole-side arrays (price, qty, cumulative qty); painting formats just the visible
+    rows and touches only the canvas items whose text or bar width changed, so thousands of levels
+    scroll and update at the cost of the ~20 rows on screen.
+    """
+    COLS = (('price', 0.34), ('qty', 0.66), ('total', 0.98))   # right edge of each column, as a fraction of width
+
+    def __init__(self, parent: tk.Widget, title: str, color: str, bar_color: str, rows: int):
+        self.color = color; self.bar_color = bar_color
+        self.row_h = ORDERBOOK_ROW_HEIGHT
+        self.prices = self.qtys = self.cum = np.empty(0)
+        self.price_fmt = '{:,.2f}'
+        self.top = 0          # index of the first row in the viewport
+        self._items = []      # per pool row: (bar, price, qty, total) canvas ids
+        self._painted = []    # per pool row: (price text, qty text, total text, bar px) on screen
+        self._width = 1
+
+        self.frame = ttk.Frame(parent, style='Panel.TFrame')
+        ttk.Label(self.frame, text=title, style='CardTitle.TLabel').pack(anchor=tk.W)
+        body = ttk.Frame(self.frame, style='Panel.TFrame'); body.pack(fill=tk.BOTH, expand=True)
+        self.canvas = tk.Canvas(body, bg=CARD_BG, highlightthickness=0, height=(rows + 1) * self.row_h, width=300)
+        self.scroll = ttk.Scrollbar(body, orient=tk.VERTICAL, command=self.yview)
+        self.scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self._heads = [self.canvas.create_text(0, self.row_h // 2, text=name.capitalize(), anchor='e', fill=MUTED_TEXT,
+                                               font=('Segoe UI', 9, 'bold')) for name, _ in self.COLS]
+        self.canvas.bind('<Configure>', self._on_resize)
+        self.canvas.bind('<MouseWheel>', lambda e: self.yview('scroll', -1 if e.delta > 0 else 1, 'units'))
+        self.canvas.bind('<Button-4>', lambda e: self.yview('scroll', -1, 'units'))
+        self.canvas.bind('<Button-5>', lambda e: self.yview('scroll', 1, 'units'))
+
+    # ----- viewport -----
+    def visible_rows(self) -> int:
+        h = self.canvas.winfo_height()
+        if h <= 1: h = int(self.canvas['height'])   # not mapped yet
+        return max(1, h // self.row_h - 1)
+
+    def _on_resize(self, event):
+        self._width = max(event.width, 1)
+        for head, (_, x) in zip(self._heads, self.COLS): self.canvas.coords(head, x * self._width, self.row_h // 2)
+        need = self.visible_rows()
+        while len(self._items) < need:   # grow the pool; rows are never destroyed, just blanked
+            y = (len(self._items) + 1) * self.row_h
+            bar = self.canvas.create_rectangle(0, y + 1, 0, y + self.row_h - 1, fill=self.bar_color, width=0)
+            texts = [self.canvas.create_text(0, y + self.row_h // 2, text='', anchor='e', font=('Consolas', 10),
+                                             fill=self.color if i == 0 else TEXT_COLOR) for i in range(3)]
+            self._items.append((bar, *texts)); self._painted.append(None)
+        for i, (bar, *texts) in enumerate(self._items):
+            y = (i + 1) * self.row_h
+            for t, (_, x) in zip(texts, self.COLS): self.canvas.coords(t, x * self._width, y + self.row_h // 2)
+        self._painted = [None] * len(self._items)   # column positions moved: repaint everything
+        self.paint()
+
+    def yview(self, *args):
+        n, vis = len(self.prices), self.visible_rows()
+        if args[0] == 'moveto': top = int(float(args[1]) * n)
+        elif args[0] == 'scroll': top = self.top + int(args[1]) * (vis if args[2] == 'pages' else 1)
+        else: return
+        self.top = max(0, min(top, n - vis))
+        self.paint()
+
+    # ----- data -----
+    def set_data(self, prices: np.ndarray, qtys: np.ndarray, cum: np.ndarray, price_fmt: str = None):
+        self.prices, self.qtys, self.cum = prices, qtys, cum
+        if price_fmt and price_fmt != self.price_fmt:
+            self.price_fmt = price_fmt; self._painted = [None] * len(self._items)
+        self.top = max(0, min(self.top, len(prices) - self.visible_rows()))
+        self.paint()
+
+    def paint(self):
+        n, vis = len(self.prices), min(self.visible_rows(), len(self._items))
+        lo, hi = self.top, min(self.top + vis, n)
+        prices, qtys, cum = self.prices[lo:hi].tolist(), self.qtys[lo:hi].tolist(), self.cum[lo:hi].tolist()
+        scale = (self._width / self.cum[hi - 1]) if hi > lo and self.cum[hi - 1] > 0 else 0.0   # bars relative to the viewport
+        fmt = self.price_fmt; canvas = self.canvas
+        for i in range(len(self._items)):
+            if i < hi - lo and i < vis:
+                row = (fmt.format(prices[i]), f"{qtys[i]:,.4f}", f"{cum[i]:,.4f}", int(cum[i] * scale))
+            else: row = ('', '', '', 0)
+            old = self._painted[i]
+            if row == old: continue
+            bar, *texts = self._items[i]
+            for k in range(3):
+                if old is None or row[k] != old[k]: canvas.itemconfigure(texts[k], text=row[k])
+            if old is None or row[3] != old[3]:
+                y = (i + 1) * self.row_h
+                canvas.coords(bar, self._width - row[3], y + 1, self._width, y + self.row_h - 1)
+            self._painted[i] = row
+        self.scroll.set(lo / n if n else 0.0, hi / n if n else 1.0)
+
+    def set_rows(self, rows: int):
+        self.canvas.config(height=(rows + 1) * self.row_h)
+
+    def pack(self, **kwargs): self.frame.pack(**kwargs)
 
 class OrderBookPanel:
-    def __init__(self, parent: tk.Widget, symbol: str, limit: int = ORDERBOOK_DEFAULT_LEVELS):
-        self.parent = parent; self.symbol = symbol.lower(); self.limit = limit
-        self.ws = None; self.is_active = False
+    def __init__(self, parent: tk.Widget, symbol: str, hub: StreamHub, scheduler: UiScheduler,
+                 limit: int = ORDERBOOK_DEFAULT_LEVELS):
+        self.parent = parent; self.symbol = symbol.lower(); self.hub = hub; self.scheduler = scheduler; self.limit = limit
+        self.is_active = False
+        self.render_enabled = True
+        self.feed = book_for(symbol, hub)   # shared local book; also feeds the analytics and heatmap
+        self.tick = 0.0   # price grouping; 0 = raw levels
         self.frame = ttk.Frame(parent, padding=8, style='Panel.TFrame')
         header = ttk.Frame(self.frame, style='Panel.TFrame'); header.pack(fill=tk.X)
-        ttk.Label(header, text='Order Book Snapshot', style='CardTitle.TLabel').pack(side=tk.LEFT)
-        self.toggle_btn = ttk.Button(header, text=f'Show All {ORDERBOOK_MAX_LEVELS} Levels', style='Accent.TButton', command=self.toggle_levels)
+        ttk.Label(header, text='Order Book', style='CardTitle.TLabel').pack(side=tk.LEFT)
+        self.toggle_btn = ttk.Button(header, text=f'Show {ORDERBOOK_MAX_LEVELS} Rows', style='Accent.TButton', command=self.toggle_levels)
         self.toggle_btn.pack(side=tk.RIGHT)
+        self.group_var = tk.StringVar(value='Raw')
+        group = ttk.Combobox(header, textvariable=self.group_var, state='readonly', width=6,
+                             values=['Raw' if g == 0 else f'{g:g}' for g in ORDERBOOK_GROUPINGS])
+        group.bind('<<ComboboxSelected>>', lambda e: self.set_grouping(self.group_var.get()))
+        group.pack(side=tk.RIGHT, padx=6)
+        ttk.Label(header, text='Group', style='Muted.TLabel').pack(side=tk.RIGHT)
 
         tables = ttk.Frame(self.frame, style='Panel.TFrame'); tables.pack(fill=tk.BOTH, expand=True)
-        left = ttk.Frame(tables, style='Panel.TFrame'); left.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0,6))
-        ttk.Label(left, text='BIDS (Buys - Highest to Lowest Price)', style='CardTitle.TLabel').pack(anchor=tk.W)
-        self.bids_tree = ttk.Treeview(left, columns=('price','qty'), show='headings', height=self.limit, style='Dark.Treeview')
-        self.bids_tree.heading('price', text='Price'); self.bids_tree.heading('qty', text='Quantity')
-        self.bids_tree.column('price', width=120, anchor=tk.E); self.bids_tree.column('qty', width=100, anchor=tk.E)
-        self.bids_tree.pack(fill=tk.BOTH, expand=True)
-
-        right = ttk.Frame(tables, style='Panel.TFrame'); right.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(6,0))
-        ttk.Label(right, text='ASKS (Sells - Lowest to Highest Price)', style='CardTitle.TLabel').pack(anchor=tk.W)
-        self.asks_tree = ttk.Treeview(right, columns=('price','qty'), show='headings', height=self.limit, style='Dark.Treeview')
-        self.asks_tree.heading('price', text='Price'); self.asks_tree.heading('qty', text='Quantity')
-        self.asks_tree.column('price', width=120, anchor=tk.E); self.asks_tree.column('qty', width=100, anchor=tk.E)
-        self.asks_tree.pack(fill=tk.BOTH, expand=True)
+        self.bid_ladder = BookLadder(tables, 'BIDS (Buys - Highest to Lowest Price)', UP_COLOR, BID_BAR_COLOR, self.limit)
+        self.bid_ladder.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 6))
+        self.ask_ladder = BookLadder(tables, 'ASKS (Sells - Lowest to Highest Price)', DOWN_COLOR, ASK_BAR_COLOR, self.limit)
+        self.ask_ladder.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(6, 0))
 
     def start(self):
         if self.is_active: return
         self.is_active = True
-        self.ws = websocket.WebSocketApp(ws_depth(self.symbol), on_message=self.on_message,
-                                         on_error=lambda ws,e: print('orderbook error', e),
-                                         on_close=lambda ws,s,m: print('orderbook closed'))
-        threading.Thread(target=self.ws.run_forever, daemon=True).start()
+        self.feed.subscribe(self.on_depth)
 
     def stop(self):
         self.is_active = False
-        if self.ws:
-            try: self.ws.close()
-            except Exception: pass
-            self.ws = None
-
-    def on_message(self, ws, message: str):
-        if not self.is_active: return
-        try:
-            data = json.loads(message); bids = data.get('b', [])[:self.limit]; asks = data.get('a', [])[:self.limit]
-        except Exception as e: print('orderbook parse error', e); return
-        self.parent.after(0, self.update_tables, bids, asks)
-
-    def update_tables(self, bids, asks):
-        for t in (self.bids_tree, self.asks_tree):
-            for i in t.get_children(): t.delete(i)
-        for p, q in bids:
-            self.bids_tree.insert('', tk.END, values=(f"{float(p):,.2f}", f"{float(q):,.4f}"))
-        for p, q in asks:
-            self.asks_tree.insert('', tk.END, values=(f"{float(p):,.2f}", f"{float(q):,.4f}"))
+        self.feed.unsubscribe(self.on_depth)
+
+    def on_depth(self, bp: np.ndarray, bq: np.ndarray, ap: np.ndarray, aq: np.ndarray):
+        """Group + accumulate both sides (vectorized) off the UI thread; the frame only paints visible rows."""
+        if not self.is_active or not self.render_enabled: return   # the shared book keeps syncing while paused
+        n, tick = ORDERBOOK_LADDER_LEVELS, self.tick
+        bp, bq = group_levels(bp[:n], bq[:n], tick, descending=True)
+        ap, aq = group_levels(ap[:n], aq[:n], tick, descending=False)
+        decimals = max(0, -int(np.floor(np.log10(tick)))) if tick > 0 else 2
+        self.scheduler.post(self.update_ladders, (bp, bq, np.cumsum(bq)), (ap, aq, np.cumsum(aq)), f'{{:,.{decimals}f}}')
+
+    def _repaint(self):
+        depth = self.feed.depth()
+        if depth is not None: self.on_depth(*depth)
+
+    def set_rendering(self, enabled: bool):
+        """Pause/resume ladder updates; the local book keeps syncing while paused."""
+        self.render_enabled = enabled
+        if enabled: self._repaint()
+
+    def set_grouping(self, label: str):
+        self.tick = 0.0 if label == 'Raw' else float(label)
+        self._repaint()
+
+    def update_ladders(self, bids, asks, price_fmt: str):
+        self.bid_ladder.set_data(*bids, price_fmt=price_fmt)
+        self.ask_ladder.set_data(*asks, price_fmt=price_fmt)
 
     def toggle_levels(self):
         if self.limit == ORDERBOOK_DEFAULT_LEVELS:
             self.limit = ORDERBOOK_MAX_LEVELS
-            self.toggle_btn.config(text=f'Show Top {ORDERBOOK_DEFAULT_LEVELS} Levels')
+            self.toggle_btn.config(text=f'Show {ORDERBOOK_DEFAULT_LEVELS} Rows')
         else:
             self.limit = ORDERBOOK_DEFAULT_LEVELS
-            self.toggle_btn.config(text=f'Show All {ORDERBOOK_MAX_LEVELS} Levels')
+            self.toggle_btn.config(text=f'Show {ORDERBOOK_MAX_LEVELS} Rows')
+        self.bid_ladder.set_rows(self.limit)
+        self.ask_ladder.set_rows(self.limit)
 
     def pack(self, **kwargs): self.frame.pack(**kwargs)
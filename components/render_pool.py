@@ -0,0 +1,193 @@
+"""
+render_pool.py — Optional offscreen chart rendering in worker processes (CHART_RENDER_WORKERS > 0).
+
+Matplotlib on the Tk thread serializes every chart behind the GIL; with many charts on screen the
+frame loop cannot keep up. Here each chart owns a shared-memory block holding its input columns
+(float64, `(rows, capacity)` after an `[n, rows, capacity]` header). A worker process attaches to it, draws the
+chart with Agg (the same figure code as the in-process panels) and returns the finished RGBA frame,
+which the UI thread puts into a Tk PhotoImage (as binary PPM, through the public photo `put`).
+
+OffscreenChart only submits when its columns or size actually changed, keeps at most one frame in
+flight and always renders the latest input, so a busy chart drops intermediate frames instead of
+queueing them.
+"""
+import os
+import tkinter as tk
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+from typing import Optional, Tuple
+
+import numpy as np
+
+from config import CHART_RENDER_WORKERS, CARD_BG, MUTED_TEXT
+
+_HEADER = 3   # float64 slots before the columns: n, rows, capacity
+
+
+# ---------- worker side ----------
+_shm: "OrderedDict[str, shared_memory.SharedMemory]" = OrderedDict()
+_figures: "OrderedDict[tuple, tuple]" = OrderedDict()
+_MAX_FIGURES = 8   # per worker; figures are reused across frames of the same kind and size
+_MAX_BLOCKS = 64   # attached input blocks per worker (charts re-create theirs when they grow)
+
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def _columns(name: str) -> np.ndarray:
+    shm = _shm.pop(name, None)
+    if shm is None:
+        shm = shared_memory.SharedMemory(name=name)   # spawned workers share the UI process's resource tracker
+    _shm[name] = shm
+    while len(_shm) > _MAX_BLOCKS: _shm.popitem(last=False)[1].close()
+    head = np.ndarray((_HEADER,), dtype=np.float64, buffer=shm.buf)
+    n, rows, cap = (int(v) for v in head)
+    return np.ndarray((rows, cap), dtype=np.float64, buffer=shm.buf, offset=_HEADER * 8)[:, :n].copy()
+
+
+def _figure(kind: str, width: int, height: int, dpi: int):
+    key = (kind, width, height)
+    fig = _figures.pop(key, None)
+    if fig is None:
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        size = (width / dpi, height / dpi)
+        if kind == 'candles':
+            from components.candle_chart import CandleRenderer, candle_figure
+            f, ax_price, ax_vol = candle_figure(size, dpi)
+            canvas = FigureCanvasAgg(f)
+            fig = (f, canvas, CandleRenderer(f, ax_price, ax_vol, canvas))
+        elif kind == 'technical':
+            from components.technical import technical_figure
+            f, ax = technical_figure(size, dpi)
+            fig = (f, FigureCanvasAgg(f), ax)
+        else: raise ValueError(f'unknown chart kind {kind!r}')
+    _figures[key] = fig
+    while len(_figures) > _MAX_FIGURES: _figures.popitem(last=False)
+    return fig
+
+
+def render_frame(kind: str, shm_name: str, width: int, height: int, dpi: int = 100) -> Tuple[int, int, bytes]:
+    """Draw one chart from its shared columns; returns (width, height, RGBA bytes)."""
+    cols = _columns(shm_name)
+    f, canvas, target = _figure(kind, width, height, dpi)
+    if kind == 'candles':
+        target.set_data(*cols)   # CandleRenderer draws the canvas
+    else:
+        from components.technical import plot_technical
+        plot_technical(target, *cols); canvas.draw()
+    w, h = canvas.get_width_height()
+    return w, h, bytes(canvas.buffer_rgba())
+
+
+# ---------- UI side ----------
+def ppm_frame(width: int, height: int, rgba: bytes) -> bytes:
+    """Binary PPM (P6) of an RGBA frame; alpha is dropped, the chart figures are opaque."""
+    rgb = np.frombuffer(rgba, dtype=np.uint8).reshape(height, width, 4)[:, :, :3]
+    return b'P6 %d %d 255\n' % (width, height) + rgb.tobytes()
+
+
+class RenderPool:
+    def __init__(self, workers: int = CHART_RENDER_WORKERS):
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self._executor = ProcessPoolExecutor(self.workers, mp_context=get_context('spawn'), initializer=_init_worker)
+
+    def submit(self, kind: str, shm_name: str, width: int, height: int, dpi: int = 100):
+        return self._executor.submit(render_frame, kind, shm_name, width, height, dpi)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool: Optional[RenderPool] = None
+
+
+def render_pool() -> Optional[RenderPool]:
+    """The shared pool, started on first use; None when CHART_RENDER_WORKERS is 0 (draw on the Tk thread)."""
+    global _pool
+    if _pool is None and CHART_RENDER_WORKERS:
+        _pool = RenderPool(CHART_RENDER_WORKERS)
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None: _pool.shutdown(); _pool = None
+
+
+class OffscreenChart:
+    """A Tk canvas showing pool-rendered frames of one chart."""
+    def __init__(self, parent: tk.Widget, pool: RenderPool, kind: str, scheduler, dpi: int = 100):
+        self.pool = pool; self.kind = kind; self.scheduler = scheduler; self.dpi = dpi
+        self.widget = tk.Canvas(parent, bg=CARD_BG, highlightthickness=0, width=800, height=500)
+        self.photo = None
+        self._image = self.widget.create_image(0, 0, anchor='nw')
+        self._status = self.widget.create_text(400, 250, text='Loading...', fill=MUTED_TEXT, font=('Segoe UI', 11))
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._busy = False
+        self._pending: Optional[np.ndarray] = None   # newest columns waiting for the frame in flight
+        self._shown = None                           # (size, columns) of the last submitted frame
+        self.widget.bind('<Configure>', self._on_resize)
+
+    def pack(self, **kwargs): self.widget.pack(**kwargs)
+
+    def set_status(self, text: str):
+        w, h = self._size()
+        self.widget.coords(self._status, w // 2, h // 2)
+        self.widget.itemconfigure(self._status, text=text, state='normal')
+
+    def _size(self) -> Tuple[int, int]:
+        w, h = self.widget.winfo_width(), self.widget.winfo_height()
+        return (w, h) if w > 1 and h > 1 else (int(self.widget['width']), int(self.widget['height']))
+
+    def submit(self, cols: np.ndarray):
+        """Render (rows, n) columns unless nothing changed since the last frame (UI thread)."""
+        if self._busy: self._pending = cols; return
+        size = self._size()
+        shown = self._shown
+        if shown is not None and shown[0] == size and shown[1].shape == cols.shape and np.array_equal(shown[1], cols): return
+        self._write(cols)
+        self._shown = (size, cols.copy())
+        self._busy = True
+        try: fut = self.pool.submit(self.kind, self._shm.name, size[0], size[1], self.dpi)
+        except RuntimeError as e: self._busy = False; print(f"render pool unavailable: {e}"); return
+        fut.add_done_callback(lambda f: self.scheduler.post(self._on_frame, f))
+
+    def _write(self, cols: np.ndarray):
+        rows, n = cols.shape
+        need = (_HEADER + rows * n) * 8
+        if self._shm is None or self._shm.size < need:
+            self.close()
+            self._shm = shared_memory.SharedMemory(create=True, size=max(need * 2, 4096))   # room to grow
+        cap = (self._shm.size // 8 - _HEADER) // rows
+        np.ndarray((_HEADER,), dtype=np.float64, buffer=self._shm.buf)[:] = (n, rows, cap)
+        np.ndarray((rows, cap), dtype=np.float64, buffer=self._shm.buf, offset=_HEADER * 8)[:, :n] = cols
+
+    def _on_frame(self, fut):
+        self._busy = False
+        if self._shm is None: return   # closed meanwhile
+        try:
+            w, h, rgba = fut.result()
+            self._blit(w, h, rgba)
+        except Exception as e: print(f"chart render error ({self.kind}): {e}"); self._shown = None
+        pending, self._pending = self._pending, None
+        if pending is not None: self.submit(pending)
+
+    def _blit(self, w: int, h: int, rgba: bytes):
+        if self.photo is None or self.photo.width() != w or self.photo.height() != h:
+            self.photo = tk.PhotoImage(master=self.widget, width=w, height=h)
+            self.widget.itemconfigure(self._image, image=self.photo)
+        self.photo.tk.call(self.photo, 'put', ppm_frame(w, h, rgba), '-format', 'ppm')
+        self.widget.itemconfigure(self._status, state='hidden')
+
+    def _on_resize(self, event):
+        if self._shown is not None: self.submit(self._shown[1])
+
+    def close(self):
+        """Release the shared block (re-created by the next submit)."""
+        if self._shm is None: return
+        shm, self._shm = self._shm, None
+        try: shm.close(); shm.unlink()
+        except (BufferError, FileNotFoundError): pass
@@ -1,43 +1,142 @@
 
 import tkinter as tk
 from tkinter import ttk
+import threading
+import numpy as np
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
-from utils.binance_api import get_klines
-from utils.indicators import sma, ema
-from config import CARD_BG, BORDER_COLOR, TEXT_COLOR, ACCENT_COLOR, AMBER_COLOR
+from utils.candle_series import series_for
+from utils.indicators import SMA, EMA, sma_np, ema_np
+from config import CARD_BG, BORDER_COLOR, TEXT_COLOR, MUTED_TEXT, ACCENT_COLOR, AMBER_COLOR
+from components.render_pool import OffscreenChart, render_pool
+
+def technical_figure(figsize=(6.5, 3.0), dpi: int = 100):
+    """Figure with empty Close/SMA(10)/EMA(20) lines that plot_technical fills in."""
+    fig = Figure(figsize=figsize, dpi=dpi, facecolor=CARD_BG)
+    ax = fig.add_subplot(111)
+    ax.set_facecolor(CARD_BG); ax.grid(True, color=BORDER_COLOR, alpha=0.3); ax.tick_params(colors=TEXT_COLOR)
+    ax.plot([], [], label='Close', color=TEXT_COLOR)
+    ax.plot([], [], label='SMA(10)', color=ACCENT_COLOR)
+    ax.plot([], [], label='EMA(20)', color=AMBER_COLOR)
+    ax.legend(facecolor=CARD_BG, edgecolor=BORDER_COLOR)
+    return fig, ax
+
+def plot_technical(ax, closes, sma=None, ema=None):
+    """Close with SMA(10)/EMA(20) (batch versions unless given); also run by render workers. Only the
+    line data is replaced, so the title, axis labels and status text set up with the figure survive."""
+    x = np.arange(len(closes))
+    close_line, sma_line, ema_line = ax.lines[:3]
+    close_line.set_data(x, closes)
+    sma_line.set_data(x, sma_np(closes, period=10) if sma is None else sma)
+    ema_line.set_data(x, ema_np(closes, period=20) if ema is None else ema)
+    ax.relim(); ax.autoscale_view()
+
+def _nan(v): return np.nan if v is None else v
+
+class IndicatorWindow:
+    """Close, SMA(10) and EMA(20) rows of the newest `limit` candles. seed() starts from the batch
+    versions; after that every live candle is one O(1) update of the streaming indicators."""
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.sma, self.ema = SMA(10), EMA(20)
+        self.cols = None   # (3, n): close, SMA, EMA
+
+    def seed(self, closes):
+        closes = np.asarray(closes, dtype=float)[-self.limit:]
+        self.sma.seed(closes); self.ema.seed(closes)
+        self.cols = np.array([closes, sma_np(closes, period=10), ema_np(closes, period=20)])
+
+    def revise(self, close: float):
+        """The forming (last) candle changed."""
+        self.cols[:, -1] = close, _nan(self.sma.update(close, new=False)), self.ema.update(close, new=False)
+
+    def append(self, close: float):
+        """A new candle opened; the oldest one scrolls out once `limit` are shown."""
+        keep = self.cols[:, 1:] if self.cols.shape[1] >= self.limit else self.cols
+        self.cols = np.column_stack([keep, (close, _nan(self.sma.update(close)), self.ema.update(close))])
 
 class TechnicalAnalysisPanel:
-    def __init__(self, parent: tk.Widget, symbol: str, interval: str = '1h', limit: int = 100):
+    def __init__(self, parent: tk.Widget, symbol: str, hub, scheduler, interval: str = '1h', limit: int = 100):
         self.parent = parent; self.symbol = symbol.upper(); self.interval = interval; self.limit = limit
+        self.scheduler = scheduler
+        self.is_active = False
+        self.render_enabled = True
         self.frame = ttk.Frame(parent, padding=8, style='Panel.TFrame')
         ttk.Label(self.frame, text=f"Technical: {self.symbol} ({self.interval})", style='CardTitle.TLabel').pack(anchor=tk.W)
         ttk.Button(self.frame, text='Reload', style='Accent.TButton', command=self.reload).pack(anchor=tk.W)
 
-        self.fig = Figure(figsize=(6.5, 3.0), dpi=100, facecolor=CARD_BG)
-        self.ax = self.fig.add_subplot(111)
-        self.ax.set_facecolor(CARD_BG); self.ax.grid(True, color=BORDER_COLOR, alpha=0.3); self.ax.tick_params(colors=TEXT_COLOR)
-        self.ax.set_title(f"{self.symbol} Price with SMA/EMA", color=TEXT_COLOR)
-        self.ax.set_xlabel('Candle', color=TEXT_COLOR); self.ax.set_ylabel('Price (USDT)', color=TEXT_COLOR)
+        pool = render_pool()
+        if pool:   # drawn by a render worker, shown as a PhotoImage
+            self.offscreen = OffscreenChart(self.frame, pool, 'technical', scheduler)
+            self.offscreen.pack(fill=tk.BOTH, expand=True)
+        else:
+            self.offscreen = None
+            self.fig, self.ax = technical_figure()
+            self.ax.set_title(f"{self.symbol} Price with SMA/EMA", color=TEXT_COLOR)
+            self.ax.set_xlabel('Candle', color=TEXT_COLOR); self.ax.set_ylabel('Price (USDT)', color=TEXT_COLOR)
+            self.status_txt = self.ax.text(0.5, 0.5, 'Loading...', transform=self.ax.transAxes,
+                                           ha='center', va='center', color=MUTED_TEXT, fontsize=11)
+
+            self.canvas = FigureCanvasTkAgg(self.fig, master=self.frame)
+            self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+
+        # candles shared with the symbol's other charts; history is loaded off the Tk thread (load_async)
+        self.series = series_for(symbol, interval, hub)
+        self.lines = IndicatorWindow(limit)   # advanced on the stream thread, drawn on the Tk thread
+        self._lock = threading.Lock()
 
-        self.canvas = FigureCanvasTkAgg(self.fig, master=self.frame)
-        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+    def _on_series(self, kind: str):
+        """CandleSeries listener (loader / stream thread): seed on load, then O(1) indicator updates."""
+        if not self.is_active: return
+        if kind == 'failed': self.scheduler.post(self._set_status, 'Failed to load candles'); return
+        if kind == 'loaded':
+            if not self._seed(): return
+        else:
+            cols = self.series.view(2)
+            if cols is None: return
+            with self._lock:
+                if self.lines.cols is None: return
+                if kind == 'new':
+                    if cols.shape[1] > 1: self.lines.revise(cols[4, -2])   # final close of the candle that just closed
+                    self.lines.append(cols[4, -1])
+                else: self.lines.revise(cols[4, -1])
+        if self.render_enabled: self.scheduler.post(self.redraw)
 
-        self.reload()
+    def _seed(self) -> bool:
+        cols = self.series.view(self.limit)
+        if cols is None: return False
+        with self._lock: self.lines.seed(cols[4])
+        return True
+
+    def _set_status(self, text: str):
+        if self.offscreen: self.offscreen.set_status(text); return
+        self.status_txt.set_text(text); self.status_txt.set_visible(True)
+        self.canvas.draw_idle()
 
     def reload(self):
-        kl = get_klines(self.symbol, self.interval, self.limit)
-        if not kl: return
-        closes = [float(c[4]) for c in kl]
+        """Re-seed from the newest `limit` candles of the shared series and redraw."""
+        if self._seed(): self.redraw()
+
+    def redraw(self):
+        with self._lock:
+            if self.lines.cols is None: return
+            cols = self.lines.cols.copy()
+        if self.offscreen:
+            self.offscreen.submit(cols); return
+        plot_technical(self.ax, *cols)
+        self.status_txt.set_visible(False)
+        self.canvas.draw_idle()
 
-        self.ax.clear()
-        self.ax.set_facecolor(CARD_BG); self.ax.grid(True, color=BORDER_COLOR, alpha=0.3); self.ax.tick_params(colors=TEXT_COLOR)
+    def start(self):
+        if self.is_active: return
+        self.is_active = True
+        self.series.subscribe(self._on_series)
 
-        self.ax.plot(closes, label='Close', color=TEXT_COLOR)
-        s = sma(closes, period=10); e = ema(closes, period=20)
-        s_plot = [v if v is not None else float('nan') for v in s]
-        self.ax.plot(s_plot, label='SMA(10)', color=ACCENT_COLOR)
-        self.ax.plot(e, label='EMA(20)', color=AMBER_COLOR)
-        self.ax.legend(facecolor=CARD_BG, edgecolor=BORDER_COLOR)
+    def stop(self):
+        self.is_active = False
+        self.series.unsubscribe(self._on_series)
+        if self.offscreen: self.offscreen.close()
 
-        self.canvas.draw()
\ No newline at end of file
+    def set_rendering(self, enabled: bool):
+        self.render_enabled = enabled
+        if enabled: self.scheduler.post(self.redraw)
@@ -1,27 +1,19 @@
 
 import tkinter as tk
 from tkinter import ttk
-import json
-import threading
 import time
-import websocket 
-
-try:
-    from config import (
-        ws_ticker, UP_COLOR, DOWN_COLOR, WS_UI_THROTTLE_SEC,
-        BG_DARK, PANEL_BG, ACCENT, TEXT_MAIN, TEXT_DIM
-    )
-except Exception:
-    def ws_ticker(sym: str) -> str:
-        return f"wss://stream.binance.com:9443/ws/{sym}@ticker"
-    UP_COLOR = "#3ecf8e"
-    DOWN_COLOR = "#ff5c5c"
-    WS_UI_THROTTLE_SEC = 0.08
-    BG_DARK  = "#0f1a2b"
-    PANEL_BG = "#152238"
-    ACCENT   = "#2e3d5c"
-    TEXT_MAIN = "#cfe8ff"
-    TEXT_DIM  = "#9fb6cf"
+
+from config import UP_COLOR, DOWN_COLOR, ticker_stream, book_ticker_stream
+from utils.decode import Ticker, BookTicker
+from utils.stream_hub import StreamHub
+from components.ui_scheduler import UiScheduler
+
+# workshop card palette
+BG_DARK  = "#0f1a2b"
+PANEL_BG = "#152238"
+ACCENT   = "#2e3d5c"
+TEXT_MAIN = "#cfe8ff"
+TEXT_DIM  = "#9fb6cf"
 
 
 def _apply_local_dark_styles():
@@ -53,21 +45,19 @@ class CryptoTicker:
       - Status bar in the upper right corner: Connected/Offline + Latest time
 
     NOTE:
-      Use only one stream, @ticker. ('c','p','P','b','a' etc)
+      Reads @ticker and @bookTicker from the shared StreamHub; updates go through the
+      UiScheduler, so every message is kept and the newest one is painted each frame.
     """
 
-    def __init__(self, parent: tk.Widget, symbol: str, display_name: str):
+    def __init__(self, parent: tk.Widget, symbol: str, display_name: str, hub: StreamHub, scheduler: UiScheduler):
         _apply_local_dark_styles() 
         self.parent = parent
         self.symbol = symbol.lower()
         self.display_name = display_name
+        self.hub = hub
+        self.scheduler = scheduler
 
         self.is_active = False
-        self.ws = None
-
-        # throttling UI
-        self.last_update = 0.0
-        self.update_interval = float(WS_UI_THROTTLE_SEC)
 
         # ------- Main Panel -------
         self.frame = ttk.Frame(parent, style="Panel.TFrame")
@@ -121,69 +111,35 @@ class CryptoTicker:
         h = self._border.winfo_height()
         self._border.create_rectangle(1, 1, w - 1, h - 1, outline=ACCENT, width=2)
 
-    # ----- WS lifecycle -----
+    # ----- stream lifecycle -----
     def start(self):
         if self.is_active:
             return
         self.is_active = True
-        self._set_connected(True)
-        self.ws = websocket.WebSocketApp(
-            ws_ticker(self.symbol),
-            on_message=self.on_message,
-            on_error=lambda ws, e: self._on_error(e),
-            on_close=lambda ws, s, m: self._on_closed()
-        )
-        threading.Thread(target=self.ws.run_forever, daemon=True).start()
+        self.hub.subscribe(ticker_stream(self.symbol), self.on_ticker)
+        self.hub.subscribe(book_ticker_stream(self.symbol), self.on_book)
+        self._set_connected(self.hub.connected)
 
     def stop(self):
         self.is_active = False
+        self.hub.unsubscribe(ticker_stream(self.symbol), self.on_ticker)
+        self.hub.unsubscribe(book_ticker_stream(self.symbol), self.on_book)
         self._set_connected(False)
-        if self.ws:
-            try:
-                self.ws.close()
-            except Exception:
-                pass
-            self.ws = None
-
-    def _on_error(self, e):
-        print(f"{self.symbol} error:", e)
-        self.parent.after(0, self._set_connected, False)
-
-    def _on_closed(self):
-        print(f"{self.symbol} closed")
-        self.parent.after(0, self._set_connected, False)
-
-    # ----- WS message -----
-    def on_message(self, ws, message: str):
+
+    # ----- stream thread -----
+    def on_ticker(self, t: Ticker):
         if not self.is_active:
             return
-        now = time.time()
-        if (now - self.last_update) < self.update_interval:
-            return
-
-        try:
-            data = json.loads(message)
-            price = float(data["c"])
-            change = float(data["p"])
-            percent = float(data["P"])
-
-            bid = float(data.get("b", "nan"))
-            ask = float(data.get("a", "nan"))
-            spread = (ask - bid) if (not (bid != bid or ask != ask)) else float("nan")  # ตรวจ nan
-
-            ts_ms = data.get("E")
-            ts_text = time.strftime("%H:%M:%S", time.localtime(ts_ms / 1000)) if ts_ms else time.strftime("%H:%M:%S")
+        ts_text = time.strftime("%H:%M:%S", time.localtime(t.event_time / 1000))
+        self.scheduler.post(self.update_display, t.last, t.change, t.change_pct, ts_text)
 
-        except Exception as e:
-            print("ticker parse error:", e)
+    def on_book(self, b: BookTicker):
+        if not self.is_active:
             return
-
-        self.last_update = now
-        self.parent.after(0, self.update_display, price, change, percent, bid, ask, spread, ts_text)
+        self.scheduler.post(self.update_book, b.bid, b.ask)
 
     # ----- UI update -----
-    def update_display(self, price: float, change: float, percent: float,
-                       bid: float, ask: float, spread: float, ts_text: str):
+    def update_display(self, price: float, change: float, percent: float, ts_text: str):
         if not self.is_active:
             return
 
@@ -194,6 +150,13 @@ class CryptoTicker:
         sign = "+" if change >= 0 else ""
         self.change_label.config(text=f"{sign}{change:,.2f} ({sign}{percent:.2f}%)",
                                  foreground=(UP_COLOR if change >= 0 else DOWN_COLOR))
+        self.ts_lbl.config(text=f"Last update: {ts_text}")
+        self._set_connected(self.hub.connected)
+
+    def update_book(self, bid: float, ask: float):
+        if not self.is_active:
+            return
+        spread = ask - bid
 
         # BID / ASK + spread
         if not self._is_nan(bid):
@@ -211,8 +174,6 @@ class CryptoTicker:
         else:
             self.spread_label.config(text=f"Spread  --", foreground=TEXT_DIM)
 
-        self.ts_lbl.config(text=f"Last update: {ts_text}")
-
     def _is_nan(self, v: float) -> bool:
         return (v != v)  
 
@@ -0,0 +1,73 @@
+"""
+ui_scheduler.py — Frame-rate capped UI tick loop that coalesces updates from stream threads.
+
+Producer threads call `post(fn, *args)`; only the latest args per callable are kept
+("last value wins"). The Tk thread applies every dirty update once per frame in a
+single `after` callback, so bursts never grow the Tk event queue.
+Updates posted while the stream hub dispatches a message are attributed to that
+stream in utils.metrics (coalesced count, parsed -> painted latency), and each
+frame's lateness is recorded as the Tk loop lag.
+"""
+import threading
+import time
+import tkinter as tk
+from typing import Callable, Dict, Tuple
+
+from config import UI_FPS, UI_IDLE_FPS
+from utils.metrics import metrics
+
+
+class UiScheduler:
+    def __init__(self, root: tk.Misc, fps: int = UI_FPS):
+        self.root = root
+        self.interval_ms = max(1, int(1000 / fps))
+        self.active_interval_ms = self.interval_ms
+        self.idle_interval_ms = max(self.interval_ms, int(1000 / UI_IDLE_FPS))
+        self.posted = 0      # updates received from producers
+        self.coalesced = 0   # updates replaced by a newer one before being painted
+        self._pending: Dict[Callable, Tuple] = {}
+        self._origins: Dict[Callable, Tuple[str, float]] = {}   # fn -> (stream, parsed time) of its oldest pending update
+        self._lock = threading.Lock()
+        self._job = None
+        self._due = 0.0
+
+    def start(self):
+        if self._job is None: self._schedule()
+
+    def _schedule(self):
+        self._due = time.perf_counter() + self.interval_ms / 1000
+        self._job = self.root.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        if self._job is not None:
+            try: self.root.after_cancel(self._job)
+            except tk.TclError: pass
+            self._job = None
+
+    def set_idle(self, idle: bool):
+        """Tick at UI_IDLE_FPS instead of the full frame rate (window minimized); takes effect next frame."""
+        self.interval_ms = self.idle_interval_ms if idle else self.active_interval_ms
+
+    def post(self, fn: Callable, *args):
+        """Thread-safe: schedule fn(*args) for the next frame, replacing any pending call to fn."""
+        origin = metrics.context()
+        with self._lock:
+            self.posted += 1
+            if fn in self._pending:
+                self.coalesced += 1
+                if origin: metrics.observe_coalesced(origin[0])
+            self._pending[fn] = args
+            if origin: self._origins.setdefault(fn, origin)
+
+    def _tick(self):
+        metrics.observe_loop_lag(time.perf_counter() - self._due)
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            origins, self._origins = self._origins, {}
+        for fn, args in pending.items():
+            try: fn(*args)
+            except tk.TclError: pass  # widget destroyed after the update was posted
+            except Exception as e: print(f"ui update error ({getattr(fn, '__qualname__', fn)}): {e}")
+            origin = origins.get(fn)
+            if origin: metrics.observe_painted(origin[0], origin[1], time.perf_counter())
+        self._schedule()
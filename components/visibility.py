@@ -0,0 +1,51 @@
+"""
+visibility.py — Visibility-aware render lifecycle for panels.
+
+Every `<Map>` / `<Unmap>` in the window (a panel packed or `pack_forget()`-ed, a symbol view
+swapped, the window iconified or restored) schedules one re-check on idle. Each registered
+panel is then 'visible', 'hidden' (not viewable) or 'minimized', and is told through its
+`set_rendering(enabled)` only when that changes: hidden panels keep their data models current
+but draw nothing, and repaint once from current state when shown again. While the window is
+minimized the UI scheduler also drops to UI_IDLE_FPS.
+"""
+import tkinter as tk
+from typing import Dict
+
+VISIBLE, HIDDEN, MINIMIZED = 'visible', 'hidden', 'minimized'
+
+
+class VisibilityManager:
+    def __init__(self, root: tk.Tk, scheduler=None):
+        self.root = root; self.scheduler = scheduler
+        self._panels: Dict[object, tk.Misc] = {}   # panel -> widget whose viewability decides
+        self._state: Dict[object, str] = {}
+        self._job = None
+        self.minimized = False
+        root.bind('<Map>', self._on_event, add='+')     # root's tag is on every widget: sees all (un)maps
+        root.bind('<Unmap>', self._on_event, add='+')
+
+    def register(self, panel, widget: tk.Misc):
+        """Track `panel` (anything with set_rendering) by whether `widget` is viewable."""
+        self._panels[panel] = widget
+        self._on_event()
+
+    def unregister(self, panel):
+        self._panels.pop(panel, None); self._state.pop(panel, None)
+
+    def state(self, panel) -> str:
+        return self._state.get(panel, VISIBLE)
+
+    def _on_event(self, _event=None):
+        if self._job is None: self._job = self.root.after_idle(self.refresh)
+
+    def refresh(self):
+        self._job = None
+        try: self.minimized = self.root.state() in ('iconic', 'withdrawn')
+        except tk.TclError: return   # shutting down
+        if self.scheduler: self.scheduler.set_idle(self.minimized)
+        for panel, widget in list(self._panels.items()):
+            try: state = MINIMIZED if self.minimized else VISIBLE if widget.winfo_viewable() else HIDDEN
+            except tk.TclError: self.unregister(panel); continue   # destroyed
+            old = self._state.get(panel, VISIBLE)   # panels start out rendering
+            self._state[panel] = state
+            if (old == VISIBLE) != (state == VISIBLE): panel.set_rendering(state == VISIBLE)
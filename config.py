@@ -2,27 +2,51 @@
 """
 config.py — Central setting for Crypto Dashboard
 """
+import os
 
 # -----------------------------
 # Binance API Base URLs
 # -----------------------------
-BINANCE_REST_BASE = "https://api.binance.com"
-BINANCE_WS_BASE   = "wss://stream.binance.com:9443/ws"
+# Override with environment variables to point at a local replay server (utils/replay.py)
+BINANCE_REST_BASE = os.environ.get("BINANCE_REST_BASE", "https://api.binance.com")
+BINANCE_WS_BASE   = os.environ.get("BINANCE_WS_BASE", "wss://stream.binance.com:9443/ws")
+BINANCE_WS_COMBINED = os.environ.get("BINANCE_WS_COMBINED", "wss://stream.binance.com:9443/stream")
 
 # -----------------------------
-# Helpers for WebSocket streams
+# Stream names (combined-stream subscriptions)
+# -----------------------------
+def ticker_stream(symbol: str) -> str:
+    return f"{symbol.lower()}@ticker"
+
+def book_ticker_stream(symbol: str) -> str:
+    return f"{symbol.lower()}@bookTicker"
+
+def depth_stream(symbol: str, fast_100ms: bool = False) -> str:
+    return f"{symbol.lower()}@depth@100ms" if fast_100ms else f"{symbol.lower()}@depth"
+
+def kline_stream(symbol: str, interval: str) -> str:
+    return f"{symbol.lower()}@kline_{interval}"
+
+def agg_trade_stream(symbol: str) -> str:
+    return f"{symbol.lower()}@aggTrade"
+
+MARKET_MINI_TICKER_STREAM = "!miniTicker@arr"   # every symbol that changed in the last second, one message
+MARKET_TICKER_STREAM      = "!ticker@arr"
+
+# -----------------------------
+# Helpers for WebSocket streams (single raw stream URLs)
 # -----------------------------
 def ws_ticker(symbol: str) -> str:
-    return f"{BINANCE_WS_BASE}/{symbol.lower()}@ticker"
+    return f"{BINANCE_WS_BASE}/{ticker_stream(symbol)}"
 
 def ws_book_ticker(symbol: str) -> str:
-    return f"{BINANCE_WS_BASE}/{symbol.lower()}@bookTicker"
+    return f"{BINANCE_WS_BASE}/{book_ticker_stream(symbol)}"
 
 def ws_depth(symbol: str, fast_100ms: bool = False) -> str:
-    return f"{BINANCE_WS_BASE}/{symbol.lower()}@depth@100ms" if fast_100ms else f"{BINANCE_WS_BASE}/{symbol.lower()}@depth"
+    return f"{BINANCE_WS_BASE}/{depth_stream(symbol, fast_100ms)}"
 
 def ws_kline(symbol: str, interval: str) -> str:
-    return f"{BINANCE_WS_BASE}/{symbol.lower()}@kline_{interval}"
+    return f"{BINANCE_WS_BASE}/{kline_stream(symbol, interval)}"
 
 # -----------------------------
 # Defaults
@@ -42,6 +66,8 @@ NEUTRAL_COLOR = "#e5e7eb"
 ACCENT_COLOR  = "#3b82f6"  # blue-500
 GRID_COLOR    = "#4b5563"  # gray-600
 AMBER_COLOR   = "#f59e0b"  # amber-500
+BID_BAR_COLOR = "#064e3b"  # emerald-900, cumulative depth bars
+ASK_BAR_COLOR = "#7f1d1d"  # red-900
 
 # ---- Dark Theme Palette  ----
 BG_DARK      = "#1f2937"   # slate-800
@@ -59,14 +85,72 @@ LIVE_BADGE_FG = "#ffffff"
 # -----------------------------
 KLINE_INTERVAL_DEFAULT   = "1h"
 KLINE_LIMIT_DEFAULT      = 50
+KLINE_RING_CAPACITY      = 1000   # candles kept in memory per chart (the plot shows the last KLINE_LIMIT_DEFAULT)
+KLINE_STORE_DIR          = os.environ.get("DASHBOARD_KLINE_DIR", os.path.join(os.path.expanduser("~"), ".binance_dashboard", "klines"))
+KLINE_BACKFILL_CANDLES   = 5000   # closed candles kept on disk per (symbol, interval), backfilled on first use
+KLINE_PAGE_LIMIT         = 1000   # /api/v3/klines max rows per request
+AGG_INTERVALS            = ("1m", "5m", "15m", "1h", "4h", "1d")   # built locally from one base stream per symbol
+AGG_SOURCE               = os.environ.get("DASHBOARD_AGG_SOURCE", "kline")   # kline (@kline_1m) | aggTrade
+FLOW_WINDOWS_SEC         = (300, 3600)   # rolling trade-flow windows shown on the volume cards (utils/flow.py)
+FLOW_BUCKET_SEC          = 1.0           # window resolution; memory per window = window / bucket slots
 ORDERBOOK_DEFAULT_LEVELS = 10
 ORDERBOOK_MAX_LEVELS     = 20  
-VOLUME_RATIO_REFRESH_SEC = 30
+ORDERBOOK_SNAPSHOT_LIMIT = int(os.environ.get("DASHBOARD_BOOK_DEPTH", 1000))   # REST /api/v3/depth levels seeding the local book (max 5000)
+ORDERBOOK_LADDER_LEVELS  = 5000   # levels per side handed to the scrollable book ladder
+ORDERBOOK_GROUPINGS      = (0, 0.01, 0.1, 1, 10, 100)   # price bucket choices; 0 = raw levels
+ORDERBOOK_ROW_HEIGHT     = 20     # px per ladder row
+BOOK_ANALYTICS_LEVELS    = 1000   # best levels per side fed to the book analytics (bounds the cost per update)
+BOOK_IMBALANCE_LEVELS    = 10     # top-N levels for imbalance and weighted mid
+BOOK_SLIPPAGE_SIZES      = (10_000, 100_000)   # market order sizes (quote asset) priced against the book
+BOOK_WALL_FACTOR         = 5.0    # a level is a wall at >= this multiple of the median level size
+BOOK_WALL_MAX            = 3      # walls reported per side, largest first
+HEATMAP_COLUMNS          = 600    # liquidity heatmap history: columns x HEATMAP_COLUMN_SEC (10 min)
+HEATMAP_COLUMN_SEC       = 1.0
+HEATMAP_ROWS             = 200    # price buckets; memory per symbol = 2 x rows x columns x 4 bytes (+ the RGBA copy)
+HEATMAP_RANGE_PCT        = 1.0    # price span of the heatmap around the mid, in percent
+MARKET_TABLE_ENABLED     = os.environ.get("DASHBOARD_ALL_MARKET", "1") != "0"   # ticker bar reads the all-market table
+MARKET_QUOTE_ASSET       = "USDT"   # symbols kept in the all-market table
+VIEW_CACHE_SIZE          = 3     # per-symbol dashboards kept warm (hidden, streams live) for instant switching
+VIEW_CACHE_MAX_MB        = 600   # evict cached dashboards while process RSS is above this
+GRID_LAYOUTS             = {"2x2": (2, 2), "3x3": (3, 3)}   # multi-symbol grid modes (rows, columns)
+GRID_EXTRA_SYMBOLS       = ["XRPUSDT", "DOGEUSDT", "TRXUSDT", "LINKUSDT"]   # fill the grid after DEFAULT_SYMBOLS
+GRID_TILE_CANDLES        = 40    # candles in a grid tile's mini chart
 
 # -----------------------------
 # Networking & UI throttle
 # -----------------------------
 REST_TIMEOUT_SEC   = 10
 REST_RETRIES       = 3
-WS_UI_THROTTLE_SEC = 0.10
+REST_POOL_SIZE     = 10     # keep-alive connections in the shared requests.Session
+REST_BACKOFF_BASE_SEC = 0.5  # retry delay = uniform(0, min(MAX, BASE * 2**attempt))
+REST_BACKOFF_MAX_SEC  = 8
+REST_WEIGHT_LIMIT_PER_MIN = 5000   # headroom below Binance's 6000/min request-weight limit
+REST_CACHE_MAX_ENTRIES    = 256
+REST_WORKERS       = 4      # worker pool for initial/snapshot loads off the Tk thread
+WS_RECONNECT_SEC   = 1      # first reconnect delay; doubles (with jitter) up to WS_RECONNECT_MAX_SEC
+WS_RECONNECT_MAX_SEC    = 60
+WS_PING_INTERVAL_SEC    = 20
+WS_MAX_STREAMS_PER_CONN = 200    # Binance allows up to 1024 streams per combined connection
+WS_CONTROL_INTERVAL_SEC = 0.25   # min gap between SUBSCRIBE/UNSUBSCRIBE frames (limit: 5 msg/s)
+WS_STREAM_QUEUE_SIZE    = 1000   # per-stream backlog before the oldest message is dropped
+JSON_BACKEND       = os.environ.get("DASHBOARD_JSON", "auto")   # auto | msgspec | orjson | json (utils/decode.py)
+UI_FPS             = 30     # UI tick loop rate; stream updates are coalesced per frame
+UI_IDLE_FPS        = 2      # tick rate while the window is minimized (components/visibility.py)
+CHART_RENDER_WORKERS = int(os.environ.get("DASHBOARD_RENDER_WORKERS", "0"))   # > 0: charts drawn by this many processes (-1: one per core); 0: on the Tk thread
 MATPLOTLIB_FONT    = "Arial"
+
+# -----------------------------
+# Metrics / performance overlay
+# -----------------------------
+METRICS_REFRESH_SEC = 1.0   # header status/overlay refresh, message-rate window and export period
+METRICS_STALE_SEC   = 5.0   # a view's stream silent for longer marks the screen STALE
+METRICS_EXPORT_PATH = os.environ.get("DASHBOARD_METRICS_FILE")            # JSON snapshot rewritten every refresh
+METRICS_HTTP_PORT   = int(os.environ.get("DASHBOARD_METRICS_PORT", "0"))  # > 0: Prometheus text on 127.0.0.1:<port>/metrics
+
+# -----------------------------
+# Record / replay
+# -----------------------------
+RECORD_PATH = os.environ.get("DASHBOARD_RECORD")   # set to a file path to record all raw WS/REST traffic
+REPLAY_HOST = "127.0.0.1"
+REPLAY_REST_PORT = 8780
+REPLAY_WS_PORT   = 8781
@@ -1,27 +1,43 @@
 import tkinter as tk
 from tkinter import ttk
-import threading
-import websocket
-import json
 from functools import partial
+from collections import OrderedDict
 
 
 from components.features import apply_dark_theme, HeaderBar, StatsPanel, KlinePanel
 from components.orderbook import OrderBookPanel
+from components.heatmap import HeatmapPanel
+from components.grid import SymbolGrid
+from components.render_pool import shutdown_pool
+from components.ui_scheduler import UiScheduler
+from components.visibility import VisibilityManager
+from utils.stream_hub import StreamHub
 from config import (
     APP_TITLE, WINDOW_SIZE, ORDERBOOK_DEFAULT_LEVELS, 
-    KLINE_INTERVAL_DEFAULT, KLINE_LIMIT_DEFAULT, 
+    KLINE_INTERVAL_DEFAULT, KLINE_LIMIT_DEFAULT, AGG_INTERVALS,
     DEFAULT_SYMBOLS, BG_DARK, PANEL_BG, ACCENT_COLOR, 
-    TEXT_COLOR, UP_COLOR, DOWN_COLOR, ws_ticker, CARD_BG
+    TEXT_COLOR, UP_COLOR, DOWN_COLOR, ticker_stream, book_ticker_stream, depth_stream, kline_stream, agg_trade_stream, CARD_BG,
+    VIEW_CACHE_SIZE, VIEW_CACHE_MAX_MB, MARKET_TABLE_ENABLED, METRICS_REFRESH_SEC, METRICS_EXPORT_PATH, METRICS_HTTP_PORT,
+    GRID_LAYOUTS, GRID_EXTRA_SYMBOLS
 )
+from utils.aggregator import base_stream
+from utils.decode import Ticker
+from utils.market_table import MarketTable
+from utils.metrics import metrics
+from utils.sysinfo import rss_mb
+from utils.recorder import recorder
 
 # 1. Mini Ticker Widget 
 class MiniTickerWidget(tk.Frame):
-    def __init__(self, parent, symbol):
+    def __init__(self, parent, symbol, hub: StreamHub, scheduler: UiScheduler, table: MarketTable = None):
         super().__init__(parent, bg=CARD_BG, highlightbackground=BG_DARK, highlightthickness=1)
         self.symbol = symbol
+        self.hub = hub
+        self.scheduler = scheduler
+        self.table = table   # all-market table; without one the widget opens its own @ticker stream
         self.is_active = False
-        self.ws = None
+        self.render_enabled = True
+        self._latest = None   # (price, percent) kept while rendering is paused
         
         #Layout
         self.display_name = symbol.replace("USDT", "")
@@ -49,31 +65,31 @@ class MiniTickerWidget(tk.Frame):
         self.percent_lbl.pack(side=tk.TOP, pady=(0, 2))
 
     def start_stream(self):
+        if self.is_active: return
         self.is_active = True
-        threading.Thread(target=self._run_socket, daemon=True).start()
-
-    def _run_socket(self):
-        try:
-            url = ws_ticker(self.symbol)
-            self.ws = websocket.WebSocketApp(url, on_message=self.on_message)
-            self.ws.run_forever()
-        except Exception as e:
-            print(f"Socket error {self.symbol}: {e}")
+        if self.table: self.table.watch(self.symbol, self.on_row)
+        else: self.hub.subscribe(ticker_stream(self.symbol), self.on_message)
 
     def stop_stream(self):
         self.is_active = False
-        if self.ws:
-            try: self.ws.close()
-            except: pass
+        if self.table: self.table.unwatch(self.symbol, self.on_row)
+        else: self.hub.unsubscribe(ticker_stream(self.symbol), self.on_message)
+
+    def on_message(self, t: Ticker):
+        if not self.is_active: return
+        self._post(t.last, t.change_pct)
 
-    def on_message(self, ws, message):
+    def on_row(self, last: float, change_pct: float):
         if not self.is_active: return
-        try:
-            data = json.loads(message)
-            last_price = float(data['c'])
-            percent = float(data['P'])
-            self.after(0, lambda: self._update_ui(last_price, percent))
-        except: pass
+        self._post(last, change_pct)
+
+    def _post(self, price, percent):
+        self._latest = (price, percent)
+        if self.render_enabled: self.scheduler.post(self._update_ui, price, percent)
+
+    def set_rendering(self, enabled: bool):
+        self.render_enabled = enabled
+        if enabled and self._latest: self.scheduler.post(self._update_ui, *self._latest)
 
     def _update_ui(self, price, percent):
         color = UP_COLOR if percent >= 0 else DOWN_COLOR
@@ -127,6 +143,37 @@ class SimpleCoinButton(tk.Button):
     def stop_stream(self): pass
 
 
+# 3. Per-symbol view (cached by DashboardApp)
+class SymbolView:
+    """One symbol's header, stats, order book and chart in a single frame that can be hidden and re-shown warm."""
+    def __init__(self, parent, symbol):
+        self.symbol = symbol
+        self.frame = tk.Frame(parent, bg=BG_DARK)
+        self.header = None
+        self.stats = None
+        self.orderbook = None
+        self.kline = None
+        self.heatmap = None
+        self.mid_frame = None
+
+    def panels(self):
+        return [p for p in (self.stats, self.orderbook, self.kline, self.heatmap) if p]
+
+    def show(self):
+        self.frame.pack(fill=tk.BOTH, expand=True)
+
+    def hide(self):
+        # streams and data models stay live; the VisibilityManager pauses drawing once the frame unmaps
+        self.frame.pack_forget()
+
+    def stop(self):
+        for p in self.panels(): p.stop()
+
+    def destroy(self):
+        self.stop()
+        self.frame.destroy()
+
+
 # Main Application
 class DashboardApp:
     def __init__(self, root: tk.Tk):
@@ -141,14 +188,38 @@ class DashboardApp:
         self.stats = None
         self.orderbook = None
         self.kline = None
+        self.heatmap = None
         self.mid_frame = None
+
+        # LRU of per-symbol views: least recently used first
+        self.views = OrderedDict()
+        self.current_view = None
+        # Multi-symbol grid (None in single-symbol mode)
+        self.grid = None
         
         self.nav_buttons = {}
+        self.layout_buttons = {}
         self.ticker_widgets = []
 
+        # One combined-stream connection shared by every widget
+        self.hub = StreamHub()
+        self.hub.start()
+        # Stream threads post updates here; applied once per UI frame
+        self.scheduler = UiScheduler(root)
+        self.scheduler.start()
+        # Panels draw only while viewable; minimizing also slows the frame loop
+        self.visibility = VisibilityManager(root, self.scheduler)
+        # Whole-market 24h table (one !miniTicker@arr stream) that the ticker bar reads from
+        self.market = MarketTable(self.hub) if MARKET_TABLE_ENABLED else None
+        if self.market: self.market.start()
+        # Latency/staleness status in the header, optional file / Prometheus export
+        if METRICS_HTTP_PORT: metrics.serve(METRICS_HTTP_PORT)
+        self._metrics_job = self.root.after(int(METRICS_REFRESH_SEC * 1000), self._metrics_tick)
+
         # --- View Control Variables ---
         self.show_chart_var = tk.BooleanVar(value=True)
         self.show_book_var = tk.BooleanVar(value=True)
+        self.show_heatmap_var = tk.BooleanVar(value=True)
 
         # --- Layout ---
         
@@ -171,9 +242,10 @@ class DashboardApp:
         bar_frame.pack(side=tk.TOP, fill=tk.X)
         
         for symbol in DEFAULT_SYMBOLS:
-            tw = MiniTickerWidget(bar_frame, symbol)
+            tw = MiniTickerWidget(bar_frame, symbol, self.hub, self.scheduler, table=self.market)
             tw.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=1)
             tw.start_stream()
+            self.visibility.register(tw, tw)
             self.ticker_widgets.append(tw)
 
     def create_nav_buttons(self):
@@ -186,52 +258,104 @@ class DashboardApp:
             btn.pack(side=tk.LEFT, padx=1, pady=5) 
             self.nav_buttons[symbol] = btn
 
+        # Layout: the single-symbol dashboard or a grid of compact tiles
+        for name in reversed(("Single", *GRID_LAYOUTS)):
+            btn = SimpleCoinButton(self.nav_bar, name, command_callback=self.set_layout)
+            btn.config(width=6)
+            btn.pack(side=tk.RIGHT, padx=1, pady=5)
+            self.layout_buttons[name] = btn
+        tk.Label(self.nav_bar, text=" LAYOUT: ", bg=PANEL_BG, fg=TEXT_COLOR,
+                 font=('Segoe UI', 10, 'bold')).pack(side=tk.RIGHT, padx=(10, 5))
+
+    def set_layout(self, name: str):
+        if name not in GRID_LAYOUTS:
+            self.change_symbol(self.current_symbol); return
+        for key, btn in self.layout_buttons.items(): btn.set_selected(key == name)
+        for btn in self.nav_buttons.values(): btn.set_selected(False)
+        if self.current_view: self.current_view.hide()
+        if self.grid is None:
+            # tiles share the symbols' models (and streams) with any cached views
+            self.grid = SymbolGrid(self.content_area, DEFAULT_SYMBOLS + GRID_EXTRA_SYMBOLS, self.hub, self.scheduler,
+                                   market=self.market, on_open=self.change_symbol, visibility=self.visibility)
+        self.grid.set_layout(*GRID_LAYOUTS[name])
+        self.grid.show()
+
+    def close_grid(self):
+        if self.grid is None: return
+        self.grid.destroy()
+        self.grid = None
+
     def change_symbol(self, symbol: str):
-        if self.current_symbol == symbol: return
+        if self.current_symbol == symbol and self.grid is None: return
+        self.close_grid()   # a nav button or tile click leaves grid mode
 
         self.current_symbol = symbol
         for sym, btn in self.nav_buttons.items():
             btn.set_selected(sym == symbol)
+        for name, btn in self.layout_buttons.items():
+            btn.set_selected(name == "Single")
 
-        self.stop_current_panels()
-        for widget in self.content_area.winfo_children():
-            widget.destroy()
+        if self.current_view: self.current_view.hide()
+        view = self.views.pop(symbol, None) or self.build_dashboard_ui(symbol)
+        self.views[symbol] = view   # mark most recently used
 
-        self.build_dashboard_ui(symbol)
+        self.current_view = view
+        self.stats, self.orderbook, self.kline, self.heatmap, self.mid_frame = view.stats, view.orderbook, view.kline, view.heatmap, view.mid_frame
+        self.refresh_mid_layout()
+        view.show()
+        self.evict_views()
+
+    def evict_views(self):
+        """Drop least recently used views beyond VIEW_CACHE_SIZE or while RSS exceeds VIEW_CACHE_MAX_MB."""
+        while len(self.views) > 1:
+            over_size = len(self.views) > VIEW_CACHE_SIZE
+            if not over_size and rss_mb() <= VIEW_CACHE_MAX_MB: break
+            symbol, view = next(iter(self.views.items()))
+            if view is self.current_view: break
+            del self.views[symbol]
+            for p in view.panels(): self.visibility.unregister(p)
+            view.destroy()
 
     def stop_current_panels(self):
-        if self.stats: self.stats.stop()
-        if self.orderbook: self.orderbook.stop()
-        if self.kline: self.kline.stop()
+        for view in self.views.values(): view.stop()
+
+    def build_dashboard_ui(self, symbol: str) -> SymbolView:
+        view = SymbolView(self.content_area, symbol)
 
-    def build_dashboard_ui(self, symbol: str):
         # 1. Header
-        header = HeaderBar(self.content_area, title=f'{symbol} Dashboard')
-        header.pack(fill=tk.X)
+        streams = [ticker_stream(symbol), book_ticker_stream(symbol), depth_stream(symbol, fast_100ms=True),
+                   base_stream(symbol) if KLINE_INTERVAL_DEFAULT in AGG_INTERVALS else kline_stream(symbol, KLINE_INTERVAL_DEFAULT),
+                   agg_trade_stream(symbol)]
+        view.header = HeaderBar(view.frame, title=f'{symbol} Dashboard', streams=streams)
+        view.header.pack(fill=tk.X)
 
         # 2. Controls Toolbar 
-        controls = tk.Frame(self.content_area, bg=BG_DARK)
+        controls = tk.Frame(view.frame, bg=BG_DARK)
         controls.pack(fill=tk.X, padx=10, pady=(0, 5))
         
         self.create_toggle_button(controls, "Hide/Show Candle Chart", self.show_chart_var)
         self.create_toggle_button(controls, "Hide/Show Order Book (Top 20)", self.show_book_var)
+        self.create_toggle_button(controls, "Hide/Show Liquidity Heatmap", self.show_heatmap_var)
 
         # 3. Stats Cards 
-        self.stats = StatsPanel(self.content_area, symbol=symbol)
-        self.stats.pack(fill=tk.X, padx=8, pady=(0, 8))
-        self.stats.start()
+        view.stats = StatsPanel(view.frame, symbol=symbol, hub=self.hub, scheduler=self.scheduler)
+        view.stats.pack(fill=tk.X, padx=8, pady=(0, 8))
+        view.stats.start()
 
         # 4. Middle Section
-        self.mid_frame = ttk.Frame(self.content_area, style='TFrame')
-        self.mid_frame.pack(fill=tk.BOTH, expand=True, padx=8, pady=(0, 8))
+        view.mid_frame = ttk.Frame(view.frame, style='TFrame')
+        view.mid_frame.pack(fill=tk.BOTH, expand=True, padx=8, pady=(0, 8))
 
-        self.orderbook = OrderBookPanel(self.mid_frame, symbol, limit=ORDERBOOK_DEFAULT_LEVELS)
-        self.orderbook.start()
+        view.orderbook = OrderBookPanel(view.mid_frame, symbol, self.hub, self.scheduler, limit=ORDERBOOK_DEFAULT_LEVELS)
+        view.orderbook.start()
 
-        self.kline = KlinePanel(self.mid_frame, symbol, interval=KLINE_INTERVAL_DEFAULT, limit=KLINE_LIMIT_DEFAULT)
-        self.kline.start()
+        view.kline = KlinePanel(view.mid_frame, symbol, self.hub, self.scheduler, interval=KLINE_INTERVAL_DEFAULT, limit=KLINE_LIMIT_DEFAULT)
+        view.kline.start()
 
-        self.refresh_mid_layout()
+        view.heatmap = HeatmapPanel(view.mid_frame, symbol, self.scheduler)
+        view.heatmap.start()
+        for p in view.panels(): self.visibility.register(p, p.frame)
+        return view
 
     def create_toggle_button(self, parent, text, variable):
         cb = ttk.Checkbutton(
@@ -244,26 +368,32 @@ class DashboardApp:
         cb.pack(side=tk.LEFT, padx=(0, 15))
 
     def refresh_mid_layout(self):
-        self.orderbook.frame.pack_forget()
-        self.kline.frame.pack_forget()
-
-        show_ob = self.show_book_var.get()
-        show_chart = self.show_chart_var.get()
-
-        if show_ob and show_chart:
-            self.orderbook.frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 8))
-            self.kline.frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        elif show_ob and not show_chart:
-            self.orderbook.frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        elif not show_ob and show_chart:
-            self.kline.frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        panels = ((self.show_book_var, self.orderbook), (self.show_chart_var, self.kline), (self.show_heatmap_var, self.heatmap))
+        for _, panel in panels: panel.frame.pack_forget()
+        shown = [panel for var, panel in panels if var.get()]
+        for i, panel in enumerate(shown):
+            panel.frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 8) if i < len(shown) - 1 else 0)
+
+    def _metrics_tick(self):
+        metrics.update_rates()
+        if self.current_view and self.grid is None and not self.visibility.minimized: self.current_view.header.refresh(self.hub.connected)
+        if METRICS_EXPORT_PATH: metrics.write_json(METRICS_EXPORT_PATH)
+        self._metrics_job = self.root.after(int(METRICS_REFRESH_SEC * 1000), self._metrics_tick)
 
     def on_closing(self):
+        self.root.after_cancel(self._metrics_job)
         self.stop_current_panels()
+        if self.grid: self.grid.stop()
         for tw in self.ticker_widgets:
             tw.stop_stream()
+        if self.market: self.market.stop()
         for btn in self.nav_buttons.values():
             btn.stop_stream()
+        self.hub.stop()
+        self.scheduler.stop()
+        shutdown_pool()
+        metrics.close()
+        if recorder: recorder.close()
         self.root.destroy()
 
 if __name__ == '__main__':
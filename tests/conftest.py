@@ -0,0 +1,49 @@
+"""Shared fixtures: a StreamHub stand-in and deferred REST loads."""
+from typing import Callable, Dict, List
+
+import pytest
+
+
+class FakeHub:
+    """StreamHub's subscribe API; tests call `send(stream, payload)` to dispatch a decoded message."""
+    connected = True
+
+    def __init__(self):
+        self.consumers: Dict[str, List[Callable]] = {}
+
+    def subscribe(self, stream: str, callback: Callable):
+        self.consumers.setdefault(stream, []).append(callback)
+
+    def unsubscribe(self, stream: str, callback: Callable):
+        cbs = self.consumers.get(stream)
+        if cbs and callback in cbs: cbs.remove(callback)
+
+    def count(self, stream: str) -> int:
+        return len(self.consumers.get(stream, ()))
+
+    def send(self, stream: str, payload):
+        for cb in list(self.consumers.get(stream, ())): cb(payload)
+
+
+@pytest.fixture
+def hub():
+    return FakeHub()
+
+
+class Loads:
+    """load_async stand-in: jobs queue up until the test runs them (or answers them itself)."""
+    def __init__(self):
+        self.jobs = []
+
+    def __call__(self, fn, *args, on_done=None):
+        self.jobs.append((fn, args, on_done))
+
+    def answer(self, result):
+        """Complete the oldest job with `result` instead of running it."""
+        _, _, on_done = self.jobs.pop(0)
+        if on_done: on_done(result)
+
+
+@pytest.fixture
+def loads():
+    return Loads()
@@ -0,0 +1,191 @@
+"""Higher-timeframe candles built by utils/aggregator.py from kline_1m and from aggTrade."""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from config import agg_trade_stream, kline_stream
+from utils import aggregator
+from utils.aggregator import CandleAggregator
+from utils.decode import AggTrade, Kline
+
+T0 = 1_700_000_100.0 - 1_700_000_100.0 % 900   # 15 min aligned start (seconds)
+MIN = 60.0
+
+
+def kline(minute: int, o, h, l, c, v, bv, closed=True) -> Kline:
+    t = int((T0 + minute * MIN) * 1000)
+    return Kline(t + 100, 'BTCUSDT', t, t + 59_999, '1m', o, h, l, c, v, v * 2, bv, 10, closed)
+
+
+def trade(agg_id: int, sec: float, price: float, qty: float, buyer_maker: bool = False) -> AggTrade:
+    t = int((T0 + sec) * 1000)
+    return AggTrade(t, 'BTCUSDT', agg_id, price, qty, t, buyer_maker)
+
+
+def minute_rows(n: int, seed: int = 0) -> np.ndarray:
+    """(n, 7) random 1m candles t, o, h, l, c, v, bv from T0."""
+    rng = np.random.default_rng(seed)
+    o = 100 + rng.normal(0, 1, n); c = o + rng.normal(0, 1, n)
+    h = np.maximum(o, c) + rng.uniform(0, 1, n); l = np.minimum(o, c) - rng.uniform(0, 1, n)
+    v = rng.uniform(1, 5, n); bv = v * rng.uniform(0, 1, n)
+    return np.column_stack([T0 + np.arange(n) * MIN, o, h, l, c, v, bv])
+
+
+def expected(rows: np.ndarray):
+    """(o, h, l, c, v, bv) of 1m rows merged into one candle."""
+    return (rows[0, 1], rows[:, 2].max(), rows[:, 3].min(), rows[-1, 4], rows[:, 5].sum(), rows[:, 6].sum())
+
+
+def ohlcv(c):
+    return (c.open, c.high, c.low, c.close, c.volume, c.taker_buy_volume)
+
+
+@pytest.fixture
+def make(hub, loads, monkeypatch):
+    """CandleAggregator with its seed load deferred to `loads`; `got` collects emitted candles."""
+    monkeypatch.setattr(aggregator, 'load_async', loads)
+    def make(source='kline', intervals=('1m', '5m', '15m')):
+        agg = CandleAggregator('BTCUSDT', hub, intervals=intervals, source=source)
+        got = []
+        agg.subscribe(got.append)
+        return agg, got
+    return make
+
+
+def closed(got, interval):
+    return [c for c in got if c.closed and c.interval == interval]
+
+
+def feed_minutes(hub, rows, skip=()):
+    """Stream each 1m row as a forming update (with provisional values), then its closed candle."""
+    for i, r in enumerate(rows):
+        if i in skip: continue
+        m = int(round((r[0] - T0) / MIN))
+        hub.send(kline_stream('BTCUSDT', '1m'), kline(m, r[1], r[1], r[1], r[1], r[5] / 2, r[6] / 2, closed=False))
+        hub.send(kline_stream('BTCUSDT', '1m'), kline(m, *r[1:], closed=True))
+
+
+# ----- kline_1m source -----
+def test_no_listener_output_before_seed(make, hub, loads):
+    agg, got = make()
+    rows = minute_rows(2)
+    feed_minutes(hub, rows)
+    assert got == [] and not agg.ready
+    loads.answer(None)   # no history: candles start with the stream
+    assert agg.ready and got[-1].interval == '15m'
+
+
+def test_kline_rollover_builds_complete_candles(make, hub, loads):
+    agg, got = make()
+    loads.answer(None)
+    rows = minute_rows(16)
+    feed_minutes(hub, rows[:15])
+    hub.send(kline_stream('BTCUSDT', '1m'), kline(15, *rows[15, 1:], closed=False))   # opens the next buckets
+
+    five = closed(got, '5m')
+    assert [c.time for c in five] == [T0, T0 + 300, T0 + 600]
+    for i, c in enumerate(five):
+        assert c.complete
+        np.testing.assert_allclose(ohlcv(c), expected(rows[i * 5:(i + 1) * 5]))
+    fifteen = closed(got, '15m')
+    assert len(fifteen) == 1 and fifteen[0].complete
+    np.testing.assert_allclose(ohlcv(fifteen[0]), expected(rows[:15]))
+    # the forming minute shows in the open candles right away
+    cur = agg.current('5m')
+    assert cur.time == T0 + 900 and not cur.closed
+    np.testing.assert_allclose(ohlcv(cur), expected(rows[15:16]))
+    assert len(closed(got, '1m')) == 15
+
+
+def test_missing_minute_makes_candle_incomplete(make, hub, loads):
+    agg, got = make(intervals=('5m',))
+    loads.answer(None)
+    rows = minute_rows(11)
+    feed_minutes(hub, rows, skip={7})
+    five = closed(got, '5m')
+    assert [c.complete for c in five] == [True, False]
+    np.testing.assert_allclose(ohlcv(five[1]), expected(rows[[5, 6, 8, 9]]))
+
+
+def test_missed_final_update_is_folded(make, hub, loads):
+    agg, got = make(intervals=('5m',))
+    loads.answer(None)
+    rows = minute_rows(6)
+    for m in range(5):   # only forming updates, never closed=True
+        hub.send(kline_stream('BTCUSDT', '1m'), kline(m, *rows[m, 1:], closed=False))
+    hub.send(kline_stream('BTCUSDT', '1m'), kline(5, *rows[5, 1:], closed=False))
+    (five,) = closed(got, '5m')
+    assert five.complete
+    np.testing.assert_allclose(ohlcv(five), expected(rows[:5]))
+
+
+def test_late_revision_of_older_minute_is_ignored(make, hub, loads):
+    agg, got = make(intervals=('5m',))
+    loads.answer(None)
+    rows = minute_rows(3)
+    feed_minutes(hub, rows[:2])
+    hub.send(kline_stream('BTCUSDT', '1m'), kline(2, *rows[2, 1:], closed=False))
+    hub.send(kline_stream('BTCUSDT', '1m'), kline(1, 1e6, 1e6, 1e6, 1e6, 1e6, 0, closed=False))
+    np.testing.assert_allclose(ohlcv(agg.current('5m')), expected(rows[:3]))
+
+
+def test_seed_fills_the_minutes_before_start(make, hub, loads, monkeypatch):
+    monkeypatch.setattr(aggregator, 'time', SimpleNamespace(time=lambda: T0 + 3 * MIN + 30))
+    agg, got = make(intervals=('5m', '15m'))
+    rows = minute_rows(6)
+    hub.send(kline_stream('BTCUSDT', '1m'), kline(3, *rows[3, 1:], closed=False))   # before the seed lands
+    loads.answer(rows[:4])        # the store holds minutes 0..3 (3 is also still forming on the stream)
+    np.testing.assert_allclose(ohlcv(agg.current('5m')), expected(rows[:4]))
+    feed_minutes(hub, rows[3:5])
+    hub.send(kline_stream('BTCUSDT', '1m'), kline(5, *rows[5, 1:], closed=False))
+    (five,) = closed(got, '5m')
+    assert five.complete and five.time == T0
+    np.testing.assert_allclose(ohlcv(five), expected(rows[:5]))
+    np.testing.assert_allclose(ohlcv(agg.current('15m')), expected(rows[:6]))
+
+
+def test_late_subscriber_gets_open_candles(make, hub, loads):
+    agg, got = make()
+    loads.answer(None)
+    feed_minutes(hub, minute_rows(2))
+    late = []
+    agg.subscribe(late.append)
+    assert [c.interval for c in late] == ['1m', '5m', '15m'] and not any(c.closed for c in late)
+    assert len(loads.jobs) == 0 and hub.count(kline_stream('BTCUSDT', '1m')) == 1
+
+
+def test_last_unsubscribe_releases_stream(make, hub, loads):
+    agg, got = make()
+    loads.answer(None)
+    agg.unsubscribe(got.append)
+    assert hub.count(kline_stream('BTCUSDT', '1m')) == 0 and not agg.ready and agg.current('5m') is None
+
+
+# ----- aggTrade source -----
+def test_trades_build_candles_with_taker_buy_volume(make, hub, loads):
+    agg, got = make(source='aggTrade', intervals=('1m', '5m'))
+    loads.answer(None)
+    s = agg_trade_stream('BTCUSDT')
+    trades = [trade(1, 10, 100.0, 1.0), trade(2, 70, 102.0, 2.0, buyer_maker=True), trade(3, 200, 99.0, 0.5),
+              trade(4, 290, 101.0, 1.5),   # first 5m bucket
+              trade(5, 310, 101.5, 1.0), trade(6, 599, 98.0, 3.0, buyer_maker=True),   # second
+              trade(7, 605, 100.0, 1.0)]
+    for a in trades: hub.send(s, a)
+    five = closed(got, '5m')
+    assert [c.time for c in five] == [T0, T0 + 300]
+    assert ohlcv(five[0]) == (100.0, 102.0, 99.0, 101.0, 5.0, 3.0)
+    assert ohlcv(five[1]) == (101.5, 101.5, 98.0, 98.0, 4.0, 1.0)
+    # the first bucket was already open when streaming began; the second saw every trade
+    assert [c.complete for c in five] == [False, True]
+    assert [c.time for c in closed(got, '1m')][:3] == [T0, T0 + 60, T0 + 180]
+
+
+def test_trade_id_gap_makes_candle_incomplete(make, hub, loads):
+    agg, got = make(source='aggTrade', intervals=('5m',))
+    loads.answer(None)
+    s = agg_trade_stream('BTCUSDT')
+    for a in (trade(1, 10, 100, 1), trade(2, 310, 100, 1), trade(4, 400, 100, 1),   # id 3 missed
+              trade(5, 610, 100, 1), trade(6, 700, 100, 1), trade(7, 910, 100, 1)):
+        hub.send(s, a)
+    assert [c.complete for c in closed(got, '5m')] == [False, False, True]
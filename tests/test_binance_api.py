@@ -0,0 +1,44 @@
+"""BinanceRestClient (utils/binance_api.py) argument defaults and cache sharing, against a fake session."""
+import pytest
+
+from utils.binance_api import BinanceRestClient
+
+
+class FakeResponse:
+    status_code = 200
+    headers = {}
+    content = b'[]'
+
+    def __init__(self, payload): self.payload = payload
+    def raise_for_status(self): pass
+    def json(self): return self.payload
+
+
+class FakeSession:
+    def __init__(self): self.calls = []
+
+    def get(self, url, params=None, timeout=None):
+        self.calls.append(timeout)
+        return FakeResponse([[len(self.calls)]])
+
+
+@pytest.fixture
+def client():
+    c = BinanceRestClient(base='http://test', retries=3, timeout=7)
+    c.session = FakeSession(); c.recorder = None
+    return c
+
+
+def test_none_uses_the_client_defaults(client):
+    assert client.get('/x') == [[1]]
+    assert client.session.calls == [7]
+
+
+def test_explicit_zero_is_not_the_default(client):
+    assert client.get('/x', timeout=0) == [[1]] and client.session.calls == [0]
+    assert client.get('/y', retries=0) is None and len(client.session.calls) == 1   # no attempt made
+
+
+def test_cache_hits_share_the_result(client):
+    first = client.get('/x', ttl=60)
+    assert client.get('/x', ttl=60) is first and len(client.session.calls) == 1
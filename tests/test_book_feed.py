@@ -0,0 +1,75 @@
+"""Shared per-symbol order book (utils/book_feed.py)."""
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+from config import depth_stream
+from utils import local_book
+from utils.book_feed import BookFeed
+from utils.decode import DepthUpdate
+
+STREAM = depth_stream('BTCUSDT', fast_100ms=True)
+
+
+def ev(first, last, bids=(), asks=()):
+    return DepthUpdate(1_700_000_000_000, 'BTCUSDT', first, last,
+                       np.array(bids, dtype=float).reshape(-1, 2), np.array(asks, dtype=float).reshape(-1, 2))
+
+
+SNAP = {'lastUpdateId': 100, 'bids': [['100', '2'], ['99', '1']], 'asks': [['101', '1'], ['102', '3']]}
+
+
+@pytest.fixture
+def feed(hub, loads, monkeypatch):
+    monkeypatch.setattr(local_book, 'load_async', loads)
+    f = BookFeed('BTCUSDT', hub)
+    yield f
+    f.analytics.clear(); f.heatmap.reset()
+
+
+def test_one_subscription_and_late_joiner(feed, hub, loads):
+    a, b = [], []
+    feed.subscribe(lambda *d: a.append(d))
+    hub.send(STREAM, ev(100, 101, bids=[(100.5, 1)]))
+    loads.answer(SNAP)                       # synced on the loader thread: listeners hear about it
+    assert feed.synced and len(a) == 1 and a[0][0].tolist() == [100.5, 100, 99]
+    feed.subscribe(lambda *d: b.append(d))   # late joiner gets the current book right away
+    assert hub.count(STREAM) == 1 and len(b) == 1
+    hub.send(STREAM, ev(102, 102, asks=[(101, 0)]))
+    assert a[-1][2].tolist() == b[-1][2].tolist() == [102]
+    assert feed.analytics.latest is not None
+
+
+def test_last_unsubscribe_closes_book_and_clears_models(feed, hub, loads):
+    fn = lambda *d: None
+    feed.subscribe(fn)
+    hub.send(STREAM, ev(100, 101))
+    loads.answer(SNAP)
+    assert feed.analytics.latest is not None and feed.heatmap.col is not None
+    feed.unsubscribe(fn)
+    assert hub.count(STREAM) == 0 and feed.book is None and not feed.synced
+    assert feed.analytics.latest is None and feed.heatmap.col is None and feed.depth() is None
+
+
+def test_changes_from_two_threads_are_serialized(feed, hub, loads, monkeypatch):
+    """The loader thread's on_synced and the stream thread's events must never run _on_change at once."""
+    feed.subscribe(lambda *d: None)
+    hub.send(STREAM, ev(100, 101))
+    loads.answer(SNAP)
+    inside, overlaps = [0], [0]
+    update = feed.analytics.update
+    def guarded(*depth):
+        inside[0] += 1
+        if inside[0] > 1: overlaps[0] += 1
+        try: return update(*depth)
+        finally: inside[0] -= 1
+    monkeypatch.setattr(feed.analytics, 'update', guarded)
+    old = sys.getswitchinterval(); sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=lambda: [feed._on_change() for _ in range(300)]) for _ in range(2)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+    finally: sys.setswitchinterval(old)
+    assert overlaps[0] == 0
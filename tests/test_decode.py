@@ -0,0 +1,100 @@
+"""Typed stream decoding (utils/decode.py): every available backend yields the same structs."""
+import json
+
+import numpy as np
+import pytest
+
+from utils import decode
+from utils.decode import AggTrade, BookTicker, DepthUpdate, Kline, Ticker
+
+MESSAGES = {
+    'btcusdt@ticker': {
+        'e': '24hrTicker', 'E': 1700000000123, 's': 'BTCUSDT', 'p': '-12.50', 'P': '-0.030', 'w': '42100.1',
+        'x': '42012.5', 'c': '42000.10', 'Q': '0.1', 'b': '42000.00', 'B': '1.5', 'a': '42000.20', 'A': '2.5',
+        'o': '42012.60', 'h': '42500.00', 'l': '41000.00', 'v': '1234.5', 'q': '51234567.8',
+        'O': 1699913600123, 'C': 1700000000123, 'F': 1, 'L': 100, 'n': 100},
+    'btcusdt@bookTicker': {'u': 400900217, 's': 'BTCUSDT', 'b': '25.35190000', 'B': '31.21000000',
+                           'a': '25.36520000', 'A': '40.66000000'},
+    'btcusdt@depth@100ms': {'e': 'depthUpdate', 'E': 1700000000123, 's': 'BTCUSDT', 'U': 157, 'u': 160,
+                            'b': [['0.0024', '10'], ['0.0023', '0']], 'a': [['0.0026', '100']]},
+    'ethusdt@depth': {'e': 'depthUpdate', 'E': 1700000000456, 's': 'ETHUSDT', 'U': 5, 'u': 5, 'b': [], 'a': []},
+    'btcusdt@kline_1m': {
+        'e': 'kline', 'E': 1700000000123, 's': 'BTCUSDT',
+        'k': {'t': 1699999980000, 'T': 1700000039999, 's': 'BTCUSDT', 'i': '1m', 'f': 100, 'L': 200,
+              'o': '0.0010', 'c': '0.0020', 'h': '0.0025', 'l': '0.0015', 'v': '1000', 'n': 100, 'x': False,
+              'q': '1.0000', 'V': '500', 'Q': '0.500', 'B': '123456'}},
+    'btcusdt@aggTrade': {'e': 'aggTrade', 'E': 1700000000123, 's': 'BTCUSDT', 'a': 26129, 'p': '0.01633102',
+                         'q': '4.70443515', 'f': 27781, 'l': 27781, 'T': 1498793709153, 'm': True, 'M': True},
+}
+
+EXPECTED = {
+    'btcusdt@ticker': Ticker(1700000000123, 'BTCUSDT', 42000.10, -12.5, -0.03, 42012.6, 42500.0, 41000.0, 1234.5, 51234567.8),
+    'btcusdt@bookTicker': BookTicker(400900217, 'BTCUSDT', 25.3519, 31.21, 25.3652, 40.66),
+    'btcusdt@kline_1m': Kline(1700000000123, 'BTCUSDT', 1699999980000, 1700000039999, '1m',
+                              0.001, 0.0025, 0.0015, 0.002, 1000.0, 1.0, 500.0, 100, False),
+    'btcusdt@aggTrade': AggTrade(1700000000123, 'BTCUSDT', 26129, 0.01633102, 4.70443515, 1498793709153, True),
+}
+
+BACKENDS = ['json'] + [name for name, mod in (('orjson', decode.orjson), ('msgspec', decode.msgspec)) if mod is not None]
+
+
+def raw(stream: str, data) -> bytes:
+    return json.dumps({'stream': stream, 'data': data}).encode()
+
+
+def assert_same_struct(a, b):
+    assert type(a) is type(b)
+    for field, x, y in zip(a._fields, a, b):
+        if isinstance(x, np.ndarray):
+            assert x.dtype == y.dtype == np.float64 and x.shape == y.shape, field
+            np.testing.assert_array_equal(x, y)
+        else:
+            assert type(x) is type(y) and x == y, field
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('stream', list(MESSAGES))
+def test_backends_agree(backend, stream):
+    """Each backend's struct equals the stdlib json one, field by field (types included)."""
+    got_stream, got = decode.make_decoder(backend)(raw(stream, MESSAGES[stream]))
+    ref_stream, ref = decode.make_decoder('json')(raw(stream, MESSAGES[stream]))
+    assert got_stream == ref_stream == stream
+    assert_same_struct(got, ref)
+    if stream in EXPECTED: assert_same_struct(got, EXPECTED[stream])
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_depth_levels(backend):
+    _, d = decode.make_decoder(backend)(raw('btcusdt@depth@100ms', MESSAGES['btcusdt@depth@100ms']))
+    assert isinstance(d, DepthUpdate) and (d.first_id, d.last_id) == (157, 160)
+    np.testing.assert_array_equal(d.bids, [[0.0024, 10.0], [0.0023, 0.0]])
+    np.testing.assert_array_equal(d.asks, [[0.0026, 100.0]])
+    _, empty = decode.make_decoder(backend)(raw('ethusdt@depth', MESSAGES['ethusdt@depth']))
+    assert empty.bids.shape == empty.asks.shape == (0, 2)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_untyped_streams_and_control_replies(backend):
+    dec = decode.make_decoder(backend)
+    arr = [{'e': '24hrMiniTicker', 'E': 1, 's': 'BTCUSDT', 'c': '1.0'}]
+    assert dec(raw('!miniTicker@arr', arr)) == ('!miniTicker@arr', arr)
+    assert dec(b'{"result": null, "id": 1}') == (None, None)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_numbers_sent_as_numbers(backend):
+    """Converters also accept numeric JSON where Binance usually sends strings."""
+    data = dict(MESSAGES['btcusdt@bookTicker'], b=25.5, B=1)
+    _, b = decode.make_decoder(backend)(raw('btcusdt@bookTicker', data))
+    assert (b.bid, b.bid_qty) == (25.5, 1.0) and type(b.bid_qty) is float
+
+
+def test_kind_of():
+    assert decode.kind_of('btcusdt@depth@100ms') == 'depth'
+    assert decode.kind_of('btcusdt@kline_15m') == 'kline'
+    assert decode.kind_of('btcusdt@trade') is None and decode.kind_of('!miniTicker@arr') is None
+
+
+def test_from_dict_missing_field_raises():
+    data = dict(MESSAGES['btcusdt@aggTrade']); del data['p']
+    with pytest.raises(KeyError): decode.from_dict('aggTrade', data)
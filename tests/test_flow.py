@@ -0,0 +1,111 @@
+"""Rolling trade-flow windows (utils/flow.py), including expiry while trades pause."""
+import numpy as np
+import pytest
+
+from config import agg_trade_stream
+from utils.decode import AggTrade
+from utils.flow import RollingFlow, TradeFlow
+
+T0 = 1_700_000_000.0
+
+
+def brute(trades, now, window, bucket):
+    """Reference: trades whose bucket is one of the last window/bucket buckets ending at now's bucket."""
+    n = int(np.ceil(window / bucket)); head = int(now // bucket)
+    sel = [(p, q, m) for t, p, q, m in trades if head - n < int(t // bucket) <= head]
+    buy = sum(q for p, q, m in sel if not m); sell = sum(q for p, q, m in sel if m)
+    vol = buy + sell
+    return buy, sell, len(sel), (sum(p * q for p, q, _ in sel) / vol if vol else None)
+
+
+def check(stats, ref):
+    buy, sell, n, vwap = ref
+    assert stats.buy_volume == pytest.approx(buy, abs=1e-9) and stats.sell_volume == pytest.approx(sell, abs=1e-9)
+    assert stats.trades == n
+    if vwap is None: assert stats.vwap is None and stats.buy_ratio == 0.0
+    else: assert stats.vwap == pytest.approx(vwap) and stats.buy_ratio == pytest.approx(buy / (buy + sell))
+
+
+def test_matches_brute_force_over_random_trades():
+    rng = np.random.default_rng(5)
+    flow = RollingFlow(60, 1.0); trades = []
+    t = T0
+    for _ in range(3000):
+        t += rng.exponential(0.3) if rng.random() > 0.01 else rng.uniform(10, 90)   # occasional pauses
+        trade = (t, 100 + rng.normal(), rng.uniform(0.01, 2), bool(rng.random() < 0.4))
+        flow.add(*trade); trades.append(trade)
+        if rng.random() < 0.05: check(flow.stats(), brute(trades, t, 60, 1.0))
+    check(flow.stats(), brute(trades, t, 60, 1.0))
+
+
+def test_window_expires_while_trades_pause():
+    flow = RollingFlow(10, 1.0)
+    flow.add(T0 + 0.5, 100, 1, False)
+    flow.add(T0 + 4.2, 102, 3, True)
+    check(flow.stats(T0 + 9.9), (1, 3, 2, 101.5))
+    check(flow.stats(T0 + 10.0), (0, 3, 1, 102.0))   # bucket 0 slid out
+    check(flow.stats(T0 + 13.9), (0, 3, 1, 102.0))
+    check(flow.stats(T0 + 14.0), (0, 0, 0, None))     # quiet for a whole window: empty
+    check(flow.stats(T0 + 500), (0, 0, 0, None))
+    flow.add(T0 + 501, 90, 2, False)
+    check(flow.stats(), (2, 0, 1, 90.0))
+
+
+def test_late_trades():
+    flow = RollingFlow(10, 1.0)
+    flow.add(T0 + 20, 100, 1, False)
+    flow.add(T0 + 15.5, 101, 1, False)   # late but inside the window: counted in its bucket
+    flow.add(T0 + 5, 99, 1, False)       # already outside: dropped
+    check(flow.stats(), (2, 0, 2, 100.5))
+    check(flow.stats(T0 + 26), (1, 0, 1, 100.0))   # the late one expires with its own bucket
+
+
+def test_stats_never_move_time_backwards():
+    flow = RollingFlow(10, 1.0)
+    flow.add(T0 + 30, 100, 1, False)
+    check(flow.stats(T0), (1, 0, 1, 100.0))
+
+
+def test_totals_resummed_each_revolution():
+    flow = RollingFlow(5, 1.0)
+    t = T0
+    for i in range(2000):
+        t += 0.37; flow.add(t, 1e5 + i % 7, 0.1 + (i % 3) * 1e-7, i % 2 == 0)
+    flow.stats(t + 10)   # everything slid out
+    assert flow._tot == [0.0] * 5
+
+
+# ----- TradeFlow -----
+def agg(agg_id, sec, price, qty, buyer_maker=False) -> AggTrade:
+    t = int((T0 + sec) * 1000)
+    return AggTrade(t, 'BTCUSDT', agg_id, price, qty, t, buyer_maker)
+
+
+def test_trade_flow_windows_and_tick(hub):
+    flow = TradeFlow('BTCUSDT', hub, windows=(5, 60), bucket_sec=1.0)
+    got = []
+    flow.subscribe(got.append)
+    s = agg_trade_stream('BTCUSDT')
+    hub.send(s, agg(1, 0.5, 100, 2))
+    hub.send(s, agg(2, 3.0, 110, 1, buyer_maker=True))
+    short, long = got[-1]
+    check(short, (2, 1, 2, 310 / 3)); check(long, (2, 1, 2, 310 / 3))
+    flow.tick(T0 + 7.0)   # no trades: the short window decays, the long one keeps them
+    short, long = got[-1]
+    check(short, (0, 1, 1, 110.0)); check(long, (2, 1, 2, 310 / 3))
+    flow.tick(T0 + 2.0)   # an older event time does not rewind the windows
+    assert got[-1] == got[-2]
+
+
+def test_trade_flow_subscription_lifecycle(hub):
+    flow = TradeFlow('BTCUSDT', hub, windows=(5,), bucket_sec=1.0)
+    a, b = [], []
+    flow.subscribe(a.append); flow.subscribe(b.append)
+    s = agg_trade_stream('BTCUSDT')
+    assert hub.count(s) == 1
+    hub.send(s, agg(1, 0, 100, 1))
+    flow.unsubscribe(a.append); flow.unsubscribe(b.append)
+    assert hub.count(s) == 0
+    flow.subscribe(a.append)
+    hub.send(s, agg(2, 100, 50, 1))
+    check(a[-1][0], (1, 0, 1, 50.0))   # restarted empty, not with a hole
@@ -0,0 +1,133 @@
+"""Streaming indicators (utils/indicators.py) against their NumPy batch counterparts."""
+import numpy as np
+import pytest
+
+from utils import indicators as ind
+
+N = 600
+REVISIONS = 2   # provisional values of each forming candle before its final one
+
+
+@pytest.fixture(scope='module')
+def candles():
+    """Random-walk OHLCV as a dict of columns."""
+    rng = np.random.default_rng(42)
+    close = 100 + np.cumsum(rng.normal(0, 1, N))
+    close[50:60] = close[49]   # flat stretch: zero changes for RSI
+    high, low = close + rng.uniform(0.1, 2, N), close - rng.uniform(0.1, 2, N)
+    volume = rng.uniform(0, 10, N); volume[:3] = 0   # VWAP undefined until volume arrives
+    return {'high': high, 'low': low, 'close': close, 'volume': volume}
+
+
+def stream(indicator, cols, revise: bool, seed: int = 1):
+    """Final value per candle from indicator.update(*cols[i]); with revise, every candle is first
+    opened and revised with random provisional values (update(..., new=False)) before its final one."""
+    rng = np.random.default_rng(seed)
+    out = []
+    for row in zip(*cols):
+        if revise:
+            for r in range(REVISIONS):
+                noisy = [x + rng.normal(0, 3) for x in row]
+                indicator.update(*noisy, new=(r == 0))
+            out.append(indicator.update(*row, new=False))
+        else:
+            out.append(indicator.update(*row))
+    return out
+
+
+def as_array(values, width=None) -> np.ndarray:
+    """Streamed values with None -> NaN; tuples become `width` rows."""
+    if width is None: return np.array([np.nan if v is None else v for v in values], dtype=float)
+    return np.array([(np.nan,) * width if v is None else v for v in values], dtype=float).T
+
+
+def assert_same(streamed, batch):
+    streamed, batch = np.asarray(streamed, dtype=float), np.asarray(batch, dtype=float)
+    assert streamed.shape == batch.shape
+    np.testing.assert_array_equal(np.isnan(streamed), np.isnan(batch))   # same warm-up alignment
+    np.testing.assert_allclose(streamed, batch, rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize('revise', [False, True], ids=['append', 'revise'])
+@pytest.mark.parametrize('cls, batch, period', [
+    (ind.SMA, ind.sma_np, 20), (ind.WMA, ind.wma_np, 20), (ind.EMA, ind.ema_np, 20), (ind.RSI, ind.rsi_np, 14),
+    (ind.SMA, ind.sma_np, 1), (ind.WMA, ind.wma_np, 1), (ind.EMA, ind.ema_np, 1), (ind.RSI, ind.rsi_np, 1),
+])
+def test_close_indicators(candles, cls, batch, period, revise):
+    close = candles['close']
+    assert_same(as_array(stream(cls(period), [close], revise)), batch(close, period))
+
+
+@pytest.mark.parametrize('revise', [False, True], ids=['append', 'revise'])
+def test_bollinger(candles, revise):
+    close = candles['close']
+    assert_same(as_array(stream(ind.Bollinger(20, 2.5), [close], revise), 3), ind.bollinger_np(close, 20, 2.5))
+
+
+@pytest.mark.parametrize('revise', [False, True], ids=['append', 'revise'])
+def test_macd(candles, revise):
+    close = candles['close']
+    assert_same(as_array(stream(ind.MACD(12, 26, 9), [close], revise), 3), ind.macd_np(close, 12, 26, 9))
+
+
+@pytest.mark.parametrize('revise', [False, True], ids=['append', 'revise'])
+def test_atr(candles, revise):
+    h, l, c = candles['high'], candles['low'], candles['close']
+    assert_same(as_array(stream(ind.ATR(14), [h, l, c], revise)), ind.atr_np(h, l, c, 14))
+
+
+@pytest.mark.parametrize('revise', [False, True], ids=['append', 'revise'])
+def test_vwap(candles, revise):
+    h, l, c, v = candles['high'], candles['low'], candles['close'], candles['volume']
+    assert_same(as_array(stream(ind.VWAP(), [h, l, c, v], revise)), ind.vwap_np(h, l, c, v))
+
+
+def test_warm_up_lengths(candles):
+    close = candles['close'][:30]
+    assert np.isnan(ind.sma_np(close, 20)[:19]).all() and not np.isnan(ind.sma_np(close, 20)[19:]).any()
+    assert np.isnan(ind.rsi_np(close, 14)[:14]).all() and not np.isnan(ind.rsi_np(close, 14)[14:]).any()
+    assert not np.isnan(ind.ema_np(close, 20)).any()   # seeded with the first value
+    assert len(ind.sma_np(close[:5], 20)) == 5 and np.isnan(ind.sma_np(close[:5], 20)).all()
+
+
+@pytest.mark.parametrize('seeded', [0, 1, 5, 300])
+@pytest.mark.parametrize('cls, batch, period', [(ind.SMA, ind.sma_np, 10), (ind.WMA, ind.wma_np, 20), (ind.EMA, ind.ema_np, 20)])
+def test_seed_continues_like_the_batch_version(candles, cls, batch, period, seeded):
+    """seed(xs) takes xs[-1] as the forming candle: it can be revised, then streaming carries on."""
+    close = candles['close']
+    x = cls(period)
+    seeded_value = x.seed(close[:seeded])
+    if seeded:
+        assert_same(as_array([seeded_value]), batch(close[:seeded], period)[-1:])
+        x.update(close[seeded - 1] + 5, new=False); x.update(close[seeded - 1], new=False)
+    assert_same(as_array(stream(x, [close[seeded:]], revise=True)), batch(close, period)[seeded:])
+
+
+def test_window_sums_stay_exact_over_long_runs():
+    rng = np.random.default_rng(3)
+    x = 1e6 + np.cumsum(rng.normal(0, 1, 5 * ind._Window.RESYNC_EVERY))
+    assert_same(as_array(stream(ind.SMA(50), [x], revise=False)), ind.sma_np(x, 50))
+
+
+def test_vwap_reset_starts_a_new_session(candles):
+    v = ind.VWAP()
+    v.update(10, 10, 10, 5)
+    v.reset()
+    assert v.update(1, 1, 1, 0) is None and v.update(3, 3, 3, 2) == 3.0
+
+
+def test_invalid_period():
+    for f in (ind.SMA, ind.EMA, ind.WMA, ind.RSI, ind.ATR, ind.Bollinger):
+        with pytest.raises(ValueError): f(0)
+    with pytest.raises(ValueError): ind.sma_np([1, 2], 0)
+
+
+# ----- list API -----
+def test_ema_returns_a_list():
+    # regression: ema() used to compute its values and return None
+    out = ind.ema([1.0, 2.0, 3.0, 4.0], 3)
+    assert isinstance(out, list) and out == pytest.approx([1.0, 1.5, 2.25, 3.125])
+
+
+def test_sma_list_pads_warm_up_with_none():
+    assert ind.sma([1.0, 2.0, 3.0, 4.0], 3) == [None, None, 2.0, 3.0]
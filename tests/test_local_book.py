@@ -0,0 +1,139 @@
+"""Snapshot + diff sync of utils/local_book.py, with the REST snapshot stubbed out."""
+import numpy as np
+import pytest
+
+from utils import local_book
+from utils.decode import DepthUpdate
+from utils.local_book import BookSide, LocalOrderBook
+
+
+def ev(first: int, last: int, bids=(), asks=()) -> DepthUpdate:
+    return DepthUpdate(0, 'BTCUSDT', first, last, np.array(bids, dtype=float).reshape(-1, 2),
+                       np.array(asks, dtype=float).reshape(-1, 2))
+
+
+def snap(last_id: int, bids=((100.0, 1.0),), asks=((101.0, 1.0),)) -> dict:
+    return {'lastUpdateId': last_id, 'bids': [list(b) for b in bids], 'asks': [list(a) for a in asks]}
+
+
+@pytest.fixture
+def fetches(monkeypatch):
+    """Snapshot requests the book made, answered by the test with `fetches.pop(0)(snapshot)`."""
+    pending = []
+    monkeypatch.setattr(local_book, 'load_async', lambda fn, *args, on_done=None: pending.append(on_done))
+    return pending
+
+
+def test_buffered_events_up_to_snapshot_are_dropped(fetches):
+    synced = []
+    book = LocalOrderBook('BTCUSDT', on_synced=lambda: synced.append(True))
+    book.on_event(ev(90, 95, bids=[(99.0, 5.0)]))       # older than the snapshot: dropped
+    book.on_event(ev(96, 102, bids=[(100.0, 2.0)]))     # straddles it: applied
+    book.on_event(ev(103, 105, asks=[(101.0, 0.0), (102.0, 3.0)]))
+    assert len(fetches) == 1 and not book.synced
+    fetches.pop(0)(snap(100))
+    assert book.synced and book.last_update_id == 105 and synced == [True]
+    assert book.top(5) == ([(100.0, 2.0)], [(102.0, 3.0)])
+    assert not fetches
+
+
+def test_snapshot_older_than_buffer_is_refetched(fetches):
+    book = LocalOrderBook('BTCUSDT')
+    book.on_event(ev(200, 210, bids=[(100.0, 4.0)]))
+    fetches.pop(0)(snap(150))
+    assert not book.synced and len(fetches) == 1   # asked again, buffer kept
+    book.on_event(ev(211, 212, asks=[(101.0, 7.0)]))
+    fetches.pop(0)(snap(205))
+    assert book.synced and book.last_update_id == 212
+    assert book.top(1) == ([(100.0, 4.0)], [(101.0, 7.0)])
+
+
+def test_gap_inside_buffer_resyncs(fetches):
+    book = LocalOrderBook('BTCUSDT')
+    book.on_event(ev(99, 102, bids=[(100.0, 2.0)]))
+    book.on_event(ev(110, 112, bids=[(100.0, 9.0)]))    # 103..109 missing
+    fetches.pop(0)(snap(100))
+    assert not book.synced and len(fetches) == 1
+    assert [e.first_id for e in book._buffer] == [110]   # the rest waits for the next snapshot
+    fetches.pop(0)(snap(111))
+    assert book.synced and book.last_update_id == 112 and book.top(1)[0] == [(100.0, 9.0)]
+
+
+def test_gap_after_sync_resyncs(fetches):
+    book = LocalOrderBook('BTCUSDT')
+    book.on_event(ev(100, 101))
+    fetches.pop(0)(snap(100))
+    assert book.on_event(ev(102, 103, bids=[(100.0, 3.0)])) is True
+    assert book.on_event(ev(103, 103)) is False          # already applied
+    assert book.on_event(ev(105, 106, bids=[(100.0, 8.0)])) is False   # 104 missing
+    assert not book.synced and len(fetches) == 1
+    assert book.on_event(ev(107, 107)) is False          # buffered until the new snapshot
+    fetches.pop(0)(snap(106, bids=((100.0, 8.0),)))
+    assert book.synced and book.last_update_id == 107
+
+
+def test_closed_book_ignores_events_and_snapshots(fetches):
+    book = LocalOrderBook('BTCUSDT')
+    book.on_event(ev(101, 101))
+    book.close()
+    fetches.pop(0)(snap(100))
+    assert not book.synced and book.on_event(ev(102, 102)) is False and not fetches
+
+
+def test_failed_snapshot_retries_on_next_event(fetches):
+    book = LocalOrderBook('BTCUSDT')
+    book.on_event(ev(100, 101))
+    fetches.pop(0)(None)
+    assert not book.synced and not fetches
+    book.on_event(ev(102, 102))
+    fetches.pop(0)(snap(100))
+    assert book.synced and book.last_update_id == 102
+
+
+def test_snapshot_must_reach_first_buffered_event(fetches):
+    # Binance: refetch while the snapshot's lastUpdateId is below the first buffered U
+    book = LocalOrderBook('BTCUSDT')
+    book.on_event(ev(101, 101))
+    fetches.pop(0)(snap(100))
+    assert not book.synced and len(fetches) == 1
+
+
+# ----- BookSide -----
+def side(descending: bool, levels) -> BookSide:
+    s = BookSide(descending); s.load(np.array(levels, dtype=float).reshape(-1, 2)); return s
+
+
+def test_bookside_orders_best_first():
+    bids = side(True, [(99, 1), (101, 2), (100, 0), (98, 3)])   # qty 0 in a snapshot is skipped
+    asks = side(False, [(103, 1), (101, 2), (102, 3)])
+    assert bids.top(10) == [(101.0, 2.0), (99.0, 1.0), (98.0, 3.0)]
+    assert asks.top(2) == [(101.0, 2.0), (102.0, 3.0)] and asks.best() == (101.0, 2.0)
+
+
+def test_bookside_update_insert_change_remove():
+    bids = side(True, [(100, 1), (99, 1), (98, 1)])
+    bids.update(np.array([[101, 5], [100, 2], [99, 0], [97.5, 4]], dtype=float))
+    assert bids.top(10) == [(101.0, 5.0), (100.0, 2.0), (98.0, 1.0), (97.5, 4.0)]
+    bids.update(np.array([[50, 0]], dtype=float))   # removing a missing level is a no-op
+    assert len(bids) == 4
+
+
+def test_bookside_unsorted_update_last_change_wins():
+    asks = side(False, [(101, 1), (102, 1)])
+    asks.update(np.array([[103, 1], [101, 4], [103, 0], [101, 6], [100, 2]], dtype=float))
+    assert asks.top(10) == [(100.0, 2.0), (101.0, 6.0), (102.0, 1.0)]
+    asks.update(np.array([[102, 0], [100, 3], [102, 9]], dtype=float))
+    assert asks.top(10) == [(100.0, 3.0), (101.0, 6.0), (102.0, 9.0)]
+
+
+def test_bookside_matches_dict_reference():
+    rng = np.random.default_rng(7)
+    bids = BookSide(descending=True); ref = {}
+    for _ in range(300):
+        k = rng.integers(1, 12)
+        changes = np.column_stack([rng.integers(900, 1000, k) / 10, rng.choice([0, 0, 1, 2.5, 7], k)])
+        bids.update(changes)
+        for p, q in changes:
+            if q: ref[p] = q
+            else: ref.pop(p, None)
+    assert bids.top(1000) == sorted(ref.items(), reverse=True)
@@ -0,0 +1,9 @@
+"""Package exports stay in step with the modules on disk."""
+import pkgutil
+
+import utils
+
+
+def test_utils_all_lists_every_module():
+    modules = {m.name for m in pkgutil.iter_modules(utils.__path__)}
+    assert sorted(utils.__all__) == sorted(modules)
@@ -0,0 +1,11 @@
+"""Frames handed from the render workers to Tk (components/render_pool.py)."""
+import numpy as np
+
+from components.render_pool import ppm_frame
+
+
+def test_ppm_frame_is_binary_p6_without_alpha():
+    rgba = np.arange(2 * 3 * 4, dtype=np.uint8).reshape(2, 3, 4)
+    header, body = ppm_frame(3, 2, rgba.tobytes()).split(b'\n', 1)
+    assert header.split() == [b'P6', b'3', b'2', b'255']
+    np.testing.assert_array_equal(np.frombuffer(body, dtype=np.uint8).reshape(2, 3, 3), rgba[:, :, :3])
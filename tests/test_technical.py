@@ -0,0 +1,48 @@
+"""Technical chart drawing (components/technical.py) on an Agg canvas, as the render workers use it."""
+import numpy as np
+import pytest
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from components.technical import IndicatorWindow, plot_technical, technical_figure
+from utils.indicators import ema_np, sma_np
+
+
+def test_redraws_keep_title_labels_and_status_text():
+    fig, ax = technical_figure()
+    ax.set_title('BTCUSDT Price with SMA/EMA'); ax.set_xlabel('Candle')
+    status = ax.text(0.5, 0.5, 'Loading...', transform=ax.transAxes)
+    canvas = FigureCanvasAgg(fig)
+    closes = 100 + np.cumsum(np.random.default_rng(5).normal(0, 1, 40))
+    for n in (30, 40):
+        plot_technical(ax, closes[:n]); canvas.draw()
+
+    assert ax.get_title() == 'BTCUSDT Price with SMA/EMA' and ax.get_xlabel() == 'Candle'
+    assert status.axes is ax and status in ax.texts   # _set_status after a draw still shows up
+    assert [t.get_text() for t in ax.get_legend().get_texts()] == ['Close', 'SMA(10)', 'EMA(20)']
+    close, sma, ema = ax.lines
+    np.testing.assert_array_equal(close.get_ydata(), closes)
+    np.testing.assert_allclose(sma.get_ydata(), sma_np(closes, 10))
+    np.testing.assert_allclose(ema.get_ydata(), ema_np(closes, 20))
+    lo, hi = ax.get_ylim()
+    assert lo <= closes.min() and hi >= closes.max() and ax.get_xlim()[1] >= 39
+
+
+@pytest.mark.parametrize('seeded', [5, 80])
+def test_indicator_window_follows_the_batch_versions(seeded):
+    """Seeded from history, then revised and appended candle by candle as the CandleSeries listener does."""
+    rng = np.random.default_rng(seeded)
+    closes = 100 + np.cumsum(rng.normal(0, 1, 160)); limit = 50
+    w = IndicatorWindow(limit)
+    w.seed(closes[:seeded])
+    for i in range(seeded, len(closes)):
+        w.revise(closes[i - 1] + rng.normal())    # provisional ticks of the forming candle
+        w.revise(closes[i - 1])                    # its final close, then the next candle opens
+        w.append(closes[i] + rng.normal())
+    w.revise(closes[-1])
+
+    start = max(0, seeded - limit)   # the EMA runs from the first seeded candle
+    window = closes[start:]
+    assert w.cols.shape == (3, limit)
+    np.testing.assert_array_equal(w.cols[0], closes[-limit:])
+    np.testing.assert_allclose(w.cols[1], sma_np(window, 10)[-limit:], rtol=1e-9)
+    np.testing.assert_allclose(w.cols[2], ema_np(window, 20)[-limit:], rtol=1e-9)
@@ -5,4 +5,8 @@ utils package — รวมฟังก์ชันช่วยเหลือ 
 """
 from . import binance_api
 
-__all__ = ["binance_api","indicators",]
+__all__ = [
+    "aggregator", "binance_api", "book_analytics", "book_feed", "candle_series", "candles", "decode",
+    "flow", "heatmap", "indicators", "kline_store", "loader", "local_book", "market_table", "metrics",
+    "recorder", "replay", "stream_hub", "sysinfo",
+]
@@ -0,0 +1,214 @@
+"""
+aggregator.py — Multi-timeframe candles (AGG_INTERVALS) built locally from one base stream per symbol.
+
+The base stream is `<sym>@kline_1m` (AGG_SOURCE='kline') or `<sym>@aggTrade` ('aggTrade'). Every
+message is folded into the open candle of each interval (volume and taker buy volume included),
+so charts and volume cards update live with no REST polling and a single subscription.
+
+The open buckets are seeded once from the local 1m store (utils/kline_store.py): listeners are
+only called after that, so the first candle they see already holds the minutes before start-up.
+Listeners receive an `AggCandle` on the stream thread — one per interval per message, plus a
+`closed=True` candle when a bucket rolls over. `complete` tells whether that closed candle saw
+every minute (kline source) or an unbroken trade sequence (aggTrade source); an incomplete one
+should be refetched rather than persisted.
+"""
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from config import AGG_INTERVALS, AGG_SOURCE, kline_stream, agg_trade_stream
+from utils.binance_api import get_klines_range
+from utils.candles import interval_ms
+from utils.decode import AggTrade, Kline
+from utils.kline_store import STORE_FIELDS, open_store, rest_rows
+from utils.loader import load_async
+
+NAN = float('nan')
+
+
+class AggCandle(NamedTuple):
+    interval: str; time: float; open: float; high: float; low: float; close: float
+    volume: float; taker_buy_volume: float; closed: bool; complete: bool
+
+
+def base_stream(symbol: str, source: str = AGG_SOURCE) -> str:
+    return agg_trade_stream(symbol) if source == 'aggTrade' else kline_stream(symbol, '1m')
+
+
+class _Bucket:
+    """Running OHLCV of one open candle; merge() is order independent (o/c follow first/last time)."""
+    __slots__ = ('t', 'o', 'h', 'l', 'c', 'v', 'bv', 'first', 'last', 'minutes', 'live')
+
+    def __init__(self, t: float, live: bool):
+        self.t = t; self.o = self.h = self.l = self.c = NAN; self.v = self.bv = 0.0
+        self.first = self.last = None
+        self.minutes = 0      # closed 1m candles merged (kline source)
+        self.live = live      # opened by a rollover while streaming, i.e. saw its start
+
+    def merge(self, first, last, o, h, l, c, v, bv):
+        if self.first is None:
+            self.first, self.last, self.o, self.h, self.l, self.c = first, last, o, h, l, c
+        else:
+            if first < self.first: self.first = first; self.o = o
+            if last >= self.last: self.last = last; self.c = c
+            if h > self.h: self.h = h
+            if l < self.l: self.l = l
+        self.v += v; self.bv += bv
+
+
+class CandleAggregator:
+    def __init__(self, symbol: str, hub, intervals=AGG_INTERVALS, source: str = AGG_SOURCE):
+        self.symbol = symbol.upper(); self.hub = hub; self.source = source
+        self.intervals = tuple(intervals)
+        self.stream = base_stream(symbol, source)
+        self._iv = {iv: interval_ms(iv) / 1000.0 for iv in self.intervals}
+        self._buckets: Dict[str, _Bucket] = {}
+        self._live = None       # kline source: the still-forming 1m candle (t, o, h, l, c, v, bv)
+        self._last_id = None    # aggTrade source: last aggregate trade id, to detect gaps
+        self._listeners: List[Callable[[AggCandle], None]] = []
+        self._lock = threading.RLock()
+        self._gen = 0
+        self.ready = False
+
+    # ----- listeners -----
+    def subscribe(self, fn: Callable[[AggCandle], None]):
+        with self._lock:
+            first = not self._listeners
+            self._listeners.append(fn)
+            if not first:
+                if self.ready:   # late joiner: hand it the open candles right away
+                    for iv in self.intervals:
+                        c = self._candle(iv)
+                        if c: fn(c)
+                return
+            self._gen += 1; gen = self._gen
+        self.hub.subscribe(self.stream, self.on_message)
+        load_async(self._load_seed, on_done=lambda rows: self._on_seed(rows, gen))
+
+    def unsubscribe(self, fn: Callable[[AggCandle], None]):
+        with self._lock:
+            if fn not in self._listeners: return
+            self._listeners.remove(fn)
+            if self._listeners: return
+            self._buckets.clear(); self._live = None; self._last_id = None; self.ready = False
+        self.hub.unsubscribe(self.stream, self.on_message)
+
+    def current(self, interval: str) -> Optional[AggCandle]:
+        with self._lock: return self._candle(interval)
+
+    # ----- seeding -----
+    def _load_seed(self) -> np.ndarray:
+        """Closed 1m candles covering the open bucket of the longest interval."""
+        n = int(max(self._iv.values()) // 60)
+        try:
+            store = open_store(self.symbol, '1m'); store.sync()
+            return store.rows(n, STORE_FIELDS)
+        except OSError as e:
+            print(f"aggregator seed ({self.symbol}): kline store unavailable: {e}")
+            end = (int(time.time()) // 60 - 1) * 60000
+            return rest_rows(get_klines_range(self.symbol, '1m', end - (n - 1) * 60000, end))
+
+    def _on_seed(self, rows, gen: int):
+        out = []
+        with self._lock:
+            if gen != self._gen or self.ready: return
+            if rows is None or not len(rows): print(f"aggregator seed ({self.symbol}): no history, candles start now")
+            else:
+                t = rows[:, 0]; now = time.time()
+                for iv, sec in self._iv.items():
+                    b = self._buckets.get(iv)
+                    if b is None: b = self._buckets[iv] = _Bucket(now - now % sec, False)
+                    # minutes of this bucket that the stream has not covered yet
+                    upto = b.first - b.first % 60 if b.first is not None else np.inf
+                    if self._live is not None: upto = min(upto, self._live[0])
+                    sel = rows[(t >= b.t) & (t < upto)]
+                    if not len(sel): continue
+                    b.merge(sel[0, 0], sel[-1, 0], sel[0, 1], sel[:, 2].max(), sel[:, 3].min(), sel[-1, 4],
+                            float(sel[:, 5].sum()), float(sel[:, 6].sum()))
+                    b.minutes += len(sel)
+            self.ready = True
+            out = [c for c in map(self._candle, self.intervals) if c]
+        self._emit(out)
+
+    # ----- stream thread -----
+    def on_message(self, msg):
+        with self._lock:
+            if isinstance(msg, Kline): out = self._on_kline(msg)
+            elif isinstance(msg, AggTrade): out = self._on_trade(msg)
+            else: return
+            if not self.ready: return
+            out += [c for c in map(self._candle, self.intervals) if c]
+        self._emit(out)
+
+    def _on_kline(self, k: Kline) -> List[AggCandle]:
+        row = (k.open_time / 1000.0, k.open, k.high, k.low, k.close, k.volume, k.taker_buy_volume)
+        out = []
+        live = self._live
+        if live is not None and row[0] > live[0]: out += self._fold(live, 1)   # its final update was missed
+        if live is not None and row[0] < live[0]: return out                   # late revision of an older minute
+        if k.closed: out += self._fold(row, 1); self._live = None
+        else: out += self._roll(row[0]); self._live = row
+        return out
+
+    def _on_trade(self, a: AggTrade) -> List[AggCandle]:
+        if self._last_id is not None and a.agg_id != self._last_id + 1:
+            for b in self._buckets.values(): b.live = False   # trades were missed
+        self._last_id = a.agg_id
+        t = a.trade_time / 1000.0; p = a.price
+        return self._fold((t, p, p, p, p, a.qty, 0.0 if a.buyer_maker else a.qty), 0)
+
+    def _roll(self, t: float) -> List[AggCandle]:
+        """Close every bucket that `t` is past, opening the next one."""
+        out = []
+        for iv, sec in self._iv.items():
+            start = t - t % sec
+            b = self._buckets.get(iv)
+            if b is None: self._buckets[iv] = _Bucket(start, False)
+            elif start > b.t:
+                complete = b.minutes == int(sec // 60) if self.source != 'aggTrade' else b.live
+                if b.first is not None: out.append(self._candle(iv, closed=True, complete=complete))
+                self._buckets[iv] = _Bucket(start, True)
+        return out
+
+    def _fold(self, row, minutes: int) -> List[AggCandle]:
+        out = self._roll(row[0])
+        t = row[0]
+        for iv, b in self._buckets.items():
+            if t < b.t: continue
+            b.merge(t, t, *row[1:]); b.minutes += minutes
+        return out
+
+    def _candle(self, interval: str, closed: bool = False, complete: bool = False) -> Optional[AggCandle]:
+        b = self._buckets.get(interval)
+        if b is None: return None
+        o, h, l, c, v, bv = b.o, b.h, b.l, b.c, b.v, b.bv
+        live = self._live
+        if not closed and live is not None and live[0] >= b.t:   # overlay the forming minute
+            if b.first is None: o, h, l, c = live[1:5]
+            else:
+                if live[0] < b.first: o = live[1]
+                h = max(h, live[2]); l = min(l, live[3])
+                if live[0] >= b.last: c = live[4]
+            v += live[5]; bv += live[6]
+        elif b.first is None: return None
+        return AggCandle(interval, b.t, o, h, l, c, v, bv, closed, complete)
+
+    def _emit(self, candles: List[AggCandle]):
+        for fn in list(self._listeners):
+            for c in candles:
+                try: fn(c)
+                except Exception as e: print(f"aggregator listener error: {e}")
+
+
+_aggregators: Dict[str, CandleAggregator] = {}
+_aggregators_lock = threading.Lock()
+
+
+def aggregator_for(symbol: str, hub) -> CandleAggregator:
+    """Shared aggregator per symbol, so every panel of a symbol rides the same base stream."""
+    with _aggregators_lock:
+        agg = _aggregators.get(symbol.upper())
+        if agg is None or agg.hub is not hub: agg = _aggregators[symbol.upper()] = CandleAggregator(symbol, hub)
+        return agg
@@ -1,30 +1,163 @@
-
 """A tool for calling the Binance REST API (public market data)."""
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
+from concurrent.futures import Future
+import random
+import threading
+import time
 import requests
-from config import BINANCE_REST_BASE, REST_TIMEOUT_SEC, REST_RETRIES
+from requests.adapters import HTTPAdapter
+from utils.recorder import recorder
+from config import (
+    BINANCE_REST_BASE, REST_TIMEOUT_SEC, REST_RETRIES, REST_POOL_SIZE, KLINE_PAGE_LIMIT,
+    REST_BACKOFF_BASE_SEC, REST_BACKOFF_MAX_SEC, REST_WEIGHT_LIMIT_PER_MIN, REST_CACHE_MAX_ENTRIES
+)
 
-def safe_api_call(path: str, params: Optional[Dict[str, Any]] = None,
-                  retries: int = REST_RETRIES, timeout: int = REST_TIMEOUT_SEC):
-    url = f"{BINANCE_REST_BASE}{path}"
-    for attempt in range(retries):
+
+class WeightBucket:
+    """Token bucket over Binance request weight (refills limit/60 per second)."""
+    def __init__(self, limit_per_min: int):
+        self.capacity = float(limit_per_min)
+        self.rate = limit_per_min / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, weight: int):
+        """Block until `weight` can be spent without exceeding the budget."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.blocked_until and self.tokens >= weight:
+                    self.tokens -= weight
+                    return
+                wait = max(self.blocked_until - now, (weight - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def sync(self, used_weight_1m):
+        """Align with the server's view (X-MBX-USED-WEIGHT-1M) — other clients may share our IP."""
+        if used_weight_1m is None: return
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, self.capacity - float(used_weight_1m))
+
+    def block(self, seconds: float):
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+
+class BinanceRestClient:
+    """Pooled keep-alive session + retry with jittered backoff + weight budget + TTL cache.
+
+    Concurrent identical requests share one in-flight fetch. Cache hits and shared fetches hand
+    every caller the same parsed JSON object, so results are read-only: copy before mutating.
+    """
+    def __init__(self, base: str = BINANCE_REST_BASE, retries: int = REST_RETRIES, timeout: int = REST_TIMEOUT_SEC,
+                 weight_limit: int = REST_WEIGHT_LIMIT_PER_MIN, pool_size: int = REST_POOL_SIZE):
+        self.base = base; self.retries = retries; self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter); self.session.mount('http://', adapter)
+        self.bucket = WeightBucket(weight_limit)
+        self.recorder = recorder
+        self._cache: Dict[Tuple, Tuple[float, Any]] = {}
+        self._inflight: Dict[Tuple, Future] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str, params: Optional[Dict[str, Any]] = None, weight: int = 1, ttl: float = 0.0,
+            retries: Optional[int] = None, timeout: Optional[int] = None):
+        key = (path, tuple(sorted((params or {}).items())))
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit and hit[0] > time.monotonic(): return hit[1]
+            fut = self._inflight.get(key)
+            owner = fut is None
+            if owner: fut = self._inflight[key] = Future()
+        if not owner: return fut.result()
+
+        result = None
         try:
-            resp = requests.get(url, params=params, timeout=timeout)
-            resp.raise_for_status()
-            return resp.json()
-        except Exception as e:
-            print(f"REST error: {e} (attempt {attempt+1}/{retries})")
-    print("All retries failed")
-    return None
+            result = self._fetch(path, params, weight, self.retries if retries is None else retries,
+                                 self.timeout if timeout is None else timeout)
+            if result is not None and ttl > 0: self._store(key, result, ttl)
+        finally:
+            with self._lock: self._inflight.pop(key, None)
+            fut.set_result(result)
+        return result
+
+    def _store(self, key, value, ttl: float):
+        with self._lock:
+            now = time.monotonic()
+            if len(self._cache) >= REST_CACHE_MAX_ENTRIES:
+                self._cache = {k: v for k, v in self._cache.items() if v[0] > now}
+                if len(self._cache) >= REST_CACHE_MAX_ENTRIES: self._cache.pop(next(iter(self._cache)))
+            self._cache[key] = (now + ttl, value)
+
+    def _fetch(self, path, params, weight, retries, timeout):
+        url = f"{self.base}{path}"
+        for attempt in range(retries):
+            self.bucket.acquire(weight)
+            try:
+                resp = self.session.get(url, params=params, timeout=timeout)
+                self.bucket.sync(resp.headers.get('X-MBX-USED-WEIGHT-1M'))
+                if resp.status_code in (418, 429):
+                    wait = float(resp.headers.get('Retry-After', 60))
+                    self.bucket.block(wait)
+                    print(f"REST rate limited ({resp.status_code}), backing off {wait:.0f}s (attempt {attempt+1}/{retries})")
+                    continue
+                resp.raise_for_status()
+                if self.recorder: self.recorder.record_rest(path, params, resp.content)
+                return resp.json()
+            except Exception as e:
+                print(f"REST error: {e} (attempt {attempt+1}/{retries})")
+            if attempt + 1 < retries:  # exponential backoff with full jitter
+                time.sleep(random.uniform(0, min(REST_BACKOFF_MAX_SEC, REST_BACKOFF_BASE_SEC * 2 ** attempt)))
+        print("All retries failed")
+        return None
+
+
+client = BinanceRestClient()
+
+def safe_api_call(path: str, params: Optional[Dict[str, Any]] = None,
+                  retries: int = REST_RETRIES, timeout: int = REST_TIMEOUT_SEC, weight: int = 1, ttl: float = 0.0):
+    return client.get(path, params, weight=weight, ttl=ttl, retries=retries, timeout=timeout)
+
+def _depth_weight(limit: int) -> int:
+    return 5 if limit <= 100 else 25 if limit <= 500 else 50 if limit <= 1000 else 250
 
 def get_current_price(symbol: str):
-    return safe_api_call('/api/v3/ticker/price', params={'symbol': symbol.upper()})
+    return safe_api_call('/api/v3/ticker/price', params={'symbol': symbol.upper()}, weight=2, ttl=1.0)
 
 def get_24h_stats(symbol: str):
-    return safe_api_call('/api/v3/ticker/24hr', params={'symbol': symbol.upper()})
+    return safe_api_call('/api/v3/ticker/24hr', params={'symbol': symbol.upper()}, weight=2, ttl=2.0)
+
+def get_all_24h_stats():
+    """24h stats of every symbol in one request (weight 80)."""
+    return safe_api_call('/api/v3/ticker/24hr', weight=80, ttl=2.0)
 
 def get_order_book(symbol: str, limit: int = 10):
-    return safe_api_call('/api/v3/depth', params={'symbol': symbol.upper(), 'limit': limit})
+    # never cached: a snapshot must be newer than the buffered diff events
+    return safe_api_call('/api/v3/depth', params={'symbol': symbol.upper(), 'limit': limit}, weight=_depth_weight(limit))
 
 def get_klines(symbol: str, interval: str, limit: int = 50):
-    return safe_api_call('/api/v3/klines', params={'symbol': symbol.upper(), 'interval': interval, 'limit': limit})
+    return safe_api_call('/api/v3/klines', params={'symbol': symbol.upper(), 'interval': interval, 'limit': limit},
+                         weight=2, ttl=5.0)
+
+def get_klines_range(symbol: str, interval: str, start_ms: int, end_ms: int, page_limit: int = KLINE_PAGE_LIMIT):
+    """Every kline opening in [start_ms, end_ms], paged with startTime/endTime; None if a page fails."""
+    out = []
+    while start_ms <= end_ms:
+        page = safe_api_call('/api/v3/klines', params={'symbol': symbol.upper(), 'interval': interval,
+                                                       'startTime': start_ms, 'endTime': end_ms, 'limit': page_limit},
+                             weight=2)
+        if page is None: return None
+        out.extend(page)
+        if len(page) < page_limit: break
+        start_ms = int(page[-1][0]) + 1
+    return out
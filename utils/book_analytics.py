@@ -0,0 +1,154 @@
+"""
+book_analytics.py — Order book metrics computed from the local book's level arrays on every depth update.
+
+From the best BOOK_ANALYTICS_LEVELS levels per side (best first, as `LocalOrderBook.depth()` returns them):
+  imbalance      (bid qty - ask qty) / (bid qty + ask qty) over the top BOOK_IMBALANCE_LEVELS, in [-1, 1]
+  microprice     top-of-book mid weighted by the opposite side's size: (bid * ask_qty + ask * bid_qty) / (bid_qty + ask_qty)
+  weighted_mid   the same over the top-N VWAP of each side
+  depth          cumulative quantity and quote notional of the analyzed levels
+  slippage       VWAP and cost in bps of a market order of each BOOK_SLIPPAGE_SIZES quote notional, per side
+  walls          levels of at least BOOK_WALL_FACTOR x the median level size, largest first
+
+Every metric is a handful of NumPy passes (cumsum, searchsorted, partition) over the analyzed slice, so an
+update costs the same for a 1000-level book whatever changed. Listeners get a `BookMetrics` on the stream
+thread; the latest metrics of every symbol are exported through `utils.metrics` (JSON and Prometheus).
+"""
+import math
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from config import BOOK_ANALYTICS_LEVELS, BOOK_IMBALANCE_LEVELS, BOOK_SLIPPAGE_SIZES, BOOK_WALL_FACTOR, BOOK_WALL_MAX
+from utils.metrics import metrics
+
+Level = Tuple[float, float]
+
+
+class Slippage(NamedTuple):
+    size: float; vwap: float; bps: float; filled: bool   # filled=False: the analyzed levels ran out first
+
+
+class BookMetrics(NamedTuple):
+    best_bid: float; best_ask: float; spread: float; mid: float
+    microprice: float; weighted_mid: float; imbalance: float
+    bid_depth: float; ask_depth: float; bid_notional: float; ask_notional: float
+    buy: Tuple[Slippage, ...]; sell: Tuple[Slippage, ...]   # buy walks the asks, sell walks the bids
+    bid_walls: Tuple[Level, ...]; ask_walls: Tuple[Level, ...]
+
+
+def market_cost(prices: np.ndarray, notional: np.ndarray, cum_qty: np.ndarray, sizes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """VWAP of filling each quote-notional size against best-first levels (given their cumulative notional and
+    quantity), and whether the levels covered it."""
+    k = np.minimum(np.searchsorted(notional, sizes), len(prices) - 1)   # level where each order completes
+    before = notional.take(k - 1, mode='clip'); qty_before = cum_qty.take(k - 1, mode='clip')
+    first = k == 0
+    before[first] = 0.0; qty_before[first] = 0.0
+    spent = np.minimum(sizes, notional[-1])
+    qty = qty_before + (spent - before) / prices[k]
+    return spent / qty, sizes <= notional[-1]
+
+
+def walls(prices: np.ndarray, qtys: np.ndarray, factor: float = BOOK_WALL_FACTOR, n: int = BOOK_WALL_MAX) -> Tuple[Level, ...]:
+    """Up to n levels of at least factor x the median size, largest first."""
+    if len(qtys) < 3: return ()
+    mid = len(qtys) // 2
+    big = np.flatnonzero(qtys >= factor * np.partition(qtys, mid)[mid])   # upper median: one partition pass
+    if len(big) > n: big = big[np.argpartition(qtys[big], -n)[-n:]]
+    big = big[np.argsort(-qtys[big], kind='stable')]
+    return tuple(zip(prices[big].tolist(), qtys[big].tolist()))
+
+
+def analyze(bp: np.ndarray, bq: np.ndarray, ap: np.ndarray, aq: np.ndarray,
+            top_n: int = BOOK_IMBALANCE_LEVELS, sizes=BOOK_SLIPPAGE_SIZES) -> Optional[BookMetrics]:
+    """Metrics of best-first level arrays (see the module docstring); None while a side is empty."""
+    if not len(bp) or not len(ap): return None
+    bid, ask, bid_q, ask_q = float(bp[0]), float(ap[0]), float(bq[0]), float(aq[0])
+    mid = (bid + ask) / 2
+    micro = (bid * ask_q + ask * bid_q) / (bid_q + ask_q)
+
+    tb, ta = bq[:top_n].sum(), aq[:top_n].sum()
+    imbalance = float((tb - ta) / (tb + ta))
+    vb, va = (bp[:top_n] @ bq[:top_n]) / tb, (ap[:top_n] @ aq[:top_n]) / ta
+    weighted_mid = float((vb * ta + va * tb) / (tb + ta))
+
+    sizes = np.asarray(sizes, dtype=float)
+    b_notional, b_cum = np.cumsum(bp * bq), np.cumsum(bq)
+    a_notional, a_cum = np.cumsum(ap * aq), np.cumsum(aq)
+    buy_vwap, buy_ok = market_cost(ap, a_notional, a_cum, sizes)
+    sell_vwap, sell_ok = market_cost(bp, b_notional, b_cum, sizes)
+    buy = tuple(Slippage(s, v, (v / ask - 1) * 1e4, f) for s, v, f in zip(sizes.tolist(), buy_vwap.tolist(), buy_ok.tolist()))
+    sell = tuple(Slippage(s, v, (1 - v / bid) * 1e4, f) for s, v, f in zip(sizes.tolist(), sell_vwap.tolist(), sell_ok.tolist()))
+
+    return BookMetrics(bid, ask, ask - bid, mid, micro, weighted_mid, imbalance,
+                       float(b_cum[-1]), float(a_cum[-1]), float(b_notional[-1]), float(a_notional[-1]),
+                       buy, sell, walls(bp, bq), walls(ap, aq))
+
+
+class BookAnalytics:
+    """Latest BookMetrics of one symbol; the symbol's BookFeed feeds it, cards, tiles and exporters read it."""
+    def __init__(self, symbol: str, levels: int = BOOK_ANALYTICS_LEVELS):
+        self.symbol = symbol.upper(); self.levels = levels
+        self.latest: Optional[BookMetrics] = None
+        self._listeners: List[Callable[[BookMetrics], None]] = []
+
+    def subscribe(self, fn: Callable[[BookMetrics], None]):
+        self._listeners.append(fn)
+        if self.latest: fn(self.latest)
+
+    def unsubscribe(self, fn: Callable[[BookMetrics], None]):
+        if fn in self._listeners: self._listeners.remove(fn)
+
+    def update(self, bp: np.ndarray, bq: np.ndarray, ap: np.ndarray, aq: np.ndarray) -> Optional[BookMetrics]:
+        """Recompute from best-first arrays (only the first `levels` of each side are read)."""
+        n = self.levels
+        m = analyze(bp[:n], bq[:n], ap[:n], aq[:n])
+        if m is None: return None
+        self.latest = m
+        for fn in list(self._listeners):
+            try: fn(m)
+            except Exception as e: print(f"book analytics listener error: {e}")
+        return m
+
+    def clear(self):
+        self.latest = None
+
+
+_analytics: Dict[str, BookAnalytics] = {}
+_analytics_lock = threading.Lock()
+
+
+def analytics_for(symbol: str) -> BookAnalytics:
+    """Shared analytics per symbol."""
+    with _analytics_lock:
+        a = _analytics.get(symbol.upper())
+        if a is None: a = _analytics[symbol.upper()] = BookAnalytics(symbol)
+        return a
+
+
+# ----- export -----
+def _as_dict(m: BookMetrics) -> dict:
+    d = m._asdict()
+    for side in ('buy', 'sell'): d[side] = [s._asdict() for s in d[side]]
+    for side in ('bid_walls', 'ask_walls'): d[side] = [list(w) for w in d[side]]
+    return d
+
+
+def snapshot() -> dict:
+    return {sym: _as_dict(a.latest) for sym, a in sorted(_analytics.items()) if a.latest}
+
+
+def prometheus() -> List[str]:
+    items = [(sym, a.latest) for sym, a in sorted(_analytics.items()) if a.latest]
+    if not items: return []
+    out = []
+    for field in ('spread', 'microprice', 'weighted_mid', 'imbalance', 'bid_depth', 'ask_depth'):
+        out.append(f'# TYPE dashboard_book_{field} gauge')
+        out += [f'dashboard_book_{field}{{symbol="{sym}"}} {getattr(m, field)}' for sym, m in items]
+    out.append('# TYPE dashboard_book_slippage_bps gauge')
+    out += [f'dashboard_book_slippage_bps{{symbol="{sym}",side="{side}",size="{s.size:g}"}} {s.bps}'
+            for sym, m in items for side in ('buy', 'sell') for s in getattr(m, side) if math.isfinite(s.bps)]
+    return out
+
+
+metrics.add_section('book', snapshot, prometheus)
@@ -0,0 +1,97 @@
+"""
+book_feed.py — One local order book per symbol, shared by every view of that symbol.
+
+BookFeed owns the symbol's `@depth@100ms` subscription and its LocalOrderBook, and on every
+change feeds the book analytics (utils/book_analytics.py) and the depth heatmap
+(utils/heatmap.py). Views — the order book ladder, grid tiles — subscribe and get the whole
+book's best-first level arrays after each change, so it is copied out once per update. The
+feed starts with its first listener and stops (closing the book, clearing analytics and
+heatmap) with its last.
+
+Changes come from two threads: diff events on the stream thread, and the snapshot sync on a
+loader thread (LocalOrderBook's on_synced). `_on_change` is serialized by its own lock, so the
+analytics, heatmap and listeners see one book state at a time, in order.
+"""
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import depth_stream
+from utils.book_analytics import analytics_for
+from utils.decode import DepthUpdate
+from utils.heatmap import heatmap_for
+from utils.local_book import LocalOrderBook
+
+
+class BookFeed:
+    def __init__(self, symbol: str, hub):
+        self.symbol = symbol.upper(); self.hub = hub
+        self.stream = depth_stream(symbol, fast_100ms=True)
+        self.book: Optional[LocalOrderBook] = None
+        self.analytics = analytics_for(symbol)
+        self.heatmap = heatmap_for(symbol)
+        self._event_time = 0.0   # exchange time (s) of the last depth event
+        self._listeners: List[Callable[..., None]] = []
+        self._lock = threading.Lock()
+        self._change_lock = threading.Lock()   # serializes _on_change across stream and loader threads
+
+    def subscribe(self, fn: Callable[..., None]):
+        """fn(bid prices, bid qtys, ask prices, ask qtys) on the stream thread after every change of the synced book."""
+        with self._lock:
+            first = not self._listeners
+            self._listeners.append(fn)
+            if first: self.book = LocalOrderBook(self.symbol, on_synced=self._on_change)
+        if first: self.hub.subscribe(self.stream, self.on_message); return
+        depth = self.depth()
+        if depth is not None: fn(*depth)
+
+    def unsubscribe(self, fn: Callable[..., None]):
+        with self._lock:
+            if fn not in self._listeners: return
+            self._listeners.remove(fn)
+            if self._listeners: return
+            book, self.book = self.book, None
+        self.hub.unsubscribe(self.stream, self.on_message)
+        book.close()
+        self.analytics.clear(); self.heatmap.reset()
+
+    @property
+    def synced(self) -> bool:
+        book = self.book
+        return book is not None and book.synced
+
+    def depth(self, n: Optional[int] = None) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+        """Best n levels per side (see LocalOrderBook.depth), or None while the book is not synced."""
+        book = self.book
+        return book.depth(n) if book is not None and book.synced else None
+
+    def on_message(self, ev: DepthUpdate):
+        book = self.book
+        if book is None: return
+        self._event_time = ev.event_time / 1000.0
+        try: changed = book.on_event(ev)
+        except Exception as e: print('orderbook update error', e); return
+        if changed: self._on_change()
+
+    def _on_change(self):
+        with self._change_lock:
+            depth = self.depth()   # the whole book: the heatmap's price range can reach past the analytics levels
+            if depth is None: return
+            self.analytics.update(*depth)   # reads its first BOOK_ANALYTICS_LEVELS
+            self.heatmap.sample(self._event_time, *depth)
+            for fn in list(self._listeners):
+                try: fn(*depth)
+                except Exception as e: print(f"book feed listener error: {e}")
+
+
+_feeds: Dict[str, BookFeed] = {}
+_feeds_lock = threading.Lock()
+
+
+def book_for(symbol: str, hub) -> BookFeed:
+    """Shared order book per symbol (one depth subscription, one local book)."""
+    with _feeds_lock:
+        feed = _feeds.get(symbol.upper())
+        if feed is None or feed.hub is not hub: feed = _feeds[symbol.upper()] = BookFeed(symbol, hub)
+        return feed
@@ -0,0 +1,147 @@
+"""
+candle_series.py — Shared live candle history per (symbol, interval).
+
+One CandleRing per (symbol, interval), loaded from the local store (plus the forming candle
+from REST) and kept live from the symbol's aggregator (AGG_INTERVALS) or its own @kline
+stream. Every chart of that symbol and interval — the full KlinePanel, grid tiles — listens to
+the same series, so a symbol costs one subscription and one ring however many views show it.
+The series starts with its first listener and stops with its last.
+
+Listeners are called on the loader / stream thread with one of:
+  'loaded'  history is in (full redraw)      'failed'  history could not be loaded
+  'new'     a candle was appended (full)     'update'  the newest candle changed
+"""
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import AGG_INTERVALS, KLINE_LIMIT_DEFAULT, KLINE_RING_CAPACITY, kline_stream
+from utils.aggregator import AggCandle, aggregator_for
+from utils.binance_api import get_klines
+from utils.candles import CandleRing
+from utils.decode import Kline
+from utils.kline_store import open_store, rest_rows
+from utils.loader import load_async
+
+
+class CandleSeries:
+    def __init__(self, symbol: str, interval: str, hub, capacity: int = KLINE_RING_CAPACITY,
+                 limit: int = KLINE_LIMIT_DEFAULT):
+        self.symbol = symbol.upper(); self.interval = interval; self.hub = hub
+        self.limit = limit   # candles fetched from REST when there is no local store
+        self.data = CandleRing(max(limit, capacity))   # t, o, h, l, c, v columns
+        self._pending = []      # live candles that arrived before the history
+        self.loaded = False
+        self.failed = False
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[str], None]] = []
+        self._gen = 0
+        self.store = None       # KlineStore, opened by _load_history
+        # intervals the aggregator builds ride the symbol's single base stream instead of their own @kline
+        self.agg = aggregator_for(symbol, hub) if interval in AGG_INTERVALS else None
+
+    # ----- listeners -----
+    def subscribe(self, fn: Callable[[str], None]):
+        with self._lock:
+            first = not self._listeners
+            self._listeners.append(fn)
+            if first: self._gen += 1; gen = self._gen
+            loaded, failed = self.loaded, self.failed
+        if not first:   # late joiner: tell it where the series is
+            if loaded: fn('loaded')
+            elif failed: fn('failed')
+            return
+        if self.agg: self.agg.subscribe(self.on_candle)
+        else: self.hub.subscribe(kline_stream(self.symbol, self.interval), self.on_message)
+        load_async(self._load_history, on_done=lambda rows: self._on_loaded(rows, gen))
+
+    def unsubscribe(self, fn: Callable[[str], None]):
+        with self._lock:
+            if fn not in self._listeners: return
+            self._listeners.remove(fn)
+            if self._listeners: return
+            self.loaded = self.failed = False; self._pending = []; self.data.clear()
+        if self.agg: self.agg.unsubscribe(self.on_candle)
+        else: self.hub.unsubscribe(kline_stream(self.symbol, self.interval), self.on_message)
+
+    # ----- read -----
+    def view(self, n: int) -> Optional[np.ndarray]:
+        """Copy of the newest n candles as (6, n) columns; None before any data."""
+        with self._lock: return self.data.view(n).copy() if self.data else None
+
+    def last(self) -> Optional[Tuple[float, ...]]:
+        with self._lock: return self.data.last() if self.data else None
+
+    # ----- history -----
+    def _load_history(self) -> np.ndarray:
+        """Closed candles from the local store (synced first), plus the still-forming one from REST."""
+        try:
+            self.store = open_store(self.symbol, self.interval)
+            self.store.sync()
+            rows = self.store.rows(self.data.capacity)
+        except OSError as e:
+            print(f"kline store unavailable ({self.symbol} {self.interval}): {e}")
+            self.store = None; rows = np.empty((0, 6))
+        live = rest_rows(get_klines(self.symbol, self.interval, 1 if len(rows) else self.limit))[:, :6]
+        if len(rows) and len(live): live = live[live[:, 0] > rows[-1, 0]]
+        return np.vstack([rows, live])
+
+    def _on_loaded(self, rows, gen: int):
+        with self._lock:
+            if gen != self._gen or not self._listeners: return   # stopped (and maybe restarted) meanwhile
+            if rows is None or not len(rows): self.failed = True
+            else:
+                self.data.clear(); self.data.extend(rows)
+                for row in self._pending: self._apply_row(row)  # merge buffered live candles in order
+                self.loaded = True
+            self._pending = []
+        self._emit('loaded' if self.loaded else 'failed')
+
+    # ----- stream thread -----
+    def on_message(self, k: Kline):
+        self._on_row((k.open_time/1000.0, k.open, k.high, k.low, k.close, k.volume), k.taker_buy_volume, k.closed, True)
+
+    def on_candle(self, c: AggCandle):
+        if c.interval == self.interval: self._on_row(c[1:7], c.taker_buy_volume, c.closed, c.complete)
+
+    def _on_row(self, row: Tuple, taker_buy_volume: float, closed: bool, complete: bool):
+        store = self.store
+        if closed and store is not None and not (complete and store.append(row + (taker_buy_volume,), require_contiguous=True)):
+            load_async(store.sync)   # missed candles (reconnect/sleep): fetch them, the stream fills on
+        # the ring is updated here (stream thread) so coalesced frames never lose a closed candle
+        with self._lock:
+            if not self._listeners: return
+            if not self.loaded:
+                if self._pending and self._pending[-1][0] == row[0]: self._pending[-1] = row
+                else: self._pending.append(row)
+                return
+            kind = self._apply_row(row)
+        if kind: self._emit(kind)
+
+    def _apply_row(self, row) -> Optional[str]:
+        """Merge one live candle into the ring (caller holds the lock)."""
+        last_t = self.data.last_time()
+        if row[0] < last_t: return None  # older than what we have
+        if row[0] == last_t:
+            self.data.update_last(row); return 'update'
+        self.data.append(row)   # a new candle opened (the oldest drops out of the ring once full)
+        return 'new'
+
+    def _emit(self, kind: str):
+        for fn in list(self._listeners):
+            try: fn(kind)
+            except Exception as e: print(f"candle series listener error: {e}")
+
+
+_series: Dict[Tuple[str, str], CandleSeries] = {}
+_series_lock = threading.Lock()
+
+
+def series_for(symbol: str, interval: str, hub) -> CandleSeries:
+    """Shared candle history per (symbol, interval)."""
+    key = (symbol.upper(), interval)
+    with _series_lock:
+        s = _series.get(key)
+        if s is None or s.hub is not hub: s = _series[key] = CandleSeries(symbol, interval, hub)
+        return s
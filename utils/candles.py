@@ -0,0 +1,77 @@
+"""
+candles.py — Preallocated NumPy ring buffer of OHLCV candles.
+
+Columns live in one float64 array of shape (fields, 2 * capacity). Every row is written
+twice (at i and i + capacity), so the newest n candles are always one contiguous slice:
+`view()` returns zero-copy column views (t, o, h, l, c, v) for plotting and the `*_np`
+indicators, with no wrap-around handling. append / update_last are O(1).
+"""
+from typing import Sequence, Tuple
+
+import numpy as np
+
+FIELDS = ('t', 'o', 'h', 'l', 'c', 'v')   # open time (epoch seconds), open, high, low, close, volume
+_UNIT_SEC = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+def interval_ms(interval: str) -> int:
+    """Binance kline interval ('1m', '4h', '1d', ...) in milliseconds."""
+    return int(interval[:-1]) * _UNIT_SEC[interval[-1]] * 1000
+
+
+class CandleRing:
+    def __init__(self, capacity: int, fields: Sequence[str] = FIELDS):
+        if capacity <= 0:
+            raise ValueError('capacity must be > 0')
+        self.capacity = capacity
+        self.fields = tuple(fields)
+        self._buf = np.full((len(self.fields), 2 * capacity), np.nan)
+        self._head = 0   # next write position in [0, capacity)
+        self._n = 0
+
+    def __len__(self): return self._n
+
+    def clear(self):
+        self._head = 0; self._n = 0
+
+    def append(self, row: Sequence[float]):
+        """Add a new (newest) candle, overwriting the oldest once full."""
+        i = self._head
+        self._buf[:, i] = row; self._buf[:, i + self.capacity] = row
+        self._head = (i + 1) % self.capacity
+        if self._n < self.capacity: self._n += 1
+
+    def update_last(self, row: Sequence[float]):
+        """Revise the newest candle in place (the still-forming one)."""
+        if not self._n: return self.append(row)
+        i = (self._head - 1) % self.capacity
+        self._buf[:, i] = row; self._buf[:, i + self.capacity] = row
+
+    def extend(self, rows):
+        """Bulk load, oldest first; rows is (k, fields) array-like. Only the newest `capacity` are kept."""
+        rows = np.asarray(rows, dtype=float).reshape(-1, len(self.fields))[-self.capacity:]
+        k = len(rows)
+        if not k: return
+        idx = (self._head + np.arange(k)) % self.capacity
+        self._buf[:, idx] = rows.T; self._buf[:, idx + self.capacity] = rows.T
+        self._head = (self._head + k) % self.capacity
+        self._n = min(self._n + k, self.capacity)
+
+    def view(self, n: int = None) -> np.ndarray:
+        """(fields, m) zero-copy view of the newest m = min(n, len) candles, oldest first.
+
+        Later appends overwrite it in place — copy (or hold the owner's lock) if it must stay stable.
+        """
+        m = self._n if n is None else min(n, self._n)
+        end = self._head + self.capacity
+        return self._buf[:, end - m:end]
+
+    def column(self, name: str, n: int = None) -> np.ndarray:
+        return self.view(n)[self.fields.index(name)]
+
+    def last(self) -> Tuple[float, ...]:
+        if not self._n: raise IndexError('empty candle ring')
+        return tuple(self._buf[:, (self._head - 1) % self.capacity].tolist())
+
+    def last_time(self) -> float:
+        return self._buf[0, (self._head - 1) % self.capacity] if self._n else float('nan')
@@ -0,0 +1,158 @@
+"""
+decode.py — Pluggable JSON decoding for stream messages, with typed per-stream schemas.
+
+Backend: msgspec if installed, else orjson, else the stdlib (JSON_BACKEND / DASHBOARD_JSON
+forces one). Combined-stream messages for known stream kinds decode into compact
+NamedTuples with numeric fields already converted:
+
+  <sym>@ticker          -> Ticker        <sym>@bookTicker -> BookTicker
+  <sym>@depth[@100ms]   -> DepthUpdate   (bids/asks as float64 arrays of shape (n, 2))
+  <sym>@kline_<iv>      -> Kline         <sym>@aggTrade   -> AggTrade
+
+With msgspec only the fields listed in SCHEMAS are decoded (straight from the raw bytes,
+strings coerced to numbers); the other backends parse the whole message and pick the
+fields. Any other stream's data is passed through as parsed JSON.
+"""
+import json
+from operator import itemgetter
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from config import JSON_BACKEND
+
+try:
+    import msgspec   # optional
+except ImportError:
+    msgspec = None
+try:
+    import orjson    # optional
+except ImportError:
+    orjson = None
+
+
+def levels_np(levels) -> np.ndarray:
+    """[[price, qty], ...] (strings or numbers) -> float64 array of shape (n, 2)."""
+    return np.asarray(levels, dtype=np.float64).reshape(-1, 2) if len(levels) else np.empty((0, 2))
+
+
+class Ticker(NamedTuple):
+    event_time: int; symbol: str; last: float; change: float; change_pct: float
+    open: float; high: float; low: float; volume: float; quote_volume: float
+
+class BookTicker(NamedTuple):
+    update_id: int; symbol: str; bid: float; bid_qty: float; ask: float; ask_qty: float
+
+class DepthUpdate(NamedTuple):
+    event_time: int; symbol: str; first_id: int; last_id: int; bids: np.ndarray; asks: np.ndarray
+
+class Kline(NamedTuple):
+    event_time: int; symbol: str; open_time: int; close_time: int; interval: str
+    open: float; high: float; low: float; close: float; volume: float
+    quote_volume: float; taker_buy_volume: float; trades: int; closed: bool
+
+class AggTrade(NamedTuple):
+    event_time: int; symbol: str; agg_id: int; price: float; qty: float; trade_time: int; buyer_maker: bool
+
+
+# kind -> (type, [(binance key, converter)] in field order); 'k.x' reads data['k']['x']
+SCHEMAS: Dict[str, Tuple[type, List[Tuple[str, Callable]]]] = {
+    'ticker': (Ticker, [('E', int), ('s', str), ('c', float), ('p', float), ('P', float),
+                        ('o', float), ('h', float), ('l', float), ('v', float), ('q', float)]),
+    'bookTicker': (BookTicker, [('u', int), ('s', str), ('b', float), ('B', float), ('a', float), ('A', float)]),
+    'depth': (DepthUpdate, [('E', int), ('s', str), ('U', int), ('u', int), ('b', levels_np), ('a', levels_np)]),
+    'kline': (Kline, [('E', int), ('s', str), ('k.t', int), ('k.T', int), ('k.i', str), ('k.o', float), ('k.h', float),
+                      ('k.l', float), ('k.c', float), ('k.v', float), ('k.q', float), ('k.V', float),
+                      ('k.n', int), ('k.x', bool)]),
+    'aggTrade': (AggTrade, [('E', int), ('s', str), ('a', int), ('p', float), ('q', float), ('T', int), ('m', bool)]),
+}
+
+
+def kind_of(stream: str) -> Optional[str]:
+    """'btcusdt@depth@100ms' -> 'depth', 'btcusdt@kline_1m' -> 'kline'; None for untyped streams."""
+    parts = stream.split('@')
+    if len(parts) < 2: return None
+    kind = parts[1]
+    if kind.startswith('kline_'): return 'kline'
+    return kind if kind in SCHEMAS else None
+
+
+def _compile(kind: str) -> Callable[[dict], Any]:
+    """Converter payload -> typed struct, built once per kind: one itemgetter pulls all top-level
+    keys, a second one the nested 'k' keys, then each value goes through its converter."""
+    cls, fields = SCHEMAS[kind]
+    convs = tuple(conv for _, conv in fields)
+    top = [key for key, _ in fields if '.' not in key]
+    nested = [key.split('.', 1)[1] for key, _ in fields if '.' in key]
+    if any('.' in key for key, _ in fields[:len(top)]): raise ValueError(f'{kind}: nested fields must come last')
+    get_top = itemgetter(*top)
+    new = tuple.__new__
+    if not nested:
+        return lambda d: new(cls, [c(v) for c, v in zip(convs, get_top(d))])
+    get_k = itemgetter(*nested)
+    return lambda d: new(cls, [c(v) for c, v in zip(convs, get_top(d) + get_k(d['k']))])
+
+_converters = {kind: _compile(kind) for kind in SCHEMAS}
+
+
+def from_dict(kind: str, data: dict):
+    """Typed struct from an already parsed payload (stdlib/orjson path)."""
+    return _converters[kind](data)
+
+
+# ----- msgspec: decode only the schema fields, straight from bytes -----
+def _build_msgspec_decoders():
+    envelope = msgspec.defstruct('_Envelope', [('stream', str, ''), ('data', msgspec.Raw, msgspec.Raw(b''))], gc=False)
+    typed = {}
+    for kind, (cls, fields) in SCHEMAS.items():
+        top, nested = [], []
+        for attr, (key, conv) in zip(cls._fields, fields):
+            typ = List[Tuple[float, float]] if conv is levels_np else conv
+            if '.' in key: nested.append((attr, typ, msgspec.field(name=key.split('.', 1)[1])))
+            else: top.append((attr, typ, msgspec.field(name=key)))
+        if nested:
+            top.append(('k', msgspec.defstruct(f'_{cls.__name__}K', nested, gc=False), msgspec.field(name='k')))
+        typed[kind] = msgspec.json.Decoder(msgspec.defstruct(f'_{cls.__name__}Msg', top, gc=False), strict=False)
+    return msgspec.json.Decoder(envelope), typed
+
+
+def _from_msgspec(kind: str, obj):
+    cls, fields = SCHEMAS[kind]
+    vals = []
+    for attr, (key, conv) in zip(cls._fields, fields):
+        v = getattr(obj.k if '.' in key else obj, attr)
+        vals.append(levels_np(v) if conv is levels_np else v)
+    return cls(*vals)
+
+
+def _pick_backend(name: str) -> str:
+    if name in ('auto', 'msgspec') and msgspec is not None: return 'msgspec'
+    if name in ('auto', 'msgspec', 'orjson') and orjson is not None: return 'orjson'
+    return 'json'
+
+
+def make_decoder(backend: str) -> Callable[[Any], Tuple[Optional[str], Any]]:
+    """decode(raw) -> (stream, typed payload) for one backend; (None, None) for control replies."""
+    if backend == 'msgspec':
+        envelope_dec, typed_dec = _build_msgspec_decoders()
+        def decode(raw):
+            env = envelope_dec.decode(raw)
+            if not env.stream: return None, None
+            kind = kind_of(env.stream)
+            if kind is None: return env.stream, msgspec.json.decode(env.data)
+            return env.stream, _from_msgspec(kind, typed_dec[kind].decode(env.data))
+        return decode
+    parse = orjson.loads if backend == 'orjson' else json.loads
+    def decode(raw):
+        msg = parse(raw)
+        stream = msg.get('stream') if isinstance(msg, dict) else None
+        if not stream: return None, None
+        kind = kind_of(stream)
+        data = msg.get('data')
+        return stream, (_converters[kind](data) if kind else data)
+    return decode
+
+
+BACKEND = _pick_backend(JSON_BACKEND)
+loads: Callable[[Any], Any] = msgspec.json.decode if BACKEND == 'msgspec' else orjson.loads if BACKEND == 'orjson' else json.loads
+decode_message = make_decoder(BACKEND)   # combined-stream message -> (stream, typed payload)
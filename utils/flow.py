@@ -0,0 +1,128 @@
+"""
+flow.py — Rolling-window trade flow (buy/sell volume, trade count, VWAP, buy ratio) from `@aggTrade`.
+
+Each window is a ring of FLOW_BUCKET_SEC buckets with running totals: a trade is added to
+its bucket and the totals, and buckets that slide out of the window are subtracted as time
+advances, so every trade costs O(1) amortized and memory is fixed by window / bucket size.
+The window is exact to one bucket (the current, partial bucket plus the n - 1 before it).
+Totals are re-summed from the ring once per revolution so float subtraction cannot drift.
+
+Time is the exchange's: trade time (`T`) when trades arrive, and any event time passed to
+`stats(now)` in between, so quiet windows decay without reading the local clock.
+"""
+import math
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from config import FLOW_WINDOWS_SEC, FLOW_BUCKET_SEC, agg_trade_stream
+from utils.decode import AggTrade
+
+_BUY, _SELL, _BUY_Q, _SELL_Q, _N = range(5)   # per-bucket accumulators (volume, quote volume, trades)
+
+
+class FlowStats(NamedTuple):
+    window: float; buy_volume: float; sell_volume: float; trades: int; vwap: Optional[float]; buy_ratio: float
+
+
+class RollingFlow:
+    def __init__(self, window_sec: float, bucket_sec: float = FLOW_BUCKET_SEC):
+        self.window = window_sec; self.bucket = bucket_sec
+        self.n = max(1, math.ceil(window_sec / bucket_sec))
+        self._ring = [[0.0] * 5 for _ in range(self.n)]
+        self._tot = [0.0] * 5
+        self._head: Optional[int] = None   # absolute index of the newest bucket
+
+    def _advance(self, idx: int):
+        head = self._head
+        if head is not None and idx <= head: return
+        if head is None or idx - head >= self.n:
+            for slot in self._ring: slot[:] = (0.0,) * 5
+            self._tot = [0.0] * 5
+        else:
+            ring, tot, n = self._ring, self._tot, self.n
+            for i in range(head + 1, idx + 1):
+                slot = ring[i % n]
+                for f in range(5): tot[f] -= slot[f]
+                slot[:] = (0.0,) * 5
+            if idx // n != head // n:   # one revolution done: re-sum to shed float drift
+                self._tot = [sum(s[f] for s in ring) for f in range(5)]
+        self._head = idx
+
+    def add(self, t: float, price: float, qty: float, buyer_maker: bool):
+        """One trade at exchange time t (seconds); the taker is the seller when buyer_maker."""
+        idx = int(t // self.bucket)
+        if self._head is not None and idx <= self._head - self.n: return   # already outside the window
+        self._advance(idx)
+        slot = self._ring[idx % self.n]; tot = self._tot
+        v, q = (_SELL, _SELL_Q) if buyer_maker else (_BUY, _BUY_Q)
+        slot[v] += qty; tot[v] += qty
+        slot[q] += qty * price; tot[q] += qty * price
+        slot[_N] += 1; tot[_N] += 1
+
+    def stats(self, now: Optional[float] = None) -> FlowStats:
+        if now is not None: self._advance(int(now // self.bucket))
+        buy, sell, buy_q, sell_q, n = self._tot
+        vol = buy + sell
+        return FlowStats(self.window, buy, sell, int(round(n)),
+                         (buy_q + sell_q) / vol if vol > 0 else None, buy / vol if vol > 0 else 0.0)
+
+
+class TradeFlow:
+    """RollingFlow per window for one symbol, fed by its @aggTrade stream; listeners get every window's stats."""
+    def __init__(self, symbol: str, hub, windows=FLOW_WINDOWS_SEC, bucket_sec: float = FLOW_BUCKET_SEC):
+        self.symbol = symbol.upper(); self.hub = hub
+        self.stream = agg_trade_stream(symbol)
+        self.windows: Dict[float, RollingFlow] = {w: RollingFlow(w, bucket_sec) for w in windows}
+        self._listeners: List[Callable[[Tuple[FlowStats, ...]], None]] = []
+        self._lock = threading.Lock()
+        self._last_t: Optional[float] = None
+
+    def subscribe(self, fn: Callable[[Tuple[FlowStats, ...]], None]):
+        with self._lock:
+            first = not self._listeners
+            self._listeners.append(fn)
+        if first: self.hub.subscribe(self.stream, self.on_message)
+
+    def unsubscribe(self, fn: Callable[[Tuple[FlowStats, ...]], None]):
+        with self._lock:
+            if fn not in self._listeners: return
+            self._listeners.remove(fn)
+            if self._listeners: return
+            # the windows would have a hole once re-subscribed; start over instead
+            self.windows = {w: RollingFlow(w, f.bucket) for w, f in self.windows.items()}
+            self._last_t = None
+        self.hub.unsubscribe(self.stream, self.on_message)
+
+    def on_message(self, a: AggTrade):
+        t = a.trade_time / 1000.0
+        with self._lock:
+            for f in self.windows.values(): f.add(t, a.price, a.qty, a.buyer_maker)
+            self._last_t = t if self._last_t is None else max(self._last_t, t)
+        self._emit(self.stats())
+
+    def stats(self, now: Optional[float] = None) -> Tuple[FlowStats, ...]:
+        """Every window's stats as of `now` (exchange seconds; default: the latest trade)."""
+        with self._lock:
+            if now is not None and self._last_t is not None: now = max(now, self._last_t)
+            return tuple(f.stats(now) for f in self.windows.values())
+
+    def tick(self, now: float):
+        """Let quiet windows decay: call with a recent exchange event time (seconds)."""
+        if self._listeners: self._emit(self.stats(now))
+
+    def _emit(self, stats: Tuple[FlowStats, ...]):
+        for fn in list(self._listeners):
+            try: fn(stats)
+            except Exception as e: print(f"trade flow listener error: {e}")
+
+
+_flows: Dict[str, TradeFlow] = {}
+_flows_lock = threading.Lock()
+
+
+def flow_for(symbol: str, hub) -> TradeFlow:
+    """Shared trade flow per symbol (one @aggTrade subscription)."""
+    with _flows_lock:
+        flow = _flows.get(symbol.upper())
+        if flow is None or flow.hub is not hub: flow = _flows[symbol.upper()] = TradeFlow(symbol, hub)
+        return flow
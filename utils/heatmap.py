@@ -0,0 +1,107 @@
+"""
+heatmap.py — Order book history as a fixed-size time x price grid (liquidity heatmap).
+
+Each column is HEATMAP_COLUMN_SEC of exchange time and holds the resting quantity (both sides) per
+price bucket of `step`, as last seen in that interval. Columns live in one float32 array of shape
+(rows, 2 * columns) written twice, like utils/candles.py, so the newest `columns` are always one
+contiguous slice; memory is fixed by HEATMAP_ROWS x HEATMAP_COLUMNS however long the session runs.
+
+The price range spans HEATMAP_RANGE_PCT around the mid. When the mid leaves the middle half of the
+range the grid is re-centred (rows shifted, `gen` bumped) so renderers know to repaint it all.
+Columns with no book update (gaps, resyncs) stay NaN.
+"""
+import math
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from config import HEATMAP_COLUMNS, HEATMAP_ROWS, HEATMAP_COLUMN_SEC, HEATMAP_RANGE_PCT
+
+
+def nice_step(raw: float) -> float:
+    """Smallest 1/2/5 x 10^k price step >= raw."""
+    if raw <= 0: return 1.0
+    exp = 10.0 ** math.floor(math.log10(raw))
+    for m in (1, 2, 5, 10):
+        if m * exp >= raw * (1 - 1e-9): return m * exp
+    return 10 * exp
+
+
+class DepthHeatmap:
+    def __init__(self, symbol: str, columns: int = HEATMAP_COLUMNS, rows: int = HEATMAP_ROWS,
+                 column_sec: float = HEATMAP_COLUMN_SEC, range_pct: float = HEATMAP_RANGE_PCT):
+        self.symbol = symbol.upper()
+        self.columns = columns; self.rows = rows; self.column_sec = column_sec; self.range_pct = range_pct
+        self._grid = np.full((rows, 2 * columns), np.nan, dtype=np.float32)
+        self.step: Optional[float] = None   # price per row
+        self.base = 0                       # row 0 is the bucket [base * step, (base + 1) * step)
+        self.col: Optional[int] = None      # absolute index (time // column_sec) of the newest column
+        self.gen = 0                        # bumped whenever existing columns change meaning (re-centre, reset)
+        self._lock = threading.Lock()
+
+    # ----- write (stream thread) -----
+    def sample(self, t: float, bp: np.ndarray, bq: np.ndarray, ap: np.ndarray, aq: np.ndarray):
+        """Record the book (best-first level arrays) at exchange time t (seconds) into its column."""
+        if not len(bp) or not len(ap): return
+        mid = (float(bp[0]) + float(ap[0])) / 2
+        idx = int(t // self.column_sec)
+        with self._lock:
+            if self.col is not None and idx < self.col: return   # late: that column is already past
+            if self.step is None: self.step = nice_step(mid * self.range_pct / 100 / self.rows)
+            row = mid / self.step - self.base
+            if self.col is None or not self.rows / 4 <= row < 3 * self.rows / 4: self._center(mid)
+            if self.col is None: self.col = idx
+            elif idx > self.col: self._advance(idx)
+            lo = self.base * self.step; hi = lo + self.rows * self.step
+            prices = np.concatenate((bp, ap)); qtys = np.concatenate((bq, aq))
+            keep = (prices >= lo) & (prices < hi)
+            r = np.floor(prices[keep] / self.step + 1e-9).astype(np.intp) - self.base
+            col = np.bincount(np.clip(r, 0, self.rows - 1), weights=qtys[keep], minlength=self.rows)
+            i = idx % self.columns
+            self._grid[:, i] = col; self._grid[:, i + self.columns] = col
+
+    def _advance(self, idx: int):
+        """Open column idx; the skipped ones (no update in their interval) become NaN."""
+        gap = np.arange(max(self.col + 1, idx - self.columns + 1), idx + 1) % self.columns
+        self._grid[:, gap] = np.nan; self._grid[:, gap + self.columns] = np.nan
+        self.col = idx
+
+    def _center(self, mid: float):
+        base = int(mid // self.step) - self.rows // 2
+        shift = base - self.base
+        if abs(shift) >= self.rows or self.col is None: self._grid[:] = np.nan
+        elif shift > 0: self._grid[:-shift] = self._grid[shift:]; self._grid[-shift:] = np.nan
+        elif shift < 0: self._grid[-shift:] = self._grid[:shift]; self._grid[:-shift] = np.nan
+        self.base = base; self.gen += 1
+
+    def reset(self):
+        with self._lock:
+            self._grid[:] = np.nan; self.step = None; self.base = 0; self.col = None; self.gen += 1
+
+    # ----- read -----
+    def price_range(self) -> Tuple[float, float]:
+        with self._lock:
+            if self.step is None: return 0.0, 1.0
+            return self.base * self.step, (self.base + self.rows) * self.step
+
+    def columns_since(self, since: Optional[int]) -> Tuple[int, Optional[int], np.ndarray]:
+        """(gen, newest column, copy of columns since..newest inclusive); since=None or too old: the whole window."""
+        with self._lock:
+            if self.col is None: return self.gen, None, np.empty((self.rows, 0), dtype=np.float32)
+            first = self.col - self.columns + 1 if since is None else max(since, self.col - self.columns + 1)
+            first = min(first, self.col)
+            start = first % self.columns
+            return self.gen, self.col, self._grid[:, start:start + self.col - first + 1].copy()
+
+
+_heatmaps: Dict[str, DepthHeatmap] = {}
+_heatmaps_lock = threading.Lock()
+
+
+def heatmap_for(symbol: str) -> DepthHeatmap:
+    """Shared depth history per symbol (filled by the symbol's BookFeed, utils/book_feed.py)."""
+    with _heatmaps_lock:
+        h = _heatmaps.get(symbol.upper())
+        if h is None: h = _heatmaps[symbol.upper()] = DepthHeatmap(symbol)
+        return h
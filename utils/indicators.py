@@ -1,27 +1,283 @@
-
 # -*- coding: utf-8 -*-
-"""Basic indicators: SMA/EMA"""
-from typing import List
+"""Technical indicators: streaming O(1) classes + NumPy batch versions.
+
+Streaming indicators take one candle at a time: `update(x)` appends a new input,
+`update(x, new=False)` revises the last one (the still-forming candle), both O(1).
+SMA/WMA/Bollinger and EMA can `seed(xs)` from a backfill instead of replaying it, taking the
+last input as the forming candle.
+Batch `*_np` functions compute the same definitions over whole arrays for backfill
+(NaN during warm-up where the streaming classes return None).
+"""
+from collections import deque
+from typing import List, Optional
+import numpy as np
 
+# ---------------------------------------------------------------------------
+# List API (kept for existing callers)
+# ---------------------------------------------------------------------------
 def sma(values: List[float], period: int) -> List[float]:
     if period <= 0:
         raise ValueError('period must be > 0')
-    out = []
-    window = []
-    for v in values:
-        window.append(float(v))
-        if len(window) > period:
-            window.pop(0)
-        out.append(sum(window)/period if len(window) == period else None)
-    return out
+    return [None if np.isnan(v) else float(v) for v in sma_np(values, period)]
 
 def ema(values: List[float], period: int) -> List[float]:
     if period <= 0:
         raise ValueError('period must be > 0')
-    k = 2/(period+1)
-    out = []
-    ema_val = None
-    for v in values:
-        v = float(v)
-        ema_val = v if ema_val is None else v*k + ema_val*(1-k)
-        out.append(ema_val)
+    return ema_np(values, period).tolist()
+
+# ---------------------------------------------------------------------------
+# Streaming indicators
+# ---------------------------------------------------------------------------
+def _check_period(period: int):
+    if period <= 0:
+        raise ValueError('period must be > 0')
+
+class _Window:
+    """Fixed-length window with running sum, sum of squares and linearly weighted sum."""
+    RESYNC_EVERY = 1000   # recompute sums exactly now and then to cancel float drift
+
+    def __init__(self, n: int):
+        self.n = n; self.buf = deque()
+        self.sum = 0.0; self.sumsq = 0.0; self.wsum = 0.0
+        self._pushes = 0
+
+    def full(self) -> bool: return len(self.buf) == self.n
+
+    def push(self, x: float):
+        if len(self.buf) == self.n:
+            old = self.buf.popleft()
+            self.wsum += self.n * x - self.sum   # every remaining weight drops by one
+            self.sum += x - old; self.sumsq += x * x - old * old
+        else:
+            self.wsum += (len(self.buf) + 1) * x
+            self.sum += x; self.sumsq += x * x
+        self.buf.append(x)
+        self._pushes += 1
+        if self._pushes % self.RESYNC_EVERY == 0: self._resync()
+
+    def replace_last(self, x: float):
+        old = self.buf[-1]; self.buf[-1] = x; d = x - old
+        self.sum += d; self.sumsq += x * x - old * old; self.wsum += len(self.buf) * d
+
+    def _resync(self):
+        a = np.fromiter(self.buf, dtype=float, count=len(self.buf))
+        self.sum = float(a.sum()); self.sumsq = float((a * a).sum())
+        self.wsum = float((a * np.arange(1, len(a) + 1)).sum())
+
+
+class _WindowIndicator:
+    def __init__(self, period: int):
+        _check_period(period)
+        self.period = period; self._w = _Window(period); self.value = None
+
+    def update(self, x: float, new: bool = True):
+        x = float(x)
+        if new or not self._w.buf: self._w.push(x)
+        else: self._w.replace_last(x)
+        self.value = self._compute() if self._w.full() else None
+        return self.value
+
+    def seed(self, xs):
+        """Restart from a backfill: only the last `period` inputs matter to a window."""
+        self._w = _Window(self.period)
+        for x in xs[-self.period:]: self._w.push(float(x))
+        self.value = self._compute() if self._w.full() else None
+        return self.value
+
+
+class SMA(_WindowIndicator):
+    def _compute(self): return self._w.sum / self.period
+
+
+class WMA(_WindowIndicator):
+    def _compute(self): return self._w.wsum / (self.period * (self.period + 1) / 2)
+
+
+class Bollinger(_WindowIndicator):
+    """Returns (middle, upper, lower) using the population standard deviation."""
+    def __init__(self, period: int = 20, k: float = 2.0):
+        super().__init__(period); self.k = k
+
+    def _compute(self):
+        n = self.period; mid = self._w.sum / n
+        sd = max(self._w.sumsq / n - mid * mid, 0.0) ** 0.5
+        return mid, mid + self.k * sd, mid - self.k * sd
+
+
+class _RecursiveIndicator:
+    """Subclasses implement `_step(state, *x) -> (state, value)`; revising re-runs it from the committed state."""
+    def __init__(self):
+        self._committed = self._current = self._initial()
+        self._has_input = False
+        self.value = None
+
+    def update(self, *x, new: bool = True):
+        if new and self._has_input: self._committed = self._current
+        self._current, self.value = self._step(self._committed, *(float(v) for v in x))
+        self._has_input = True
+        return self.value
+
+
+class EMA(_RecursiveIndicator):
+    """Seeded with the first value, like `ema()`."""
+    def __init__(self, period: int):
+        _check_period(period); self.period = period; self.k = 2 / (period + 1); super().__init__()
+
+    def _initial(self): return None
+
+    def _step(self, prev, x):
+        v = x if prev is None else x * self.k + prev * (1 - self.k)
+        return v, v
+
+    def seed(self, xs):
+        """Restart from ema_np(xs); its last value stays revisable with update(x, new=False)."""
+        v = ema_np(xs, self.period)
+        self._committed = float(v[-2]) if len(v) > 1 else self._initial()
+        self._current = self.value = float(v[-1]) if len(v) else None
+        self._has_input = len(v) > 0
+        return self.value
+
+
+def _rsi_value(ag, al):
+    if al == 0: return 100.0 if ag > 0 else 50.0
+    return 100.0 - 100.0 / (1.0 + ag / al)
+
+
+class RSI(_RecursiveIndicator):
+    """Wilder's RSI: simple mean of the first `period` changes, then Wilder smoothing."""
+    def __init__(self, period: int = 14):
+        _check_period(period); self.period = period; super().__init__()
+
+    def _initial(self): return (None, 0, 0.0, 0.0)   # prev close, changes seen, avg gain, avg loss
+
+    def _step(self, state, close):
+        prev, n, ag, al = state
+        if prev is None: return (close, 0, 0.0, 0.0), None
+        ch = close - prev; gain = max(ch, 0.0); loss = max(-ch, 0.0); n += 1
+        d = n if n <= self.period else self.period
+        ag = (ag * (d - 1) + gain) / d; al = (al * (d - 1) + loss) / d
+        return (close, n, ag, al), (_rsi_value(ag, al) if n >= self.period else None)
+
+
+class MACD:
+    """Returns (macd, signal, histogram)."""
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = EMA(fast); self.slow = EMA(slow); self.signal = EMA(signal); self.value = None
+
+    def update(self, x: float, new: bool = True):
+        m = self.fast.update(x, new=new) - self.slow.update(x, new=new)
+        s = self.signal.update(m, new=new)
+        self.value = (m, s, m - s)
+        return self.value
+
+
+class ATR(_RecursiveIndicator):
+    """Wilder's Average True Range; update(high, low, close)."""
+    def __init__(self, period: int = 14):
+        _check_period(period); self.period = period; super().__init__()
+
+    def _initial(self): return (None, 0, 0.0)   # prev close, TRs seen, running ATR
+
+    def _step(self, state, high, low, close):
+        prev, n, atr = state
+        tr = high - low if prev is None else max(high - low, abs(high - prev), abs(low - prev))
+        n += 1; d = n if n <= self.period else self.period
+        atr = (atr * (d - 1) + tr) / d
+        return (close, n, atr), (atr if n >= self.period else None)
+
+
+class VWAP(_RecursiveIndicator):
+    """Cumulative VWAP over typical price; update(high, low, close, volume). Call reset() per session."""
+    def _initial(self): return (0.0, 0.0)
+
+    def _step(self, state, high, low, close, volume):
+        pv = state[0] + (high + low + close) / 3 * volume; vol = state[1] + volume
+        return (pv, vol), (pv / vol if vol > 0 else None)
+
+    def reset(self): self.__init__()
+
+# ---------------------------------------------------------------------------
+# Batch (NumPy) versions
+# ---------------------------------------------------------------------------
+def _ewm(x: np.ndarray, alpha: float, init: Optional[float] = None) -> np.ndarray:
+    """y[t] = (1-alpha)*y[t-1] + alpha*x[t], y[-1] = init (or y[0] = x[0]); closed form per chunk."""
+    x = np.asarray(x, dtype=float); out = np.empty_like(x)
+    if len(x) == 0: return out
+    beta = 1.0 - alpha
+    if init is None: prev, start = x[0], 1; out[0] = x[0]
+    else: prev, start = float(init), 0
+    if beta == 0.0:
+        out[start:] = x[start:]; return out
+    chunk = max(1, int(-69.0 / np.log(beta)))   # keeps beta**-chunk well inside float range
+    for s in range(start, len(x), chunk):
+        seg = x[s:s + chunk]; j = np.arange(len(seg))
+        pw = beta ** j
+        y = beta * pw * prev + alpha * pw * np.cumsum(seg / pw)
+        out[s:s + chunk] = y; prev = y[-1]
+    return out
+
+def sma_np(values, period: int) -> np.ndarray:
+    _check_period(period)
+    x = np.asarray(values, dtype=float); out = np.full(len(x), np.nan)
+    if len(x) >= period:
+        c = np.cumsum(np.insert(x, 0, 0.0))
+        out[period - 1:] = (c[period:] - c[:-period]) / period
+    return out
+
+def ema_np(values, period: int) -> np.ndarray:
+    _check_period(period)
+    return _ewm(values, 2 / (period + 1))
+
+def wma_np(values, period: int) -> np.ndarray:
+    _check_period(period)
+    x = np.asarray(values, dtype=float); out = np.full(len(x), np.nan)
+    if len(x) >= period:
+        w = np.arange(1, period + 1, dtype=float)
+        out[period - 1:] = np.convolve(x, w[::-1], mode='valid') / w.sum()
+    return out
+
+def bollinger_np(values, period: int = 20, k: float = 2.0):
+    """Returns (middle, upper, lower) arrays."""
+    _check_period(period)
+    x = np.asarray(values, dtype=float); mid = np.full(len(x), np.nan); sd = np.full(len(x), np.nan)
+    if len(x) >= period:
+        win = np.lib.stride_tricks.sliding_window_view(x, period)
+        mid[period - 1:] = win.mean(axis=1); sd[period - 1:] = win.std(axis=1)
+    return mid, mid + k * sd, mid - k * sd
+
+def _wilder_np(series: np.ndarray, period: int, offset: int) -> np.ndarray:
+    """Mean of the first `period` items, then Wilder smoothing; result aligned to index offset+i."""
+    out = np.full(len(series) + offset, np.nan)
+    if len(series) >= period:
+        first = series[:period].mean()
+        out[offset + period - 1] = first
+        out[offset + period:] = _ewm(series[period:], 1.0 / period, init=first)
+    return out
+
+def rsi_np(values, period: int = 14) -> np.ndarray:
+    _check_period(period)
+    ch = np.diff(np.asarray(values, dtype=float))
+    ag = _wilder_np(np.maximum(ch, 0.0), period, 1); al = _wilder_np(np.maximum(-ch, 0.0), period, 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = 100.0 - 100.0 / (1.0 + ag / al)
+    out[(al == 0) & (ag > 0)] = 100.0; out[(al == 0) & (ag == 0)] = 50.0
+    return out
+
+def macd_np(values, fast: int = 12, slow: int = 26, signal: int = 9):
+    """Returns (macd, signal, histogram) arrays."""
+    m = ema_np(values, fast) - ema_np(values, slow); s = ema_np(m, signal)
+    return m, s, m - s
+
+def atr_np(high, low, close, period: int = 14) -> np.ndarray:
+    _check_period(period)
+    h, l, c = (np.asarray(a, dtype=float) for a in (high, low, close))
+    if len(h) == 0: return np.empty(0)
+    prev = np.concatenate([[np.nan], c[:-1]])
+    tr = np.fmax(h - l, np.fmax(np.abs(h - prev), np.abs(l - prev)))   # fmax ignores the NaN at [0]
+    return _wilder_np(tr, period, 0)
+
+def vwap_np(high, low, close, volume) -> np.ndarray:
+    h, l, c, v = (np.asarray(a, dtype=float) for a in (high, low, close, volume))
+    cv = np.cumsum(v)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(cv > 0, np.cumsum((h + l + c) / 3 * v) / cv, np.nan)
@@ -0,0 +1,178 @@
+"""
+kline_store.py — Persistent, memory-mapped columnar store of closed candles per (symbol, interval).
+
+Layout: <KLINE_STORE_DIR>/<SYMBOL>/<interval>/{t,o,h,l,c,v,bv}.f8 — one float64 memmap per
+column (t = open time in epoch seconds, bv = taker buy base volume), plus meta.json holding
+the row count and how far back history has been requested. Rows are sorted by open time.
+
+`sync()` brings the store up to date through paginated /api/v3/klines calls, only for the
+candles that are missing (nothing is fetched when the last closed candle is already stored),
+and backfills KLINE_BACKFILL_CANDLES of history on first use. Finalized stream candles
+(`k['x']`) are added with `append(..., require_contiguous=True)`. `columns()` returns
+zero-copy slices of the maps; they stay valid but stop growing once the files are resized.
+"""
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from config import KLINE_STORE_DIR, KLINE_BACKFILL_CANDLES
+from utils.binance_api import get_klines_range
+from utils.candles import FIELDS, interval_ms
+
+STORE_FIELDS = FIELDS + ('bv',)
+_GROW_ROWS = 4096
+
+
+def rest_rows(kl) -> np.ndarray:
+    """/api/v3/klines rows -> (n, 7) float array in STORE_FIELDS order."""
+    if not kl: return np.empty((0, len(STORE_FIELDS)))
+    a = np.array([k[:6] + [k[9]] for k in kl], dtype=float)
+    a[:, 0] /= 1000.0
+    return a
+
+
+class KlineStore:
+    def __init__(self, symbol: str, interval: str, root: Optional[str] = None):
+        self.symbol = symbol.upper(); self.interval = interval
+        self.iv = interval_ms(interval) / 1000.0
+        self.path = os.path.join(root or KLINE_STORE_DIR, self.symbol, interval)
+        os.makedirs(self.path, exist_ok=True)
+        self._lock = threading.RLock()
+        self._syncing = False
+        meta = self._read_meta()
+        self._n = int(meta.get('count', 0)); self._requested_from = meta.get('requested_from')
+        self._cols: Dict[str, np.memmap] = {}
+        self._cap = 0
+        self._map(max(self._n, _GROW_ROWS))
+
+    # ----- files -----
+    def _read_meta(self) -> dict:
+        try:
+            with open(os.path.join(self.path, 'meta.json')) as f: return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _map(self, cap: int):
+        self._cols = {}   # drop our maps before resizing the files
+        for f in STORE_FIELDS:
+            p = os.path.join(self.path, f + '.f8')
+            with open(p, 'ab') as fh:
+                if fh.tell() < cap * 8: fh.truncate(cap * 8)
+            self._cols[f] = np.memmap(p, dtype=np.float64, mode='r+', shape=(cap,))
+        self._cap = cap
+
+    def _commit(self, n: int):
+        for m in self._cols.values(): m.flush()
+        self._n = n
+        tmp = os.path.join(self.path, 'meta.json.tmp')
+        with open(tmp, 'w') as f: json.dump({'count': n, 'requested_from': self._requested_from}, f)
+        os.replace(tmp, os.path.join(self.path, 'meta.json'))   # count only moves after the data is flushed
+
+    # ----- read -----
+    def __len__(self): return self._n
+
+    def first_time(self) -> Optional[float]:
+        return float(self._cols['t'][0]) if self._n else None
+
+    def last_time(self) -> Optional[float]:
+        return float(self._cols['t'][self._n - 1]) if self._n else None
+
+    def columns(self, n: Optional[int] = None, start: Optional[float] = None,
+                end: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """Zero-copy column slices: the newest n rows, or open times in [start, end] (epoch seconds)."""
+        with self._lock:
+            t = self._cols['t'][:self._n]
+            i0 = int(np.searchsorted(t, start, 'left')) if start is not None else 0
+            i1 = int(np.searchsorted(t, end, 'right')) if end is not None else self._n
+            if n is not None: i0 = max(i0, i1 - n)
+            return {f: m[i0:i1] for f, m in self._cols.items()}
+
+    def rows(self, n: Optional[int] = None, fields=FIELDS) -> np.ndarray:
+        """Copy of the newest n rows as an (n, len(fields)) array, e.g. to seed a CandleRing."""
+        cols = self.columns(n)
+        return np.column_stack([cols[f] for f in fields]) if len(cols['t']) else np.empty((0, len(fields)))
+
+    # ----- write -----
+    def append(self, rows, require_contiguous: bool = False) -> bool:
+        """Add candles newer than the last stored one (an equal open time replaces it).
+
+        With require_contiguous (live stream), a row that would leave a gap is rejected and
+        False returned — call sync() to fetch the missing candles first.
+        """
+        rows = np.asarray(rows, dtype=float).reshape(-1, len(STORE_FIELDS))
+        with self._lock:
+            n = self._n
+            if n:
+                last = self._cols['t'][n - 1]
+                rows = rows[rows[:, 0] >= last]
+                if len(rows) and rows[0, 0] == last: n -= 1   # revision of the last stored candle
+                if require_contiguous and len(rows) and rows[0, 0] > last + self.iv: return False
+            if not len(rows): return True
+            if n + len(rows) > self._cap: self._map(max(n + len(rows), 2 * self._cap))
+            for i, f in enumerate(STORE_FIELDS): self._cols[f][n:n + len(rows)] = rows[:, i]
+            self._commit(n + len(rows))
+        return True
+
+    def prepend(self, rows):
+        """Add candles older than the first stored one (history backfill); rewrites the columns."""
+        rows = np.asarray(rows, dtype=float).reshape(-1, len(STORE_FIELDS))
+        with self._lock:
+            if self._n: rows = rows[rows[:, 0] < self._cols['t'][0]]
+            k = len(rows)
+            if not k: return
+            n = self._n + k
+            if n > self._cap: self._map(max(n, 2 * self._cap))
+            for i, f in enumerate(STORE_FIELDS):
+                col = self._cols[f]
+                col[k:n] = col[:self._n].copy(); col[:k] = rows[:, i]
+            self._commit(n)
+
+    def sync(self, depth: int = KLINE_BACKFILL_CANDLES, fetch=get_klines_range) -> int:
+        """Fetch only the missing closed candles (history back to `depth` candles, then up to now). Returns rows added."""
+        with self._lock:
+            if self._syncing: return 0
+            self._syncing = True
+        try:
+            iv_ms = int(self.iv * 1000)
+            last_closed = (int(time.time() * 1000) // iv_ms - 1) * iv_ms   # open time of the last finished candle
+            target = last_closed - (depth - 1) * iv_ms
+            added = 0
+            first = self.first_time()
+            if first is None or (first * 1000 > target and (self._requested_from is None or self._requested_from > target)):
+                end = int(first * 1000) - iv_ms if first is not None else last_closed
+                older = fetch(self.symbol, self.interval, target, end)
+                if older is None: return added
+                with self._lock:
+                    before = self._n
+                    if first is None: self.append(rest_rows(older))
+                    else: self.prepend(rest_rows(older))
+                    self._requested_from = target   # don't ask again for history the exchange doesn't have
+                    self._commit(self._n)
+                    added += self._n - before
+            last = self.last_time()
+            if last is not None and last * 1000 < last_closed:
+                newer = fetch(self.symbol, self.interval, int(last * 1000) + iv_ms, last_closed)
+                if newer:
+                    before = self._n
+                    self.append(rest_rows(newer))
+                    added += self._n - before
+            return added
+        finally:
+            self._syncing = False
+
+
+_stores: Dict[Tuple[str, str], KlineStore] = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(symbol: str, interval: str) -> KlineStore:
+    """Shared store per (symbol, interval) for the whole process."""
+    key = (symbol.upper(), interval)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None: store = _stores[key] = KlineStore(symbol, interval)
+        return store
@@ -0,0 +1,26 @@
+"""
+loader.py — Shared worker pool for REST loads so the Tk thread never blocks on the network.
+
+`load_async(fn, *args, on_done=cb)` runs fn on the pool; cb(result) is called on the
+worker thread (result is None if fn raised) and is expected to hand off to the UI
+through the UiScheduler.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from config import REST_WORKERS
+
+_pool = ThreadPoolExecutor(max_workers=REST_WORKERS, thread_name_prefix='rest-loader')
+
+
+def load_async(fn: Callable, *args, on_done: Optional[Callable[[Any], None]] = None) -> Future:
+    fut = _pool.submit(fn, *args)
+    if on_done is not None:
+        def _done(f: Future):
+            try: result = f.result()
+            except Exception as e:
+                print(f"load error ({getattr(fn, '__name__', fn)}): {e}"); result = None
+            try: on_done(result)
+            except Exception as e: print(f"load callback error: {e}")
+        fut.add_done_callback(_done)
+    return fut
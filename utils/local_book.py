@@ -0,0 +1,169 @@
+"""
+local_book.py — Local order book kept in sync from a REST snapshot + `@depth` diff events.
+
+Follows Binance's "how to manage a local order book correctly" procedure:
+  1. buffer diff events while `/api/v3/depth` is fetched
+  2. drop buffered events with u <= lastUpdateId, apply the rest in order
+  3. every following event must continue the sequence (U == previous u + 1),
+     otherwise the book is marked unsynced and a fresh snapshot is fetched
+"""
+import threading
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from config import ORDERBOOK_SNAPSHOT_LIMIT
+from utils.binance_api import get_order_book
+from utils.decode import DepthUpdate, levels_np
+from utils.loader import load_async
+
+Level = Tuple[float, float]
+
+
+class BookSide:
+    """Price levels of one side as sorted NumPy arrays, best first.
+
+    A diff event's (k, 2) changes are merged in one vectorized pass (searchsorted, then in-place
+    updates / np.delete / np.insert), and the top-N or the whole ladder is a slice.
+    """
+
+    def __init__(self, descending: bool):
+        self.sign = -1.0 if descending else 1.0
+        self._keys = np.empty(0)   # sign * price, ascending == best first
+        self._qty = np.empty(0)
+
+    def __len__(self): return len(self._keys)
+
+    def load(self, levels: np.ndarray):
+        """Replace the side with (n, 2) [price, qty] levels in any order (snapshot)."""
+        levels = levels[levels[:, 1] > 0]
+        keys = levels[:, 0] * self.sign
+        order = np.argsort(keys, kind='stable')
+        self._keys = keys[order]; self._qty = levels[order, 1].copy()
+
+    def update(self, levels: np.ndarray):
+        """Apply (k, 2) [price, qty] changes; qty 0 removes the level."""
+        if not len(levels): return
+        keys, qty = levels[:, 0] * self.sign, levels[:, 1]
+        if len(keys) > 1 and not (keys[1:] > keys[:-1]).all():   # Binance sends them sorted; else sort, last change wins
+            keys, first = np.unique(keys[::-1], return_index=True)
+            qty = qty[::-1][first]
+        book = self._keys
+        idx = np.searchsorted(book, keys)
+        found = book.take(idx, mode='clip') == keys if len(book) else np.zeros(len(keys), dtype=bool)
+        live = qty > 0
+        upd = found & live
+        if upd.any(): self._qty[idx[upd]] = qty[upd]
+        gone = found & ~live
+        if gone.any():
+            self._keys = book = np.delete(book, idx[gone]); self._qty = np.delete(self._qty, idx[gone])
+        new = ~found & live
+        if new.any():
+            pos = np.searchsorted(book, keys[new])
+            self._keys = np.insert(book, pos, keys[new]); self._qty = np.insert(self._qty, pos, qty[new])
+
+    def set(self, price: float, qty: float):
+        self.update(np.array([[price, qty]]))
+
+    def arrays(self, n: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(prices, qtys) of the best n levels (all when None) as float64 arrays, best first."""
+        return self._keys[:n] * self.sign, self._qty[:n].copy()
+
+    def top(self, n: int) -> List[Level]:
+        prices, qty = self.arrays(n)
+        return list(zip(prices.tolist(), qty.tolist()))
+
+    def best(self) -> Optional[Level]:
+        if not len(self._keys): return None
+        return float(self._keys[0] * self.sign), float(self._qty[0])
+
+    def clear(self):
+        self._keys = np.empty(0); self._qty = np.empty(0)
+
+
+class LocalOrderBook:
+    def __init__(self, symbol: str, snapshot_limit: int = ORDERBOOK_SNAPSHOT_LIMIT,
+                 on_synced: Optional[Callable[[], None]] = None):
+        self.symbol = symbol.upper()
+        self.snapshot_limit = snapshot_limit
+        self.on_synced = on_synced
+        self.bids = BookSide(descending=True)
+        self.asks = BookSide(descending=False)
+        self.last_update_id = 0
+        self.synced = False
+        self._buffer: List[DepthUpdate] = []
+        self._fetching = False
+        self._closed = False
+        self._lock = threading.RLock()
+
+    # ----- public -----
+    def on_event(self, event: DepthUpdate) -> bool:
+        """Feed one diff-depth event. Returns True when the (synced) book changed."""
+        with self._lock:
+            if self._closed: return False
+            if not self.synced:
+                self._buffer.append(event)
+                self._request_snapshot()
+                return False
+            return self._apply(event)
+
+    def top(self, n: int) -> Tuple[List[Level], List[Level]]:
+        with self._lock:
+            return self.bids.top(n), self.asks.top(n)
+
+    def depth(self, n: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """bid prices, bid qtys, ask prices, ask qtys of the best n levels per side (best first)."""
+        with self._lock:
+            return self.bids.arrays(n) + self.asks.arrays(n)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._buffer = []
+
+    # ----- sync -----
+    def _request_snapshot(self):
+        if self._fetching: return
+        self._fetching = True
+        load_async(get_order_book, self.symbol, self.snapshot_limit, on_done=self.apply_snapshot)
+
+    def apply_snapshot(self, snap: Optional[dict]):
+        """Seed from a /api/v3/depth response, then replay the buffered diff events."""
+        with self._lock:
+            self._fetching = False
+            if self._closed or snap is None: return  # next buffered event retries
+            buffered, self._buffer = self._buffer, []
+            if buffered and snap['lastUpdateId'] < buffered[0].first_id:
+                # snapshot is older than the first buffered event — fetch again
+                self._buffer = buffered
+                self._request_snapshot()
+                return
+            self.bids.load(levels_np(snap['bids'])); self.asks.load(levels_np(snap['asks']))
+            self.last_update_id = snap['lastUpdateId']
+            self.synced = True
+            for i, ev in enumerate(buffered):
+                self._apply(ev)
+                if not self.synced:  # gap inside the buffer: keep the rest for the next snapshot
+                    self._buffer = buffered[i:]
+                    return
+        if self.on_synced: self.on_synced()
+
+    def _apply(self, ev: DepthUpdate) -> bool:
+        if ev.last_id <= self.last_update_id: return False  # already in the snapshot
+        if ev.first_id > self.last_update_id + 1:
+            print(f"{self.symbol} depth gap ({self.last_update_id} -> {ev.first_id}), resyncing")
+            self.synced = False
+            self._buffer = [ev]
+            self._request_snapshot()
+            return False
+        self.bids.update(ev.bids); self.asks.update(ev.asks)
+        self.last_update_id = ev.last_id
+        return True
+
+
+def group_levels(prices: np.ndarray, qtys: np.ndarray, tick: float, descending: bool) -> Tuple[np.ndarray, np.ndarray]:
+    """Aggregate best-first levels into price buckets of `tick` (bids round down, asks up); tick <= 0 keeps them raw."""
+    if tick <= 0 or not len(prices): return prices, qtys
+    b = np.floor(prices / tick + 1e-9) if descending else np.ceil(prices / tick - 1e-9)
+    starts = np.flatnonzero(np.r_[True, b[1:] != b[:-1]])   # sorted input: each bucket is one run
+    return b[starts] * tick, np.add.reduceat(qtys, starts)
@@ -0,0 +1,132 @@
+"""
+market_table.py — Columnar 24h ticker table for the whole market, fed by one all-market stream.
+
+One `!miniTicker@arr` (or `!ticker@arr`) subscription carries every symbol that changed in the
+last second; `/api/v3/ticker/24hr` without a symbol seeds all of them in one request. Rows are
+kept in a (fields, capacity) float64 array indexed by symbol, and each array message is applied
+with one vectorized scatter. Widgets `watch(symbol, fn)` instead of opening a stream per symbol;
+`top()` ranks the market column-wise (volume leaders, gainers, ...).
+"""
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import MARKET_MINI_TICKER_STREAM, MARKET_QUOTE_ASSET
+from utils.binance_api import get_all_24h_stats
+from utils.loader import load_async
+
+FIELDS = ('last', 'open', 'high', 'low', 'volume', 'quote_volume', 'change_pct', 'event_time')
+_STREAM_KEYS = ('c', 'o', 'h', 'l', 'v', 'q')
+_REST_KEYS = ('lastPrice', 'openPrice', 'highPrice', 'lowPrice', 'volume', 'quoteVolume')
+_LAST, _OPEN, _PCT, _TIME = 0, 1, 6, 7
+
+
+class MarketTable:
+    def __init__(self, hub, stream: str = MARKET_MINI_TICKER_STREAM, quote: str = MARKET_QUOTE_ASSET, capacity: int = 512):
+        self.hub = hub; self.stream = stream; self.quote = quote
+        self.symbols: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._cols = np.full((len(FIELDS), capacity), np.nan)
+        self._watchers: Dict[str, List[Callable[[float, float], None]]] = {}
+        self._lock = threading.Lock()
+        self.is_active = False
+
+    def start(self):
+        if self.is_active: return
+        self.is_active = True
+        self.hub.subscribe(self.stream, self.on_message)
+        load_async(get_all_24h_stats, on_done=self._on_snapshot)
+
+    def stop(self):
+        self.is_active = False
+        self.hub.unsubscribe(self.stream, self.on_message)
+
+    # ----- watchers -----
+    def watch(self, symbol: str, fn: Callable[[float, float], None]):
+        """fn(last, change_pct) on the stream thread whenever `symbol` updates (and now, if known)."""
+        symbol = symbol.upper()
+        with self._lock:
+            self._watchers.setdefault(symbol, []).append(fn)
+            row = self._row(symbol)
+        if row is not None: fn(row[_LAST], row[_PCT])
+
+    def unwatch(self, symbol: str, fn: Callable[[float, float], None]):
+        with self._lock:
+            fns = self._watchers.get(symbol.upper())
+            if fns and fn in fns: fns.remove(fn)
+
+    # ----- read -----
+    def __len__(self): return len(self.symbols)
+
+    def _row(self, symbol: str) -> Optional[np.ndarray]:
+        i = self._index.get(symbol)
+        return None if i is None or np.isnan(self._cols[_TIME, i]) else self._cols[:, i].copy()
+
+    def get(self, symbol: str) -> Optional[Dict[str, float]]:
+        with self._lock: row = self._row(symbol.upper())
+        return None if row is None else dict(zip(FIELDS, row.tolist()))
+
+    def column(self, field: str) -> np.ndarray:
+        """Copy of one field for every symbol, in `symbols` order."""
+        with self._lock: return self._cols[FIELDS.index(field), :len(self.symbols)].copy()
+
+    def top(self, n: int = 10, by: str = 'quote_volume', ascending: bool = False) -> List[Tuple[str, float]]:
+        col = self.column(by)
+        valid = np.flatnonzero(~np.isnan(col))
+        order = valid[np.argsort(col[valid], kind='stable')]
+        if not ascending: order = order[::-1]
+        return [(self.symbols[i], float(col[i])) for i in order[:n]]
+
+    # ----- write -----
+    def _indices(self, symbols: List[str]) -> np.ndarray:
+        """Row of each symbol, adding new ones (caller holds the lock)."""
+        index = self._index; out = np.empty(len(symbols), dtype=np.intp)
+        for j, s in enumerate(symbols):
+            i = index.get(s)
+            if i is None:
+                i = index[s] = len(self.symbols); self.symbols.append(s)
+                if i >= self._cols.shape[1]:
+                    grown = np.full((len(FIELDS), 2 * self._cols.shape[1]), np.nan)
+                    grown[:, :i] = self._cols[:, :i]; self._cols = grown
+            out[j] = i
+        return out
+
+    def _apply(self, symbols: List[str], vals: np.ndarray, times: np.ndarray):
+        """Scatter (k, 6) price/volume rows; rows older than what is held are skipped."""
+        with self._lock:
+            idx = self._indices(symbols)
+            held = self._cols[_TIME, idx]
+            newer = np.isnan(held) | (times >= held)
+            idx, vals, times = idx[newer], vals[newer], times[newer]
+            cols = self._cols
+            cols[:6, idx] = vals.T
+            op = vals[:, _OPEN]
+            cols[_PCT, idx] = np.divide(vals[:, _LAST] - op, op, out=np.zeros(len(op)), where=op > 0) * 100.0
+            cols[_TIME, idx] = times
+            watchers = []
+            if self._watchers:
+                for i in idx.tolist():
+                    fns = self._watchers.get(self.symbols[i])
+                    if fns: watchers.append((fns, cols[_LAST, i], cols[_PCT, i]))
+        for fns, last, pct in watchers:
+            for fn in list(fns): fn(float(last), float(pct))
+
+    def on_message(self, arr):
+        """An all-market array payload: [{'s', 'E', 'c', 'o', 'h', 'l', 'v', 'q', ...}, ...]."""
+        if not self.is_active or not arr: return
+        q = self.quote
+        rows = [d for d in arr if d['s'].endswith(q)]
+        if not rows: return
+        vals = np.array([[d[k] for k in _STREAM_KEYS] for d in rows], dtype=float)
+        times = np.array([d['E'] for d in rows], dtype=float)
+        self._apply([d['s'] for d in rows], vals, times)
+
+    def _on_snapshot(self, stats):
+        if not stats: print('market table: 24h snapshot failed, filling from the stream'); return
+        q = self.quote
+        rows = [d for d in stats if d['symbol'].endswith(q) and d.get('count', 1)]   # count 0: not trading
+        if not rows: return
+        vals = np.array([[d[k] for k in _REST_KEYS] for d in rows], dtype=float)
+        times = np.array([d['closeTime'] for d in rows], dtype=float)
+        self._apply([d['symbol'] for d in rows], vals, times)
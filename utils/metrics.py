@@ -0,0 +1,204 @@
+"""
+metrics.py — Per-stream latency instrumentation shared by the stream hub, the UI scheduler and the header overlay.
+
+Three latencies are tracked per stream as fixed-bucket histograms (seconds):
+  exchange_to_receive  local receive wall time - payload event time (`E`, or `T` when there is no `E`);
+                       includes any local clock offset, values below zero are counted in the first bucket
+  receive_to_parsed    socket read -> JSON parsed (engine thread)
+  parsed_to_painted    parsed -> the UiScheduler frame that applied it; for coalesced updates this is the
+                       age of the oldest update replaced by the painted one, i.e. how stale the screen was
+plus message/dropped/coalesced counters, message rates and the Tk loop lag (how late each UI frame ran).
+
+The engine thread marks the message being dispatched with `set_context`, so `UiScheduler.post` can attribute
+an update to its stream without the handlers knowing about metrics. Export: `write_json(path)` and a
+Prometheus text endpoint (`serve(port)` -> http://127.0.0.1:<port>/metrics); other modules add their own
+state to both with `add_section` (e.g. utils/book_analytics.py).
+"""
+import json
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STAGES = ('exchange_to_receive', 'receive_to_parsed', 'parsed_to_painted')
+
+
+class Histogram:
+    def __init__(self, bounds=BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)   # last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, v: float):
+        self.counts[bisect_left(self.bounds, v)] += 1
+        self.count += 1; self.sum += v
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate by linear interpolation inside the bucket holding the q-th observation."""
+        if not self.count: return None
+        rank = q * self.count; seen = 0
+        for i, c in enumerate(self.counts):
+            if seen + c >= rank and c:
+                lo = self.bounds[i - 1] if i > 0 else 0.0
+                hi = self.bounds[i] if i < len(self.bounds) else self.bounds[-1]
+                return lo + (hi - lo) * (rank - seen) / c
+            seen += c
+        return self.bounds[-1]
+
+    def summary(self) -> dict:
+        return {'count': self.count, 'mean': self.sum / self.count if self.count else None,
+                'p50': self.quantile(0.5), 'p99': self.quantile(0.99)}
+
+
+class StreamStats:
+    def __init__(self):
+        self.latency = {s: Histogram() for s in STAGES}
+        self.messages = 0
+        self.dropped = 0      # discarded by the hub because the stream queue was full
+        self.coalesced = 0    # UI updates replaced by a newer one before being painted
+        self.last_receive = 0.0   # perf_counter of the last parsed message
+        self.rate = 0.0           # messages/sec over the last update_rates() period
+        self._rate_mark = 0
+
+
+class Metrics:
+    def __init__(self):
+        self.streams: Dict[str, StreamStats] = {}
+        self.loop_lag = Histogram()
+        self._ctx = threading.local()
+        self._lock = threading.Lock()
+        self._rate_time = time.monotonic()
+        self._server = None
+        self._sections: Dict[str, Tuple[Callable[[], dict], Optional[Callable[[], List[str]]]]] = {}
+
+    def add_section(self, name: str, snapshot: Callable[[], dict], prometheus: Optional[Callable[[], List[str]]] = None):
+        """Export more state: snapshot() under `name` in the JSON, prometheus() lines appended to /metrics."""
+        self._sections[name] = (snapshot, prometheus)
+
+    def stream(self, name: str) -> StreamStats:
+        st = self.streams.get(name)
+        if st is None:
+            with self._lock: st = self.streams.setdefault(name, StreamStats())
+        return st
+
+    # ----- engine thread -----
+    def observe_receive(self, stream: str, data, recv_wall: float, recv: float, parsed: float):
+        st = self.stream(stream)
+        st.messages += 1; st.last_receive = parsed
+        st.latency['receive_to_parsed'].observe(parsed - recv)
+        e = getattr(data, 'event_time', None)
+        if e is None:   # untyped payload (see utils/decode.py)
+            ev = data[0] if isinstance(data, list) and data else data
+            if isinstance(ev, dict): e = ev.get('E') or ev.get('T')
+        if e: st.latency['exchange_to_receive'].observe(max(recv_wall - e / 1000.0, 0.0))
+
+    def observe_dropped(self, stream: str):
+        self.stream(stream).dropped += 1
+
+    def set_context(self, stream: str, parsed: float):
+        self._ctx.origin = (stream, parsed)
+
+    def clear_context(self):
+        self._ctx.origin = None
+
+    def context(self) -> Optional[Tuple[str, float]]:
+        """(stream, parsed perf_counter) of the message being dispatched on this thread, if any."""
+        return getattr(self._ctx, 'origin', None)
+
+    # ----- Tk thread -----
+    def observe_coalesced(self, stream: str):
+        self.stream(stream).coalesced += 1
+
+    def observe_painted(self, stream: str, parsed: float, now: float):
+        self.stream(stream).latency['parsed_to_painted'].observe(now - parsed)
+
+    def observe_loop_lag(self, lag: float):
+        self.loop_lag.observe(max(lag, 0.0))
+
+    def update_rates(self):
+        now = time.monotonic(); dt = now - self._rate_time
+        if dt <= 0: return
+        self._rate_time = now
+        for st in list(self.streams.values()):
+            st.rate = (st.messages - st._rate_mark) / dt; st._rate_mark = st.messages
+
+    def stale_streams(self, max_age: float, streams=None) -> List[str]:
+        now = time.perf_counter()
+        names = streams if streams is not None else list(self.streams)
+        return [s for s in names if s in self.streams and now - self.streams[s].last_receive > max_age]
+
+    # ----- export -----
+    def snapshot(self) -> dict:
+        now = time.perf_counter()
+        return {
+            'time': time.time(),
+            'loop_lag': self.loop_lag.summary(),
+            'streams': {name: {'messages': st.messages, 'rate': st.rate, 'dropped': st.dropped,
+                               'coalesced': st.coalesced, 'age': now - st.last_receive if st.last_receive else None,
+                               **{stage: h.summary() for stage, h in st.latency.items()}}
+                        for name, st in sorted(self.streams.items())},
+            **{name: snap() for name, (snap, _) in self._sections.items()},
+        }
+
+    def write_json(self, path: str):
+        try:
+            with open(path, 'w') as f: json.dump(self.snapshot(), f, indent=1)
+        except OSError as e:
+            print(f"metrics export error: {e}")
+
+    def prometheus(self) -> str:
+        out = ['# TYPE dashboard_latency_seconds histogram']
+        def hist(name: str, labels: str, h: Histogram):
+            cum = 0
+            for b, c in zip(h.bounds + (float('inf'),), h.counts):
+                cum += c
+                le = '+Inf' if b == float('inf') else repr(b)
+                out.append(f'{name}_bucket{{{labels}le="{le}"}} {cum}')
+            plain = f'{{{labels.rstrip(",")}}}' if labels else ''
+            out.append(f'{name}_sum{plain} {h.sum}')
+            out.append(f'{name}_count{plain} {h.count}')
+        items = sorted(self.streams.items())
+        for name, st in items:
+            for stage, h in st.latency.items(): hist('dashboard_latency_seconds', f'stream="{name}",stage="{stage}",', h)
+        for metric, kind, attr in (('dashboard_messages_total', 'counter', 'messages'),
+                                   ('dashboard_dropped_total', 'counter', 'dropped'),
+                                   ('dashboard_coalesced_total', 'counter', 'coalesced'),
+                                   ('dashboard_message_rate', 'gauge', 'rate')):
+            out.append(f'# TYPE {metric} {kind}')
+            out += [f'{metric}{{stream="{name}"}} {getattr(st, attr)}' for name, st in items]
+        out.append('# TYPE dashboard_ui_loop_lag_seconds histogram')
+        hist('dashboard_ui_loop_lag_seconds', '', self.loop_lag)
+        for _, prom in self._sections.values():
+            if prom: out += prom()
+        return '\n'.join(out) + '\n'
+
+    def serve(self, port: int, host: str = '127.0.0.1'):
+        """Expose /metrics in the Prometheus text format from a daemon thread."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404); return
+                body = metrics.prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args): pass
+
+        try: self._server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e: print(f"metrics endpoint not started: {e}"); return
+        threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True).start()
+
+    def close(self):
+        if self._server is not None: self._server.shutdown(); self._server = None
+
+
+# process-wide registry
+metrics = Metrics()
@@ -0,0 +1,71 @@
+"""
+recorder.py — Append-only capture of raw market data (WebSocket messages + REST responses).
+
+File format: a sequence of records, each a 13-byte little-endian header
+(kind: u8, receive time: f64 epoch seconds, payload length: u32) followed by the payload:
+  KIND_WS   — the raw combined-stream message exactly as received
+  KIND_REST — request key ("/api/v3/depth?limit=1000&symbol=BTCUSDT"), b"\\n", raw response body
+Recording is enabled by setting the DASHBOARD_RECORD environment variable (config.RECORD_PATH).
+"""
+import struct
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlencode
+
+from config import RECORD_PATH
+
+KIND_WS = 1
+KIND_REST = 2
+_HEADER = struct.Struct('<BdI')
+
+
+def rest_key(path: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Canonical REST request key (params sorted) shared by the recorder and the replay server."""
+    return f"{path}?{urlencode(sorted((params or {}).items()))}" if params else path
+
+
+class Recorder:
+    def __init__(self, path: str, flush_sec: float = 1.0):
+        self.path = path
+        self.flush_sec = flush_sec
+        self.records = 0
+        self._f = open(path, 'ab')
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def record_ws(self, raw):
+        self._write(KIND_WS, raw.encode() if isinstance(raw, str) else raw)
+
+    def record_rest(self, path: str, params: Optional[Dict[str, Any]], body: bytes):
+        self._write(KIND_REST, rest_key(path, params).encode() + b'\n' + body)
+
+    def _write(self, kind: int, payload: bytes):
+        rec = _HEADER.pack(kind, time.time(), len(payload)) + payload
+        with self._lock:
+            if self._f.closed: return
+            self._f.write(rec)
+            self.records += 1
+            now = time.monotonic()
+            if now - self._last_flush >= self.flush_sec:
+                self._f.flush(); self._last_flush = now
+
+    def close(self):
+        with self._lock:
+            if not self._f.closed: self._f.close()
+
+
+def read_records(path: str) -> Iterator[Tuple[int, float, bytes]]:
+    """Yield (kind, receive_ts, payload); a truncated trailing record (crash mid-write) is ignored."""
+    with open(path, 'rb') as f:
+        while True:
+            head = f.read(_HEADER.size)
+            if len(head) < _HEADER.size: return
+            kind, ts, n = _HEADER.unpack(head)
+            payload = f.read(n)
+            if len(payload) < n: return
+            yield kind, ts, payload
+
+
+# process-wide recorder, None unless DASHBOARD_RECORD is set
+recorder: Optional[Recorder] = Recorder(RECORD_PATH) if RECORD_PATH else None
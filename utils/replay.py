@@ -0,0 +1,159 @@
+"""
+replay.py — Local fake Binance server replaying a recording made by utils/recorder.py.
+
+Serves the combined-stream WebSocket API (SUBSCRIBE/UNSUBSCRIBE, /stream?streams=...,
+and raw /ws/<stream>) plus the recorded REST endpoints, at 1x, Nx or maximum speed.
+The replay clock starts when the first client subscribes to a stream; REST requests get
+the latest response recorded at or before the current replay time.
+
+    python -m utils.replay capture.bin --speed 10        # 0 = as fast as possible
+    BINANCE_REST_BASE=http://127.0.0.1:8780 BINANCE_WS_BASE=ws://127.0.0.1:8781/ws \\
+    BINANCE_WS_COMBINED=ws://127.0.0.1:8781/stream python main.py
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+from bisect import bisect_right
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Set, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import websockets
+
+from config import REPLAY_HOST, REPLAY_REST_PORT, REPLAY_WS_PORT
+from utils.recorder import KIND_REST, KIND_WS, read_records, rest_key
+
+
+class _Client:
+    def __init__(self, ws, streams: Set[str], raw: bool):
+        self.ws = ws; self.streams = streams; self.raw = raw   # raw: /ws/<stream> sends bare payloads
+
+
+class ReplayServer:
+    def __init__(self, path: str, speed: float = 1.0, loop: bool = False, host: str = REPLAY_HOST,
+                 rest_port: int = REPLAY_REST_PORT, ws_port: int = REPLAY_WS_PORT):
+        self.speed = speed; self.loop = loop
+        self.host = host; self.rest_port = rest_port; self.ws_port = ws_port
+        self.ws_records: List[Tuple[float, str, bytes]] = []
+        self.rest: Dict[str, Tuple[List[float], List[bytes]]] = {}
+        for kind, ts, payload in read_records(path):
+            if kind == KIND_WS:
+                stream = json.loads(payload).get('stream')
+                if stream: self.ws_records.append((ts, stream, payload))
+            elif kind == KIND_REST:
+                key, body = payload.split(b'\n', 1)
+                times, bodies = self.rest.setdefault(key.decode(), ([], []))
+                times.append(ts); bodies.append(body)
+        first = [self.ws_records[0][0]] if self.ws_records else []
+        first += [t[0] for t, _ in self.rest.values()]
+        self.cursor = min(first) if first else 0.0   # replay time, in recorded epoch seconds
+        self.sent = 0
+        self.clients: Set[_Client] = set()
+        self._started = None
+
+    # ----- REST -----
+    def rest_response(self, path: str, query: str):
+        entry = self.rest.get(rest_key(path, dict(parse_qsl(query))))
+        if entry is None: return None
+        times, bodies = entry
+        return bodies[max(bisect_right(times, self.cursor) - 1, 0)]
+
+    def _serve_rest(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                body = server.rest_response(url.path, url.query)
+                status = 200 if body is not None else 404
+                if body is None: body = json.dumps({'code': -1121, 'msg': 'Not in recording.'}).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('X-MBX-USED-WEIGHT-1M', '0')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args): pass
+
+        httpd = ThreadingHTTPServer((self.host, self.rest_port), Handler)
+        threading.Thread(target=httpd.serve_forever, name='replay-rest', daemon=True).start()
+        return httpd
+
+    # ----- WebSocket -----
+    async def _handle(self, ws):
+        url = urlsplit(ws.request.path)
+        if url.path.startswith('/ws/'):
+            client = _Client(ws, {url.path[4:]}, raw=True)
+        else:
+            q = dict(parse_qsl(url.query))
+            client = _Client(ws, set(filter(None, q.get('streams', '').split('/'))), raw=False)
+        self.clients.add(client)
+        if client.streams: self._started.set()
+        try:
+            async for msg in ws:
+                try: req = json.loads(msg)
+                except ValueError: continue
+                method, params = req.get('method'), req.get('params') or []
+                result = None
+                if method == 'SUBSCRIBE': client.streams.update(params); self._started.set()
+                elif method == 'UNSUBSCRIBE': client.streams.difference_update(params)
+                elif method == 'LIST_SUBSCRIPTIONS': result = sorted(client.streams)
+                await ws.send(json.dumps({'result': result, 'id': req.get('id')}))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.clients.discard(client)
+
+    async def _broadcast(self):
+        await self._started.wait()
+        while True:
+            base = self.ws_records[0][0] if self.ws_records else 0.0
+            start = time.monotonic()
+            for i, (ts, stream, raw) in enumerate(self.ws_records):
+                if self.speed > 0:
+                    delay = (ts - base) / self.speed - (time.monotonic() - start)
+                    if delay > 0: await asyncio.sleep(delay)
+                elif i % 200 == 0:
+                    await asyncio.sleep(0)
+                self.cursor = ts
+                for c in list(self.clients):
+                    if stream not in c.streams: continue
+                    payload = json.dumps(json.loads(raw)['data']) if c.raw else raw.decode()
+                    try: await c.ws.send(payload); self.sent += 1
+                    except websockets.ConnectionClosed: self.clients.discard(c)
+            print(f"replay finished: {len(self.ws_records)} messages, {self.sent} sent")
+            if not self.loop: return
+
+    async def serve(self):
+        self._started = asyncio.Event()
+        httpd = self._serve_rest()
+        try:
+            async with websockets.serve(self._handle, self.host, self.ws_port, max_size=None):
+                print(f"replaying {len(self.ws_records)} WS messages / {len(self.rest)} REST endpoints "
+                      f"at {'max' if self.speed <= 0 else f'{self.speed:g}x'} speed — "
+                      f"REST http://{self.host}:{self.rest_port}, WS ws://{self.host}:{self.ws_port}")
+                await self._broadcast()
+                if not self.loop: await asyncio.Future()   # keep serving REST/WS after the stream ends
+        finally:
+            httpd.shutdown()
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Replay a recorded Binance market data capture.')
+    ap.add_argument('recording')
+    ap.add_argument('--speed', type=float, default=1.0, help='1 = real time, N = N x faster, 0 = max speed')
+    ap.add_argument('--loop', action='store_true', help='restart from the beginning when finished')
+    ap.add_argument('--host', default=REPLAY_HOST)
+    ap.add_argument('--rest-port', type=int, default=REPLAY_REST_PORT)
+    ap.add_argument('--ws-port', type=int, default=REPLAY_WS_PORT)
+    a = ap.parse_args()
+    server = ReplayServer(a.recording, a.speed, a.loop, a.host, a.rest_port, a.ws_port)
+    try: asyncio.run(server.serve())
+    except KeyboardInterrupt: pass
+
+
+if __name__ == '__main__':
+    main()
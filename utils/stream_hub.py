@@ -0,0 +1,207 @@
+"""
+stream_hub.py — asyncio market data engine shared by every widget.
+
+A single background thread runs one event loop that owns all combined-stream
+connections (sharded at WS_MAX_STREAMS_PER_CONN streams each), JSON parsing,
+reconnect with exponential backoff + jitter, ping/pong health checks and one
+bounded queue per stream. Consumers register a callback per stream name
+(e.g. 'btcusdt@ticker'); callbacks run on the engine thread and hand results
+to Tk through the UiScheduler. Payloads of ticker/bookTicker/depth/kline streams
+arrive as the typed structs of utils/decode.py.
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import websockets
+
+from utils.decode import decode_message
+from utils.metrics import metrics
+from utils.recorder import recorder
+from config import (
+    BINANCE_WS_COMBINED, WS_RECONNECT_SEC, WS_RECONNECT_MAX_SEC, WS_PING_INTERVAL_SEC,
+    WS_MAX_STREAMS_PER_CONN, WS_CONTROL_INTERVAL_SEC, WS_STREAM_QUEUE_SIZE
+)
+
+Callback = Callable[[Any], None]
+
+
+class _Connection:
+    """One combined-stream socket and the set of streams it carries."""
+
+    def __init__(self, hub: 'StreamHub', name: str):
+        self.hub = hub
+        self.name = name
+        self.streams: Set[str] = set()
+        self.ws = None
+        self._to_sub: Set[str] = set()
+        self._to_unsub: Set[str] = set()
+        self._wakeup = asyncio.Event()
+        self._req_id = 0
+        self.task = asyncio.get_running_loop().create_task(self._run(), name=name)
+
+    def add(self, stream: str):
+        self.streams.add(stream); self._to_unsub.discard(stream); self._to_sub.add(stream); self._wakeup.set()
+
+    def remove(self, stream: str):
+        self.streams.discard(stream); self._to_sub.discard(stream); self._to_unsub.add(stream); self._wakeup.set()
+
+    async def _run(self):
+        delay = WS_RECONNECT_SEC
+        while True:
+            try:
+                async with websockets.connect(self.hub.url, ping_interval=WS_PING_INTERVAL_SEC,
+                                              ping_timeout=WS_PING_INTERVAL_SEC, max_size=None) as ws:
+                    self.ws = ws; delay = WS_RECONNECT_SEC
+                    self._to_sub = set(self.streams); self._to_unsub.clear(); self._wakeup.set()
+                    sender = asyncio.create_task(self._send_loop(ws))
+                    try:
+                        async for raw in ws: self.hub._route(raw)
+                    finally:
+                        sender.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"{self.name} error: {e}")
+            self.ws = None
+            if not self.hub.is_active: return
+            wait = delay + random.uniform(0, delay)
+            print(f"{self.name} disconnected, reconnecting in {wait:.1f}s")
+            await asyncio.sleep(wait)
+            delay = min(delay * 2, WS_RECONNECT_MAX_SEC)
+
+    async def _send_loop(self, ws):
+        # Binance allows 5 control messages/sec per connection: batch changes per interval
+        while True:
+            await self._wakeup.wait(); self._wakeup.clear()
+            for method, streams in (('UNSUBSCRIBE', self._to_unsub), ('SUBSCRIBE', self._to_sub)):
+                if not streams: continue
+                params = sorted(streams); streams.clear()
+                self._req_id += 1
+                await ws.send(json.dumps({'method': method, 'params': params, 'id': self._req_id}))
+                await asyncio.sleep(WS_CONTROL_INTERVAL_SEC)
+
+    async def close(self):
+        if self.ws is not None: await self.ws.close()
+        self.task.cancel()
+        try: await self.task
+        except asyncio.CancelledError: pass
+
+
+class StreamHub:
+    def __init__(self, url: str = BINANCE_WS_COMBINED, max_streams_per_conn: int = WS_MAX_STREAMS_PER_CONN):
+        self.url = url
+        self.max_streams_per_conn = max_streams_per_conn
+        self.is_active = False
+        self.dropped = 0   # messages discarded because a stream queue was full
+        self.recorder = recorder
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._consumers: Dict[str, List[Callback]] = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        # owned by the loop thread
+        self._conns: List[_Connection] = []
+        self._stream_conn: Dict[str, _Connection] = {}
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._dispatchers: Dict[str, asyncio.Task] = {}
+
+    @property
+    def connected(self) -> bool:
+        return any(c.ws is not None for c in self._conns)
+
+    # ----- lifecycle -----
+    def start(self):
+        if self.is_active: return
+        self.is_active = True
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run_loop, args=(ready,), name='StreamHub', daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    def _run_loop(self, ready: threading.Event):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        with self._lock: streams = list(self._consumers)
+        for s in streams: self.loop.call_soon(self._add_stream, s)
+        self.loop.call_soon(ready.set)
+        try: self.loop.run_forever()
+        finally: self.loop.close()
+
+    def stop(self, timeout: float = 5.0):
+        """Close every connection, cancel every task and join the engine thread."""
+        if not self.is_active: return
+        self.is_active = False
+        try: asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(timeout)
+        except Exception as e: print(f"stream hub shutdown: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+
+    async def _shutdown(self):
+        for task in self._dispatchers.values(): task.cancel()
+        await asyncio.gather(*self._dispatchers.values(), *(c.close() for c in self._conns), return_exceptions=True)
+        self._dispatchers.clear(); self._queues.clear(); self._conns.clear(); self._stream_conn.clear()
+
+    # ----- subscriptions (any thread) -----
+    def subscribe(self, stream: str, callback: Callback):
+        with self._lock:
+            consumers = self._consumers.setdefault(stream, [])
+            is_new = not consumers
+            consumers.append(callback)
+        if is_new and self.is_active: self.loop.call_soon_threadsafe(self._add_stream, stream)
+
+    def unsubscribe(self, stream: str, callback: Callback):
+        with self._lock:
+            consumers = self._consumers.get(stream)
+            if not consumers or callback not in consumers: return
+            consumers.remove(callback)
+            is_last = not consumers
+            if is_last: del self._consumers[stream]
+        if is_last and self.is_active: self.loop.call_soon_threadsafe(self._remove_stream, stream)
+
+    # ----- loop thread -----
+    def _add_stream(self, stream: str):
+        with self._lock:
+            if stream not in self._consumers or stream in self._stream_conn: return
+        conn = next((c for c in self._conns if len(c.streams) < self.max_streams_per_conn), None)
+        if conn is None:
+            conn = _Connection(self, f"stream-conn-{len(self._conns)}")
+            self._conns.append(conn)
+        conn.add(stream)
+        self._stream_conn[stream] = conn
+        q = self._queues[stream] = asyncio.Queue(WS_STREAM_QUEUE_SIZE)
+        self._dispatchers[stream] = self.loop.create_task(self._dispatch(stream, q))
+
+    def _remove_stream(self, stream: str):
+        with self._lock:
+            if stream in self._consumers: return  # re-subscribed in the meantime
+        conn = self._stream_conn.pop(stream, None)
+        if conn: conn.remove(stream)
+        self._queues.pop(stream, None)
+        task = self._dispatchers.pop(stream, None)
+        if task: task.cancel()
+
+    def _route(self, raw):
+        recv_wall, recv = time.time(), time.perf_counter()
+        if self.recorder: self.recorder.record_ws(raw)
+        try: stream, data = decode_message(raw)
+        except Exception as e: print('stream hub parse error', e); return
+        parsed = time.perf_counter()
+        q = self._queues.get(stream)  # None for SUBSCRIBE acks / late messages
+        if q is None: return
+        metrics.observe_receive(stream, data, recv_wall, recv, parsed)
+        if q.full():
+            q.get_nowait(); self.dropped += 1; metrics.observe_dropped(stream)
+        q.put_nowait((data, parsed))
+
+    async def _dispatch(self, stream: str, q: asyncio.Queue):
+        while True:
+            data, parsed = await q.get()
+            with self._lock: consumers = list(self._consumers.get(stream, ()))
+            metrics.set_context(stream, parsed)   # lets UiScheduler.post attribute updates to this stream
+            for cb in consumers:
+                try: cb(data)
+                except Exception as e: print(f"stream hub consumer error ({stream}): {e}")
+            metrics.clear_context()
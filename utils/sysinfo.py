@@ -0,0 +1,25 @@
+"""Process resource helpers (memory) used for cache limits and benchmarks."""
+import os
+import sys
+
+try:
+    import psutil   # optional
+except ImportError:
+    psutil = None
+
+
+def rss_mb() -> float:
+    """Current resident set size in MiB (0.0 if it cannot be determined)."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / 2**20
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource  # peak RSS: KiB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+    except ImportError:
+        return 0.0